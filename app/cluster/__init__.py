@@ -0,0 +1 @@
+# Coordinator/worker mode for iYTDLP
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import secrets
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from app.cluster.protocol import DEFAULT_PORT, TOKEN_ENV, Connection, default_token
+
+
+def _run_worker(address: str, token: str, outdir: str) -> None:
+    from app.cluster.worker import Worker
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    try:
+        Worker(address, token, Path(outdir)).run()
+    except KeyboardInterrupt:
+        pass
+
+
+def cmd_coordinator(args: argparse.Namespace) -> int:
+    from app.cluster.coordinator import Coordinator
+
+    token = args.token
+    if not token:
+        token = secrets.token_urlsafe(16)
+        print(f"No token given; workers and clients must use --token {token} (or {TOKEN_ENV})", file=sys.stderr)
+    coordinator = Coordinator(
+        token, lease_seconds=args.lease, max_attempts=args.max_attempts, keep_finished=args.keep_finished
+    )
+    try:
+        asyncio.run(coordinator.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def cmd_worker(args: argparse.Namespace) -> int:
+    # Several local processes make a single-box cluster for testing
+    if args.count <= 1:
+        _run_worker(args.connect, args.token, args.outdir)
+        return 0
+    procs = [
+        multiprocessing.Process(target=_run_worker, args=(args.connect, args.token, args.outdir), daemon=True)
+        for _ in range(args.count)
+    ]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+    return 0
+
+
+def cmd_submit(args: argparse.Namespace) -> int:
+    options = {
+        "resolution": args.resolution,
+        "format": args.format,
+        "cookies": args.cookies,
+    }
+    if args.outdir:
+        options["outdir"] = args.outdir
+    conn = Connection(args.connect)
+    try:
+        conn.request("hello", role="client", token=args.token)
+        reply = conn.request("submit", urls=args.urls, options=options)
+    finally:
+        conn.close()
+    print(" ".join(reply["ids"]))
+    return 0
+
+
+def cmd_status(args: argparse.Namespace) -> int:
+    conn = Connection(args.connect)
+    try:
+        conn.request("hello", role="client", token=args.token)
+        jobs = conn.request("snapshot")["jobs"]
+    finally:
+        conn.close()
+    for job in jobs:
+        print(json.dumps(job) if args.json else f"{job['id']:>6}  {job['state']:<10} {job['worker'] or '-':<24} {job['url']}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    default_address = f"127.0.0.1:{DEFAULT_PORT}"
+    parser = argparse.ArgumentParser(prog="python -m app.cluster", description="iYTDLP coordinator/worker mode")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("coordinator", help="Run the central job queue")
+    p.add_argument("--host", default="127.0.0.1", help="Use 0.0.0.0 to accept workers from other hosts")
+    p.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p.add_argument("--lease", type=float, default=30.0, help="Lease length in seconds")
+    p.add_argument("--max-attempts", type=int, default=3)
+    p.add_argument("--keep-finished", type=int, default=1000, help="Finished jobs kept for status and viewers")
+    p.set_defaults(func=cmd_coordinator)
+
+    p = sub.add_parser("worker", help="Pull and run jobs from a coordinator")
+    p.add_argument("--connect", default=default_address)
+    p.add_argument("--outdir", default=str(Path.home() / "Movies" / "iYTDLP"))
+    p.add_argument("--count", type=int, default=1, help="Number of local worker processes")
+    p.set_defaults(func=cmd_worker)
+
+    p = sub.add_parser("submit", help="Queue URLs on a coordinator")
+    p.add_argument("urls", nargs="+")
+    p.add_argument("--connect", default=default_address)
+    p.add_argument("--resolution", default="720p")
+    p.add_argument("--format", default="Auto")
+    p.add_argument("--cookies", default="None")
+    p.add_argument("--outdir", default=None, help="Subfolder of each worker's --outdir")
+    p.set_defaults(func=cmd_submit)
+
+    p = sub.add_parser("status", help="List jobs known to a coordinator")
+    p.add_argument("--connect", default=default_address)
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_status)
+
+    token_help = f"Shared secret (default: ${TOKEN_ENV})"
+    for command in sub.choices.values():
+        command.add_argument("--token", default=default_token(), help=token_help)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
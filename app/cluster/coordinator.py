@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import asyncio
+import hmac
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from app.cluster.protocol import MAX_LINE, ProtocolError, decode, encode
+
+log = logging.getLogger(__name__)
+
+# Job states
+QUEUED = "Queued"
+LEASED = "Leased"
+COMPLETED = "Completed"
+FAILED = "Failed"
+CANCELLED = "Cancelled"
+TERMINAL = (COMPLETED, FAILED, CANCELLED)
+
+
+class Job:
+    def __init__(self, job_id: str, url: str, options: Dict[str, Any]) -> None:
+        self.id = job_id
+        self.url = url
+        self.options = options
+        self.state = QUEUED
+        self.worker: Optional[str] = None
+        self.lease: Optional[int] = None
+        self.lease_expires = 0.0
+        self.attempts = 0
+        self.cancel_requested = False
+        self.progress: Dict[str, Any] = {}
+        self.timings: Dict[str, float] = {}
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "url": self.url,
+            "options": self.options,
+            "state": self.state,
+            "worker": self.worker,
+            "attempts": self.attempts,
+            "progress": self.progress,
+            "timings": self.timings,
+            "error": self.error,
+        }
+
+
+class Coordinator:
+    """
+    Central job queue for distributed workers.
+
+    Workers lease one job at a time and must heartbeat before the lease
+    expires; expired leases are re-queued (up to max_attempts) so jobs held
+    by a dead worker are dispatched again. Viewers receive a snapshot
+    followed by a stream of job updates. Every connection must open with a
+    "hello" carrying the shared token. Only the newest keep_finished
+    finished jobs are kept.
+    """
+
+    def __init__(
+        self, token: str, lease_seconds: float = 30.0, max_attempts: int = 3, keep_finished: int = 1000
+    ) -> None:
+        if not token:
+            raise ValueError("A coordinator needs a token")
+        self._token = token
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.keep_finished = keep_finished
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Deque[str] = deque()
+        # Leased jobs for the reaper, and finished ones oldest first for pruning
+        self._leased_jobs: Dict[str, Job] = {}
+        self._finished: Deque[str] = deque()
+        self._ids = itertools.count(1)
+        self._leases = itertools.count(1)
+        self._watchers: Set[asyncio.Queue] = set()
+        self._wakeup: Optional[asyncio.Condition] = None
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._reaper: Optional[asyncio.Task] = None
+
+    # Lifecycle
+    async def start(self, host: str, port: int) -> int:
+        self._wakeup = asyncio.Condition()
+        self._server = await asyncio.start_server(self._handle, host, port, limit=MAX_LINE)
+        # The loop only keeps a weak reference to tasks; hold it so the reaper is not collected
+        self._reaper = asyncio.create_task(self._reap_loop())
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self, host: str, port: int) -> None:
+        bound = await self.start(host, port)
+        log.info("Coordinator listening on %s:%d", host, bound)
+        assert self._server is not None
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        if self._reaper is not None:
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except asyncio.CancelledError:
+                pass
+            self._reaper = None
+        if self._server is not None:
+            # Stops accepting; open worker and viewer connections end when their peers hang up
+            self._server.close()
+            self._server = None
+
+    # Queue operations
+    async def submit(self, urls: List[str], options: Dict[str, Any]) -> List[str]:
+        ids = []
+        for url in urls:
+            job = Job(str(next(self._ids)), url, dict(options))
+            self._jobs[job.id] = job
+            self._queue.append(job.id)
+            ids.append(job.id)
+            self._publish(job)
+        await self._notify()
+        return ids
+
+    async def lease(self, worker: str, wait: float) -> Optional[Job]:
+        assert self._wakeup is not None
+        deadline = time.monotonic() + wait
+        async with self._wakeup:
+            while True:
+                job = self._pop_queued()
+                if job is not None:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    return None
+        job.state = LEASED
+        job.worker = worker
+        job.lease = next(self._leases)
+        job.lease_expires = time.monotonic() + self.lease_seconds
+        job.attempts += 1
+        job.progress = {}
+        self._leased_jobs[job.id] = job
+        self._publish(job)
+        return job
+
+    def _pop_queued(self) -> Optional[Job]:
+        while self._queue:
+            job = self._jobs.get(self._queue.popleft())
+            if job is not None and job.state == QUEUED:
+                return job
+        return None
+
+    def _leased(self, msg: Dict[str, Any]) -> Job:
+        # Reject updates from a worker whose lease was already re-dispatched
+        job = self._jobs.get(str(msg.get("job_id")))
+        if job is None:
+            raise ProtocolError("Unknown job")
+        if job.state != LEASED or job.lease != msg.get("lease"):
+            raise ProtocolError("Lease lost")
+        return job
+
+    def heartbeat(self, msg: Dict[str, Any]) -> Job:
+        job = self._leased(msg)
+        job.lease_expires = time.monotonic() + self.lease_seconds
+        if msg.get("progress"):
+            job.progress = msg["progress"]
+        if msg.get("timings"):
+            job.timings = msg["timings"]
+        self._publish(job)
+        return job
+
+    def finish(self, msg: Dict[str, Any], state: str) -> None:
+        job = self._leased(msg)
+        del self._leased_jobs[job.id]
+        job.state = state
+        job.lease = None
+        job.timings = msg.get("timings") or job.timings
+        job.error = msg.get("error")
+        self._publish(job)
+        self._retire(job)
+
+    async def cancel(self, job_id: str) -> None:
+        job = self._jobs.get(job_id)
+        if job is None or job.state in TERMINAL:
+            return
+        if job.state == QUEUED:
+            job.state = CANCELLED
+            self._queue.remove(job.id)
+        else:
+            # The worker learns about it on its next heartbeat
+            job.cancel_requested = True
+        self._publish(job)
+        if job.state in TERMINAL:
+            self._retire(job)
+
+    def _retire(self, job: Job) -> None:
+        self._finished.append(job.id)
+        while len(self._finished) > self.keep_finished:
+            self._jobs.pop(self._finished.popleft(), None)
+
+    async def _reap_loop(self) -> None:
+        while True:
+            await asyncio.sleep(min(1.0, self.lease_seconds / 4))
+            now = time.monotonic()
+            requeued = False
+            for job in list(self._leased_jobs.values()):
+                if job.lease_expires > now:
+                    continue
+                log.warning("Lease expired for job %s on %s", job.id, job.worker)
+                del self._leased_jobs[job.id]
+                job.lease = None
+                job.worker = None
+                if job.cancel_requested:
+                    job.state = CANCELLED
+                elif job.attempts >= self.max_attempts:
+                    job.state = FAILED
+                    job.error = "Lease expired"
+                else:
+                    job.state = QUEUED
+                    self._queue.appendleft(job.id)
+                    requeued = True
+                self._publish(job)
+                if job.state in TERMINAL:
+                    self._retire(job)
+            if requeued:
+                await self._notify()
+
+    async def _notify(self) -> None:
+        assert self._wakeup is not None
+        async with self._wakeup:
+            self._wakeup.notify_all()
+
+    def _publish(self, job: Job) -> None:
+        event = {"event": "job", "job": job.to_dict()}
+        for q in self._watchers:
+            q.put_nowait(event)
+
+    # Connection handling
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        authenticated = False
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    msg = decode(line)
+                    if not authenticated:
+                        self._authenticate(msg)
+                        authenticated = True
+                        reply = {"ok": True, "lease_seconds": self.lease_seconds}
+                    elif msg.get("op") == "watch":
+                        await self._watch(writer)
+                        break
+                    else:
+                        reply = await self._dispatch(msg)
+                except ProtocolError as e:
+                    reply = {"ok": False, "error": str(e)}
+                writer.write(encode(reply))
+                await writer.drain()
+                if not authenticated:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _authenticate(self, msg: Dict[str, Any]) -> None:
+        if msg.get("op") != "hello":
+            raise ProtocolError("Expected hello")
+        token = str(msg.get("token") or "")
+        if not hmac.compare_digest(token.encode("utf-8"), self._token.encode("utf-8")):
+            raise ProtocolError("Bad token")
+
+    async def _dispatch(self, msg: Dict[str, Any]) -> Dict[str, Any]:
+        op = msg.get("op")
+        if op == "hello":
+            return {"ok": True, "lease_seconds": self.lease_seconds}
+        if op == "submit":
+            urls = [str(u) for u in msg.get("urls") or []]
+            return {"ok": True, "ids": await self.submit(urls, msg.get("options") or {})}
+        if op == "lease":
+            wait = max(0.0, min(float(msg.get("wait") or 0.0), 60.0))
+            job = await self.lease(str(msg.get("worker") or "?"), wait)
+            if job is None:
+                return {"ok": True, "job": None}
+            return {"ok": True, "job": job.to_dict(), "lease": job.lease}
+        if op == "heartbeat":
+            job = self.heartbeat(msg)
+            return {"ok": True, "cancel": job.cancel_requested}
+        if op == "complete":
+            self.finish(msg, COMPLETED)
+            return {"ok": True}
+        if op == "fail":
+            self.finish(msg, CANCELLED if msg.get("cancelled") else FAILED)
+            return {"ok": True}
+        if op == "cancel":
+            await self.cancel(str(msg.get("job_id")))
+            return {"ok": True}
+        if op == "snapshot":
+            return {"ok": True, "jobs": [j.to_dict() for j in self._jobs.values()]}
+        raise ProtocolError(f"Unknown op: {op}")
+
+    async def _watch(self, writer: asyncio.StreamWriter) -> None:
+        q: asyncio.Queue = asyncio.Queue()
+        self._watchers.add(q)
+        try:
+            writer.write(encode({"ok": True}))
+            for job in list(self._jobs.values()):
+                writer.write(encode({"event": "job", "job": job.to_dict()}))
+            await writer.drain()
+            while True:
+                writer.write(encode(await q.get()))
+                await writer.drain()
+        finally:
+            self._watchers.discard(q)
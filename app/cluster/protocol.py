@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import threading
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+
+# Newline-delimited JSON over TCP. Every request carries an "op"; every reply
+# carries "ok" and, on failure, "error".
+DEFAULT_PORT = 8765
+MAX_LINE = 1 << 20
+
+# Shared secret every connection presents in its "hello"
+TOKEN_ENV = "IYTDLP_CLUSTER_TOKEN"
+
+# Progress keys forwarded from yt-dlp hook dicts (the rest is not JSON-safe)
+_PROGRESS_KEYS = (
+    "status",
+    "downloaded_bytes",
+    "total_bytes",
+    "total_bytes_estimate",
+    "speed",
+    "eta",
+    "filename",
+)
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def encode(msg: Dict[str, Any]) -> bytes:
+    return json.dumps(msg, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def decode(line: bytes) -> Dict[str, Any]:
+    try:
+        msg = json.loads(line.decode("utf-8"))
+    except ValueError as e:
+        raise ProtocolError(f"Malformed message: {e}") from e
+    if not isinstance(msg, dict):
+        raise ProtocolError("Message must be a JSON object")
+    return msg
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    host, _, port = (address or "").strip().rpartition(":")
+    if not host:
+        return (port or "127.0.0.1", DEFAULT_PORT)
+    try:
+        return (host, int(port))
+    except ValueError as e:
+        raise ProtocolError(f"Invalid address: {address}") from e
+
+
+def default_token() -> str:
+    return os.environ.get(TOKEN_ENV, "")
+
+
+def progress_subset(d: dict) -> Dict[str, Any]:
+    return {k: d[k] for k in _PROGRESS_KEYS if d.get(k) is not None}
+
+
+class Connection:
+    """Blocking request/response client used by workers, viewers and the CLI."""
+
+    def __init__(self, address: str, timeout: Optional[float] = 30.0) -> None:
+        host, port = parse_address(address)
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._file: BinaryIO = self._sock.makefile("rwb")
+        self._lock = threading.Lock()
+
+    def request(self, op: str, **fields: Any) -> Dict[str, Any]:
+        fields["op"] = op
+        with self._lock:
+            self._file.write(encode(fields))
+            self._file.flush()
+            reply = self.read()
+        if not reply.get("ok"):
+            raise ProtocolError(reply.get("error") or f"{op} failed")
+        return reply
+
+    def read(self) -> Dict[str, Any]:
+        line = self._file.readline(MAX_LINE)
+        if not line:
+            raise ConnectionError("Coordinator closed the connection")
+        return decode(line)
+
+    def settimeout(self, timeout: Optional[float]) -> None:
+        self._sock.settimeout(timeout)
+
+    def close(self) -> None:
+        # shutdown() first so a reader blocked in another thread wakes up
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        finally:
+            self._sock.close()
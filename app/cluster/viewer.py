@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from app.cluster.protocol import Connection
+
+
+class ViewerSignals(QObject):
+    job = Signal(dict)          # job snapshot from the coordinator
+    disconnected = Signal(str)  # reason
+
+
+class CoordinatorViewer(QRunnable):
+    """Read-only subscription to a coordinator's job stream, run off the UI thread."""
+
+    def __init__(self, address: str, token: str) -> None:
+        super().__init__()
+        self.address = address
+        self.token = token
+        self.signals = ViewerSignals()
+        self._conn: Connection | None = None
+        self._stopped = False
+
+    def stop(self) -> None:
+        self._stopped = True
+        if self._conn is not None:
+            self._conn.close()
+
+    def run(self) -> None:
+        try:
+            self._conn = Connection(self.address, timeout=10.0)
+            self._conn.request("hello", role="viewer", token=self.token)
+            self._conn.request("watch")
+            self._conn.settimeout(None)
+            while not self._stopped:
+                msg = self._conn.read()
+                if msg.get("event") == "job":
+                    self.signals.job.emit(msg["job"])
+        except Exception as e:
+            if not self._stopped:
+                self.signals.disconnected.emit(str(e))
+        finally:
+            if self._conn is not None:
+                self._conn.close()
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.cluster.protocol import Connection, ProtocolError, progress_subset
+from app.core.options import build_ydl_opts
+
+log = logging.getLogger(__name__)
+
+
+class PhaseTimer:
+    """Accumulates wall-clock seconds per phase (extract, download, postprocess)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._totals: Dict[str, float] = {}
+        self._phase: Optional[str] = None
+        self._since = 0.0
+
+    def enter(self, phase: Optional[str]) -> None:
+        with self._lock:
+            if phase == self._phase:
+                return
+            now = time.monotonic()
+            if self._phase is not None:
+                self._totals[self._phase] = self._totals.get(self._phase, 0.0) + now - self._since
+            self._phase = phase
+            self._since = now
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            totals = dict(self._totals)
+            if self._phase is not None:
+                totals[self._phase] = totals.get(self._phase, 0.0) + time.monotonic() - self._since
+        return {k: round(v, 3) for k, v in totals.items()}
+
+
+class Worker:
+    """Pulls jobs from a coordinator and runs them with yt-dlp, one at a time."""
+
+    def __init__(self, address: str, token: str, outdir: Path, name: Optional[str] = None) -> None:
+        self.address = address
+        self.token = token
+        self.outdir = outdir
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                conn = Connection(self.address, timeout=None)
+            except OSError as e:
+                log.warning("Cannot reach coordinator %s: %s", self.address, e)
+                self._stop.wait(2.0)
+                continue
+            try:
+                lease_seconds = float(conn.request("hello", role="worker", name=self.name, token=self.token)["lease_seconds"])
+                while not self._stop.is_set():
+                    reply = conn.request("lease", worker=self.name, wait=10)
+                    if reply.get("job"):
+                        self._run_job(conn, reply["job"], reply["lease"], lease_seconds)
+            except (OSError, ConnectionError) as e:
+                log.warning("Coordinator connection lost: %s", e)
+                self._stop.wait(1.0)
+            finally:
+                conn.close()
+
+    def _job_outdir(self, job_id: str, requested: Optional[str]) -> Path:
+        # Submitters may pick a subfolder, but never a path outside this worker's --outdir
+        base = self.outdir.expanduser().resolve()
+        if not requested:
+            return base
+        path = (base / Path(requested).expanduser()).resolve()
+        if path != base and base not in path.parents:
+            log.warning("Job %s: ignoring outdir %s outside %s", job_id, requested, base)
+            return base
+        return path
+
+    def _run_job(self, conn: Connection, job: Dict[str, Any], lease: int, lease_seconds: float) -> None:
+        job_id = job["id"]
+        timer = PhaseTimer()
+        cancelled = threading.Event()
+        lost = threading.Event()
+        done = threading.Event()
+        latest: Dict[str, Any] = {}
+
+        def beat() -> None:
+            # Renew the lease well before it expires, piggybacking the latest progress
+            interval = max(0.2, min(1.0, lease_seconds / 3))
+            while not done.wait(interval):
+                try:
+                    reply = conn.request(
+                        "heartbeat", job_id=job_id, lease=lease,
+                        progress=dict(latest), timings=timer.snapshot(),
+                    )
+                except (ProtocolError, OSError, ConnectionError):
+                    # Nothing renews the lease any more, so another worker will get the job: stop
+                    lost.set()
+                    return
+                if reply.get("cancel"):
+                    cancelled.set()
+
+        def progress_hook(d: dict) -> None:
+            status = d.get("status")
+            timer.enter("download" if status == "downloading" else None)
+            latest.clear()
+            latest.update(progress_subset(d))
+            if cancelled.is_set() or lost.is_set():
+                raise KeyboardInterrupt("Cancelled")
+
+        def pp_hook(d: dict) -> None:
+            timer.enter("postprocess" if d.get("status") == "started" else None)
+            if lost.is_set():
+                raise KeyboardInterrupt("Lease lost")
+
+        opts = job.get("options") or {}
+        ydl_opts = build_ydl_opts(
+            self._job_outdir(job_id, opts.get("outdir")),
+            opts.get("resolution") or "720p",
+            opts.get("cookies"),
+            opts.get("format"),
+            bool(opts.get("embed_thumbnail")),
+            bool(opts.get("add_metadata")),
+            progress_hook=progress_hook,
+            on_plan=lambda plan: log.info("Job %s: %s", job_id, plan.describe()),
+        )
+        ydl_opts["postprocessor_hooks"] = [pp_hook]
+
+        heartbeat = threading.Thread(target=beat, name=f"heartbeat-{job_id}", daemon=True)
+        heartbeat.start()
+        error: Optional[str] = None
+        try:
+            import yt_dlp as ytdlp  # type: ignore
+
+            timer.enter("extract")
+            with ytdlp.YoutubeDL(ydl_opts) as ydl:
+                ydl.download([job["url"]])
+        except KeyboardInterrupt:
+            error = "Cancelled"
+        except Exception as e:
+            error = str(e)
+        finally:
+            timer.enter(None)
+            done.set()
+            heartbeat.join()
+
+        if lost.is_set():
+            # The coordinator re-dispatches this job once the lease runs out, if it has not already
+            log.warning("Dropped result for job %s: lease lost", job_id)
+            return
+        try:
+            if error is None:
+                conn.request("complete", job_id=job_id, lease=lease, timings=timer.snapshot())
+            else:
+                conn.request(
+                    "fail", job_id=job_id, lease=lease, error=error,
+                    cancelled=cancelled.is_set(), timings=timer.snapshot(),
+                )
+        except ProtocolError as e:
+            log.warning("Result for job %s rejected: %s", job_id, e)
@@ -1,18 +1,386 @@
 from __future__ import annotations
 
-from typing import Dict
-
-# Maps UI labels to yt-dlp format strings
-_FORMATS: Dict[str, str] = {
-    "2160p": "bestvideo[height<=2160]+bestaudio/best[height<=2160]",
-    "1440p": "bestvideo[height<=1440]+bestaudio/best[height<=1440]",
-    "1080p": "bestvideo[height<=1080]+bestaudio/best[height<=1080]",
-    "720p": "bestvideo[height<=720]+bestaudio/best[height<=720]",
-    "480p": "bestvideo[height<=480]+bestaudio/best[height<=480]",
-    "360p": "bestvideo[height<=360]+bestaudio/best[height<=360]",
-    "Audio only": "bestaudio/best",
+import math
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.core.utils import human_bytes
+
+# Format planner
+#
+# Instead of always asking for bestvideo+bestaudio (two downloads and an
+# ffmpeg merge), plan_formats looks at a video's actual format list and picks
+# the cheapest way to reach the requested height and container. Costs are in
+# bytes-of-transfer equivalents so they can be compared directly.
+
+# One HTTP request (connection setup, TTFB) is worth about this much transfer
+_REQUEST_COST = 256 * 1024
+# Merging or remuxing re-reads and re-writes every byte locally
+_COPY_COST = 0.2
+# A transcode is CPU bound and far slower than any download
+_REENCODE_COST = 20.0
+# Audio within this fraction of the best bitrate counts as the same quality
+_AUDIO_FLOOR = 0.9
+# Used when a format has neither a size nor a bitrate
+_FALLBACK_KBPS_PER_LINE = 4
+_FALLBACK_AUDIO_KBPS = 128
+_FALLBACK_DURATION = 300
+_HLS_SEGMENT_SECONDS = 6
+
+# Codecs ffmpeg can stream-copy into each container (normalised, see _codec)
+_COPY_CODECS: Dict[str, set] = {
+    "mp4": {"avc1", "h264", "hevc", "hev1", "hvc1", "av1", "vp9", "mp4a", "aac", "ac-3", "ec-3", "mp3", "opus", "flac"},
+    "webm": {"vp8", "vp9", "av1", "opus", "vorbis"},
 }
+# Codecs each container is expected to hold; used for "Auto", where yt-dlp falls back to mkv
+_NATIVE_CODECS: Dict[str, set] = {
+    "mp4": {"avc1", "h264", "hevc", "hev1", "hvc1", "av1", "mp4a", "aac", "ac-3", "ec-3", "mp3"},
+    "webm": {"vp8", "vp9", "av1", "opus", "vorbis"},
+}
+_CODEC_ALIASES = {"vp09": "vp9", "av01": "av1", "vrbs": "vorbis", "aacl": "aac", "h265": "hevc"}
+
+# Single-file container changes: these source extensions are remuxed, other video is re-encoded
+_REMUX_FROM: Dict[str, Sequence[str]] = {"mp4": ("webm", "mkv", "mov", "m4v"), "webm": ()}
+_VIDEO_EXTS = ("mp4", "webm", "mkv", "mov", "m4v", "flv", "3gp", "avi", "ts")
+# Protocols that yt-dlp hands to ffmpeg instead of downloading natively
+_FFMPEG_PROTOCOLS = ("m3u8", "rtsp", "mms")
+
+
+class FormatPlan:
+    def __init__(
+        self,
+        formats: List[dict],
+        ext: str,
+        size: int,
+        requests: int,
+        conversion: Optional[str],
+        cost: float,
+    ) -> None:
+        self.formats = formats        # one progressive/audio format, or video + audio to merge
+        self.ext = ext                # container of the downloaded (or merged) file
+        self.size = size              # estimated bytes to transfer
+        self.requests = requests      # HTTP requests (fragments count individually)
+        self.conversion = conversion  # None, "remux" or "re-encode" after download
+        self.cost = cost
+        self.note: Optional[str] = None  # set when the plan is a fallback (see plan_selector)
+
+    @property
+    def format_id(self) -> str:
+        return "+".join(str(f.get("format_id")) for f in self.formats)
+
+    @property
+    def merge(self) -> bool:
+        return len(self.formats) > 1
+
+    @property
+    def height(self) -> Optional[int]:
+        return next((f.get("height") for f in self.formats if f.get("height")), None)
+
+    def describe(self) -> str:
+        parts = [self.format_id]
+        parts.append(f"{self.height}p {self.ext}" if self.height else self.ext)
+        if self.merge:
+            parts.append("merge")
+        if self.conversion:
+            parts.append(self.conversion)
+        if self.note:
+            parts.append(self.note)
+        # Bitrate-based estimates only rank plans; show a size only when the site reported one
+        if all(f.get("filesize") or f.get("filesize_approx") for f in self.formats):
+            parts.append(f"~{human_bytes(self.size)}")
+        return " · ".join(parts)
+
+    def to_format(self) -> dict:
+        # The dict yt-dlp's own selector would yield for this choice
+        if not self.merge:
+            return self.formats[0]
+        video, audio = self.formats
+        return {
+            "requested_formats": self.formats,
+            "format": "+".join(str(f.get("format") or f.get("format_id")) for f in self.formats),
+            "format_id": self.format_id,
+            "ext": self.ext,
+            "protocol": "+".join(str(f.get("protocol") or "https") for f in self.formats),
+            "filesize_approx": self.size,
+            "tbr": sum(f.get("tbr") or 0 for f in self.formats) or None,
+            "width": video.get("width"),
+            "height": video.get("height"),
+            "fps": video.get("fps"),
+            "vcodec": video.get("vcodec"),
+            "vbr": video.get("vbr"),
+            "acodec": audio.get("acodec"),
+            "abr": audio.get("abr"),
+            "asr": audio.get("asr"),
+        }
+
+
+def plan_formats(
+    formats: List[dict],
+    label: str,
+    container: Optional[str] = None,
+    has_ffmpeg: bool = True,
+    duration: Optional[float] = None,
+) -> Optional[FormatPlan]:
+    """
+    Cheapest plan that reaches the label's height (or best audio) in the requested container.
+
+    Heights are tried from the best available at or below the cap downwards;
+    a lower height is only used when nothing at the higher one is feasible
+    (e.g. only separate streams exist and ffmpeg is missing). None when no
+    format can be used as asked; see plan_selector for what happens then.
+    """
+    target = (container or "").strip().lower()
+    usable = [f for f in formats if _is_media(f)]
+    if not usable:
+        return None
+    if label == "Audio only" or target == "mp3":
+        audio = [f for f in usable if not _has_video(f)] or [f for f in usable if _has_audio(f)]
+        plans = [_evaluate([f], target, has_ffmpeg, duration, audio_only=True) for f in _best_audio(audio)]
+        return _cheapest(plans)
+
+    cap = _height_cap(label)
+    video = [f for f in usable if _has_video(f)]
+    audio = _best_audio([f for f in usable if not _has_video(f)])
+    heights = sorted({f["height"] for f in video if f.get("height") and f["height"] <= cap}, reverse=True)
+    # Formats without a height (direct links, bare manifests) are the last resort
+    for height in [*heights, None]:
+        plans = []
+        for fmt in video:
+            if fmt.get("height") != height:
+                continue
+            if _has_audio(fmt) or not audio:
+                # A site without any audio stream still gets its video, as with yt-dlp's "best"
+                plans.append(_evaluate([fmt], target, has_ffmpeg, duration))
+            else:
+                plans.extend(_evaluate([fmt, a], target, has_ffmpeg, duration) for a in audio)
+        # For Auto, an mkv merge of mismatched codecs plays in fewer places than a
+        # native mp4/webm pairing at the same height, so it is only used when no pairing fits
+        native = [p for p in plans if p is not None and not (p.merge and p.ext == "mkv")]
+        plan = _cheapest(native) or _cheapest(plans)
+        if plan is not None:
+            return plan
+    return None
+
+
+def plan_selector(
+    label: str,
+    container: Optional[str] = None,
+    has_ffmpeg: bool = True,
+    on_plan: Optional[Callable[[FormatPlan], None]] = None,
+) -> Callable[[dict], Iterator[dict]]:
+    """
+    yt-dlp "format" callable: runs the planner on each video's format list.
+
+    Without a feasible plan it falls back to what "bestvideo+bestaudio/best" did:
+    the best pair is planned as if ffmpeg were there (yt-dlp then keeps the
+    streams as separate files and warns), and a container that fits nothing is
+    dropped; the conversion postprocessors then bring the file to that container,
+    so the plan shows (and is charged for) that conversion. Only an empty list
+    selects nothing. Plans are cached per format
+    list, so yt-dlp selecting again for the download reuses the plan and
+    on_plan hears about each video once.
+    """
+    chosen: Dict[Tuple, Optional[FormatPlan]] = {}
+
+    def select(ctx: dict) -> Iterator[dict]:
+        formats = ctx.get("formats") or []
+        key = tuple((f.get("format_id"), f.get("url")) for f in formats)
+        if key in chosen:
+            plan = chosen[key]
+            if plan is not None:
+                # Same formats, possibly copied between passes; hand back this pass's dicts
+                by_id = {f.get("format_id"): f for f in formats}
+                plan.formats = [by_id.get(f.get("format_id"), f) for f in plan.formats]
+        else:
+            # yt-dlp passes only the format list, so bitrate-based sizes assume _FALLBACK_DURATION
+            plan = plan_formats(formats, label, container, has_ffmpeg)
+            if plan is None and not has_ffmpeg:
+                plan = plan_formats(formats, label, container, True)
+                if plan is not None and plan.merge:
+                    plan.note = "no ffmpeg, not merged"
+            if plan is None:
+                plan = plan_formats(formats, label, None, True)
+                if plan is not None and has_ffmpeg:
+                    _add_postprocessed_conversion(plan, label, container)
+                elif plan is not None and plan.merge:
+                    plan.note = "no ffmpeg, not merged"
+            chosen[key] = plan
+            if plan is not None and on_plan is not None:
+                on_plan(plan)
+        if plan is not None:
+            yield plan.to_format()
+
+    return select
+
+
+def conversion_postprocessors(label: str, container: Optional[str]) -> List[dict]:
+    # Executes the single-file conversions the planner assumed (see _conversion); audio is left alone
+    target = (container or "").strip().lower()
+    if target not in _REMUX_FROM or label == "Audio only":
+        return []
+    remux = "/".join(f"{ext}>{target}" for ext in _REMUX_FROM[target])
+    recode = "/".join(f"{ext}>{target}" for ext in _VIDEO_EXTS if ext != target and ext not in _REMUX_FROM[target])
+    pps = []
+    if remux:
+        pps.append({"key": "FFmpegVideoRemuxer", "preferedformat": remux})
+    pps.append({"key": "FFmpegVideoConvertor", "preferedformat": recode})
+    return pps
+
+
+# Planner internals
+def _add_postprocessed_conversion(plan: FormatPlan, label: str, container: Optional[str]) -> None:
+    # What conversion_postprocessors will do to a plan made without the container
+    target = (container or "").strip().lower()
+    if target not in _REMUX_FROM or label == "Audio only" or plan.ext == target or plan.ext not in _VIDEO_EXTS:
+        return
+    if plan.ext in _REMUX_FROM[target]:
+        plan.conversion = "remux"
+        plan.cost += plan.size * _COPY_COST
+    else:
+        plan.conversion = "re-encode"
+        plan.cost += plan.size * _REENCODE_COST
+
+
+def _is_media(fmt: dict) -> bool:
+    if fmt.get("vcodec") == "none" and fmt.get("acodec") == "none":
+        return False  # storyboards, images
+    return not fmt.get("has_drm") and fmt.get("ext") != "mhtml"
+
+
+def _has_video(fmt: dict) -> bool:
+    # Unknown codecs (None) count as present, as in yt-dlp's "best"
+    return fmt.get("vcodec") != "none"
+
+
+def _has_audio(fmt: dict) -> bool:
+    return fmt.get("acodec") != "none"
+
+
+def _codec(value: Optional[str]) -> Optional[str]:
+    if not value or value == "none":
+        return None
+    name = value.split(".")[0].lower()
+    return _CODEC_ALIASES.get(name, name)
+
+
+def _height_cap(label: str) -> int:
+    try:
+        return int(label.rstrip("p"))
+    except (AttributeError, ValueError):
+        return 720
+
+
+def _best_audio(formats: List[dict]) -> List[dict]:
+    # Every audio format within _AUDIO_FLOOR of the best bitrate; the cost picks among them
+    rate = lambda f: f.get("abr") or f.get("tbr") or 0  # noqa: E731
+    best = max((rate(f) for f in formats), default=0)
+    return [f for f in formats if rate(f) >= best * _AUDIO_FLOOR]
+
+
+def _size(fmt: dict, duration: Optional[float]) -> int:
+    size = fmt.get("filesize") or fmt.get("filesize_approx")
+    if size:
+        return int(size)
+    seconds = duration or fmt.get("duration") or _FALLBACK_DURATION
+    kbps = fmt.get("tbr") or fmt.get("vbr") or fmt.get("abr")
+    if not kbps:
+        kbps = (fmt.get("height") or 0) * _FALLBACK_KBPS_PER_LINE if _has_video(fmt) else 0
+        if _has_audio(fmt):
+            kbps += _FALLBACK_AUDIO_KBPS
+    return int(kbps * 1000 / 8 * seconds)
+
+
+def _audio_size(fmt: dict, duration: Optional[float]) -> int:
+    if not _has_video(fmt):
+        return _size(fmt, duration)
+    seconds = duration or fmt.get("duration") or _FALLBACK_DURATION
+    return int((fmt.get("abr") or _FALLBACK_AUDIO_KBPS) * 1000 / 8 * seconds)
+
+
+def _requests(fmt: dict, duration: Optional[float]) -> int:
+    fragments = fmt.get("fragments")
+    if fragments:
+        return len(fragments)
+    if str(fmt.get("protocol") or "").startswith("m3u8"):
+        seconds = duration or fmt.get("duration") or _FALLBACK_DURATION
+        return max(1, math.ceil(seconds / _HLS_SEGMENT_SECONDS))
+    return 1
+
+
+def _fits(container: str, formats: List[dict], table: Dict[str, set] = _COPY_CODECS) -> bool:
+    allowed = table[container]
+    codecs = {_codec(f.get(k)) for f in formats for k in ("vcodec", "acodec")} - {None}
+    return codecs <= allowed
+
+
+def _merge_ext(video: dict, audio: dict, target: str) -> Optional[str]:
+    # Mirrors yt-dlp: merge_output_format when set, else the first container both streams fit
+    if target in _COPY_CODECS:
+        return target if _fits(target, [video, audio]) else None
+    for ext in ("mp4", "webm"):
+        if _fits(ext, [video, audio], _NATIVE_CODECS):
+            return ext
+    return "mkv"
+
+
+def _conversion(fmt: dict, target: str) -> Optional[str]:
+    ext = fmt.get("ext")
+    if target not in _REMUX_FROM or ext == target or ext not in _VIDEO_EXTS or not _has_video(fmt):
+        return None
+    if ext in _REMUX_FROM[target]:
+        # The remux copies streams, so the codecs must be allowed in the target
+        return "remux" if _fits(target, [fmt]) else "unsupported"
+    return "re-encode"
+
+
+def _evaluate(
+    formats: List[dict],
+    target: str,
+    has_ffmpeg: bool,
+    duration: Optional[float],
+    audio_only: bool = False,
+) -> Optional[FormatPlan]:
+    size = sum(_size(f, duration) for f in formats)
+    requests = sum(_requests(f, duration) for f in formats)
+    cost = size + requests * _REQUEST_COST
+    conversion = None
+    if not has_ffmpeg and any(f.get("protocol") in _FFMPEG_PROTOCOLS for f in formats):
+        return None
+    if len(formats) > 1:
+        if not has_ffmpeg:
+            return None
+        ext = _merge_ext(formats[0], formats[1], target)
+        if ext is None:
+            return None
+        cost += size * _COPY_COST
+    else:
+        ext = formats[0].get("ext") or "mp4"
+        if target == "mp3":
+            # Audio extraction transcodes whatever comes in, unless it already is mp3
+            conversion = "re-encode" if has_ffmpeg and ext != "mp3" else None
+        elif audio_only:
+            # Audio only is never converted (see conversion_postprocessors), even a muxed file
+            conversion = None
+        else:
+            conversion = _conversion(formats[0], target)
+        if conversion == "unsupported":
+            return None
+        if (audio_only or not _has_video(formats[0])) and target in _COPY_CODECS and not _fits(target, formats):
+            # Audio is never converted, but audio that fits the chosen container is preferred
+            cost += size * _COPY_COST
+        if conversion is not None and not has_ffmpeg:
+            # Cannot convert; still usable, but a file already in the right container wins
+            conversion = None
+            cost += size * _COPY_COST
+        elif conversion == "remux":
+            cost += size * _COPY_COST
+        elif conversion == "re-encode" and target == "mp3":
+            # Only the audio stream is decoded, whatever else the file carries
+            cost += _audio_size(formats[0], duration) * _REENCODE_COST
+        elif conversion == "re-encode":
+            cost += size * _REENCODE_COST
+    return FormatPlan(list(formats), ext, size, requests, conversion, cost)
 
 
-def format_for_label(label: str) -> str:
-    return _FORMATS.get(label, _FORMATS["720p"])  # default to 720p
+def _cheapest(plans: List[Optional[FormatPlan]]) -> Optional[FormatPlan]:
+    plans = [p for p in plans if p is not None]
+    return min(plans, key=lambda p: p.cost) if plans else None
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from app.core.formats import FormatPlan, conversion_postprocessors, plan_selector
+from app.core.utils import browser_key_from_label, detect_ffmpeg
+
+
+def build_ydl_opts(
+    outdir: Path,
+    resolution_label: str,
+    cookies_label: Optional[str],
+    selected_format: Optional[str] = None,
+    embed_thumbnail: bool = False,
+    add_metadata: bool = False,
+    progress_hook: Optional[Callable[[dict], None]] = None,
+    buffer_size: int = 0,
+    on_plan: Optional[Callable[[FormatPlan], None]] = None,
+) -> dict:
+    # Qt-free so that headless workers (app.cluster) build the same options as the GUI
+    sf = (selected_format or "").strip().upper()
+    has_ffmpeg = detect_ffmpeg()
+    ydl_opts: dict = {
+        "outtmpl": str(outdir / "%(title)s [%(id)s].%(ext)s"),
+        # Chosen per video from its format list (app.core.formats.plan_formats)
+        "format": plan_selector(resolution_label, sf, has_ffmpeg, on_plan),
+        "noprogress": True,
+        "quiet": True,
+        "progress_hooks": [progress_hook] if progress_hook else [],
+    }
+    if buffer_size:
+        # Fixed block size per read/write instead of yt-dlp's adaptive 1 KiB..4 MiB
+        ydl_opts["buffersize"] = int(buffer_size)
+        ydl_opts["noresizebuffer"] = True
+
+    # Apply container/format preferences
+    postprocessors: List[dict] = []
+
+    if sf == "MP3":
+        # Audio-only plan (see plan_formats); extract to mp3 only if ffmpeg is available
+        if has_ffmpeg:
+            postprocessors.append({
+                "key": "FFmpegExtractAudio",
+                "preferredcodec": "mp3",
+                "preferredquality": "192",
+            })
+            if embed_thumbnail:
+                ydl_opts["writethumbnail"] = True
+                postprocessors.append({"key": "EmbedThumbnail"})
+            if add_metadata:
+                postprocessors.append({"key": "FFmpegMetadata"})
+    else:
+        if sf == "MP4":
+            ydl_opts["merge_output_format"] = "mp4"
+        elif sf == "WEBM":
+            ydl_opts["merge_output_format"] = "webm"
+        if has_ffmpeg:
+            # Single files in another container are remuxed or re-encoded, as planned
+            postprocessors.extend(conversion_postprocessors(resolution_label, sf))
+        # Optional postprocessors for video outputs
+        if add_metadata and has_ffmpeg:
+            postprocessors.append({"key": "FFmpegMetadata"})
+        if embed_thumbnail and has_ffmpeg:
+            # EmbedThumbnail only embeds an image that is already on disk
+            ydl_opts["writethumbnail"] = True
+            postprocessors.append({"key": "EmbedThumbnail"})
+
+    if postprocessors:
+        ydl_opts["postprocessors"] = postprocessors
+
+    browser_key = browser_key_from_label(cookies_label or "")
+    if browser_key:
+        # yt-dlp expects a tuple; profile/keyring left default
+        ydl_opts["cookiesfrombrowser"] = (browser_key,)
+
+    return ydl_opts
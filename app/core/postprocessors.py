@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import shutil
+from typing import Callable
+
+# Imports yt-dlp; only import this from inside a download thread (see DownloadTask.run)
+from yt_dlp.postprocessor.common import PostProcessor
+from yt_dlp.utils import determine_ext, replace_extension
+
+from app.core.thumbnails import ThumbnailStore
+
+
+class BeforeDownloadPP(PostProcessor):
+    """Calls a function with each video's info once its formats are chosen, before it downloads."""
+
+    def __init__(self, callback: Callable[[dict], None], downloader=None) -> None:
+        super().__init__(downloader)
+        self.callback = callback
+
+    def run(self, info: dict):
+        self.callback(info)
+        return [], info
+
+
+class CachedThumbnailPP(PostProcessor):
+    """
+    Supplies the thumbnail for EmbedThumbnail from the shared ThumbnailStore.
+
+    Stands in for yt-dlp's own thumbnail writing (writethumbnail), so an image
+    the table has already fetched is copied instead of downloaded again, and
+    one fetched here is there for the table. Runs before the download.
+    """
+
+    def __init__(self, store: ThumbnailStore, downloader=None) -> None:
+        super().__init__(downloader)
+        self.store = store
+
+    def run(self, info: dict):
+        thumbs = [t for t in info.get("thumbnails") or [] if t.get("url")]
+        if not thumbs or any(t.get("filepath") for t in thumbs) or not info.get("_filename"):
+            return [], info
+        thumb = thumbs[-1]
+        # Same name yt-dlp would have written; EmbedThumbnail deletes it once embedded
+        ext = thumb.get("ext") or determine_ext(thumb["url"], "jpg")
+        dest = replace_extension(info["_filename"], ext, info.get("ext"))
+        try:
+            shutil.copyfile(self.store.fetch(thumb["url"], thumb.get("http_headers")), dest)
+        except Exception as e:
+            # The download goes on without the thumbnail, as it would with yt-dlp's own
+            self.report_warning(f"Unable to fetch thumbnail: {e}")
+            return [], info
+        thumb["filepath"] = dest
+        return [], info
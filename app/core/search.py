@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import re
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Set
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Fields kept per job; any keyword passed to SearchIndex.update must be one of these
+FIELDS = ("title", "url", "video_id", "status", "output")
+
+# Shorter terms match whole tokens only; a one-letter prefix would union most of the vocabulary
+_MIN_PREFIX = 2
+
+# Below this many candidates, remaining terms are checked per job instead of
+# unioning every posting list that shares the prefix
+_VERIFY_LIMIT = 2048
+
+# Sorts after every token that starts with a given prefix
+_PREFIX_END = "\U0010ffff"
+
+# New tokens wait unsorted (and are scanned linearly by queries) until there are
+# this many; then they become a sorted run
+_RUN_SIZE = 1024
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").casefold())
+
+
+class SearchIndex:
+    """
+    In-memory inverted index over job fields with prefix matching.
+
+    Updates are incremental (only tokens that changed touch the postings) and
+    a query is a handful of bisects over the sorted vocabulary plus set
+    intersections, so lookups stay in the millisecond range at 100k+ jobs.
+    """
+
+    def __init__(self) -> None:
+        self._docs: Dict[int, Dict[str, str]] = {}
+        self._doc_tokens: Dict[int, Set[str]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        # Vocabulary for prefix ranges: sorted runs, each at least twice the size of the
+        # next, merged like a binary counter so no update or query re-sorts everything
+        self._runs: List[List[str]] = []
+        self._pending: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def update(self, job_id: int, **fields: Optional[str]) -> bool:
+        """Sets the given fields for a job; returns True if anything changed."""
+        doc = self._docs.setdefault(job_id, {})
+        changed = False
+        for name, value in fields.items():
+            if name not in FIELDS:
+                raise KeyError(f"Unknown search field: {name}")
+            value = value or ""
+            if doc.get(name, "") != value:
+                doc[name] = value
+                changed = True
+        if not changed and job_id in self._doc_tokens:
+            return False
+        new_tokens: Set[str] = set()
+        for value in doc.values():
+            new_tokens.update(tokenize(value))
+        old_tokens = self._doc_tokens.get(job_id, set())
+        for token in old_tokens - new_tokens:
+            self._discard(token, job_id)
+        for token in new_tokens - old_tokens:
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = set()
+                self._pending.append(token)
+            posting.add(job_id)
+        self._doc_tokens[job_id] = new_tokens
+        if len(self._pending) >= _RUN_SIZE:
+            self._add_run()
+        return True
+
+    def remove(self, job_id: int) -> None:
+        self._docs.pop(job_id, None)
+        for token in self._doc_tokens.pop(job_id, ()):
+            self._discard(token, job_id)
+
+    def remove_many(self, job_ids: Iterable[int]) -> None:
+        for job_id in job_ids:
+            self.remove(job_id)
+
+    def query(self, text: str) -> Optional[Set[int]]:
+        """Job ids matching every term as a token prefix; None when the query is empty."""
+        terms = sorted(set(tokenize(text)), key=len, reverse=True)
+        if not terms:
+            return None
+        # Longest term first: it usually has the smallest candidate set
+        result = self._prefix_union(terms[0])
+        for term in terms[1:]:
+            if not result:
+                break
+            if len(result) <= _VERIFY_LIMIT:
+                result = {j for j in result if self._doc_has_prefix(j, term)}
+            else:
+                result &= self._prefix_union(term)
+        return result
+
+    def matches(self, job_id: int, text: str) -> bool:
+        if job_id not in self._doc_tokens:
+            return False
+        return all(self._doc_has_prefix(job_id, term) for term in set(tokenize(text)))
+
+    # Internals
+    def _discard(self, token: str, job_id: int) -> None:
+        posting = self._postings.get(token)
+        if posting is None:
+            return
+        posting.discard(job_id)
+        if not posting:
+            # Left in the vocabulary; empty postings are skipped and pruned on merge
+            del self._postings[token]
+
+    def _add_run(self) -> None:
+        run = sorted(self._pending)
+        self._pending = []
+        while self._runs and len(self._runs[-1]) <= 2 * len(run):
+            # Timsort merges the two sorted runs in near-linear time
+            merged = self._runs.pop() + run
+            merged.sort()
+            postings = self._postings
+            run = [t for i, t in enumerate(merged) if t in postings and (i == 0 or merged[i - 1] != t)]
+        if run:
+            self._runs.append(run)
+
+    def _prefix_union(self, prefix: str) -> Set[int]:
+        postings = self._postings
+        if len(prefix) < _MIN_PREFIX:
+            return set(postings.get(prefix, ()))
+        end = prefix + _PREFIX_END
+        # A prefix such as a video id stem can span most of the vocabulary, so slice and
+        # union in C instead of looping per token; removed tokens map to None and are skipped
+        found = []
+        for run in self._runs:
+            found.extend(run[bisect_left(run, prefix):bisect_right(run, end)])
+        found.extend(t for t in self._pending if t.startswith(prefix))
+        return set().union(*filter(None, map(postings.get, found)))
+
+    def _doc_has_prefix(self, job_id: int, term: str) -> bool:
+        tokens = self._doc_tokens.get(job_id, ())
+        if len(term) < _MIN_PREFIX:
+            return term in tokens
+        return any(t.startswith(term) for t in tokens)
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import os
+import shutil
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, Hashable, List, Mapping, Optional
+
+# Headroom left untouched on every volume by DiskBudget
+DEFAULT_FREE_MARGIN = 256 * 1024 * 1024
+
+# Merging keeps the separate streams on disk until the merged file is written
+MERGE_FACTOR = 2
+
+_FALLOC_FL_KEEP_SIZE = 0x01
+_F_PREALLOCATE = 42       # macOS fcntl
+_F_ALLOCATEALL = 0x04
+_F_PEOFPOSMODE = 3
+
+
+class StorageConfig:
+    def __init__(
+        self,
+        staging_dir: Optional[Path] = None,
+        buffer_size: int = 0,
+        preallocate: bool = False,
+        free_margin: int = DEFAULT_FREE_MARGIN,
+    ) -> None:
+        self.staging_dir = staging_dir  # fast local dir for .part files and merges, None = write in place
+        self.buffer_size = buffer_size  # bytes per read/write, 0 = yt-dlp's adaptive default
+        self.preallocate = preallocate  # reserve blocks once the file size is known
+        self.free_margin = free_margin  # bytes to keep free on each volume
+
+
+class InsufficientSpace(Exception):
+    pass
+
+
+class DiskBudget:
+    """
+    Free-space ledger shared by queued and running downloads.
+
+    A job reserves its estimated size on the volumes it will write to before it
+    is started (from a metadata-only pass, see EstimateTask), and again for each
+    video just before that video downloads. A reservation only fits if the
+    volume's current free space covers it plus the outstanding (not yet written)
+    part of every other reservation, so jobs that would not fit are held before
+    they start instead of failing midway.
+    """
+
+    def __init__(self, margin: int = DEFAULT_FREE_MARGIN) -> None:
+        self.margin = margin
+        self._lock = threading.Lock()
+        # key -> device -> [reserved bytes, bytes already written]
+        self._ledger: Dict[Hashable, Dict[int, List[int]]] = {}
+
+    def reserve(self, key: Hashable, needs: Mapping[Path, int]) -> bool:
+        """
+        Reserves (or grows) bytes on each path's volume; False keeps the previous reservation.
+        Paths on one volume share a reservation of the largest amount asked for them.
+        """
+        with self._lock:
+            wanted: Dict[int, int] = {}
+            probes: Dict[int, Path] = {}
+            for path, nbytes in needs.items():
+                path = _existing(path)
+                dev = _device(path)
+                wanted[dev] = max(wanted.get(dev, 0), int(nbytes))
+                probes.setdefault(dev, path)
+            mine = self._ledger.get(key, {})
+            for dev, nbytes in wanted.items():
+                written = mine.get(dev, [0, 0])[1]
+                free = shutil.disk_usage(probes[dev]).free
+                # Bytes already written by this job have left `free`; only the rest needs room
+                if nbytes - written > free - self._outstanding(dev, exclude=key) - self.margin:
+                    return False
+            self._ledger[key] = {dev: [nbytes, mine.get(dev, [0, 0])[1]] for dev, nbytes in wanted.items()}
+            return True
+
+    def written(self, key: Hashable, path: Path, nbytes: int) -> None:
+        with self._lock:
+            entry = self._ledger.get(key, {}).get(_device(path))
+            if entry is not None:
+                entry[1] = int(nbytes)
+
+    def release(self, key: Hashable) -> None:
+        with self._lock:
+            self._ledger.pop(key, None)
+
+    def free_for(self, path: Path) -> int:
+        """Free bytes on path's volume that are not promised to a reservation."""
+        path = _existing(path)
+        with self._lock:
+            free = shutil.disk_usage(path).free
+            return max(0, free - self._outstanding(_device(path)) - self.margin)
+
+    def _outstanding(self, dev: int, exclude: Hashable = None) -> int:
+        total = 0
+        for key, entry in self._ledger.items():
+            if key != exclude and dev in entry:
+                reserved, written = entry[dev]
+                total += max(0, reserved - written)
+        return total
+
+
+def _device(path: Path) -> int:
+    return os.stat(_existing(path)).st_dev
+
+
+def _existing(path: Path) -> Path:
+    # Queued jobs are checked before their output folder is created; stat its nearest parent
+    path = Path(path)
+    while not path.exists() and path != path.parent:
+        path = path.parent
+    return path
+
+
+def estimate_size(info: dict) -> Optional[int]:
+    # Final size of one video from its selected formats; None if any part is unknown
+    total = 0
+    for fmt in info.get("requested_formats") or [info]:
+        size = fmt.get("filesize") or fmt.get("filesize_approx")
+        if not size and fmt.get("tbr") and info.get("duration"):
+            size = fmt["tbr"] * 1000 / 8 * info["duration"]
+        if not size:
+            return None
+        total += size
+    return int(total)
+
+
+def needs_merge(info: dict) -> bool:
+    return len(info.get("requested_formats") or ()) > 1
+
+
+def disk_needs(size: int, merge: bool, write_dir: Path, outdir: Path) -> Dict[Path, int]:
+    # Merging keeps the separate streams next to the merged file until it is written
+    return {write_dir: size * MERGE_FACTOR if merge else size, outdir: size}
+
+
+def preallocate(path: Path, size: int) -> bool:
+    """Best effort: reserve disk blocks for size bytes without changing the file length."""
+    # The length must stay put: yt-dlp resumes a .part file from its size
+    try:
+        fd = os.open(path, os.O_WRONLY)
+    except OSError:
+        return False
+    try:
+        if sys.platform.startswith("linux"):
+            import ctypes
+
+            libc = ctypes.CDLL(None, use_errno=True)
+            fallocate = libc.fallocate
+            fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_longlong, ctypes.c_longlong]
+            return fallocate(fd, _FALLOC_FL_KEEP_SIZE, 0, int(size)) == 0
+        if sys.platform == "darwin":
+            import fcntl
+
+            # fstore_t: flags, posmode, offset, length, bytesalloc
+            fstore = struct.pack("=Iiqqq", _F_ALLOCATEALL, _F_PEOFPOSMODE, 0, int(size), 0)
+            fcntl.fcntl(fd, _F_PREALLOCATE, fstore)
+            return True
+        return False
+    except (OSError, AttributeError):
+        return False
+    finally:
+        os.close(fd)
+
+
+def atomic_move(src: Path, dest_dir: Path) -> Path:
+    """Moves src into dest_dir so that the final name only ever refers to a complete file."""
+    dest = dest_dir / src.name
+    try:
+        os.replace(src, dest)
+        return dest
+    except OSError:
+        pass  # Different volume: copy next to the destination, then rename over it
+    tmp = dest_dir / f".{src.name}.partial"
+    try:
+        shutil.copyfile(src, tmp)
+        shutil.copystat(src, tmp)
+        with open(tmp, "rb+") as fh:
+            os.fsync(fh.fileno())
+        os.replace(tmp, dest)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    src.unlink()
+    return dest
@@ -0,0 +1,415 @@
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from app.core.thumbnails import thumbnail_url
+from app.core.utils import browser_key_from_label, is_valid_url
+
+# Entry ids remembered per subscription, newest first. More than one, so a sync
+# still stops when the newest entry is deleted or made private
+KEEP_IDS = 20
+
+# A sync never walks further than this; guards against a feed whose known ids have all gone
+MAX_WALK = 200
+
+# Concurrent feed fetches, in total and per host
+DEFAULT_MAX_SYNCS = 16
+DEFAULT_PER_HOST = 8
+
+# Paged feeds (OnDemandPagedList) are pulled this many entries at a time
+_PAGE = 50
+
+# Idle YoutubeDL instances by cookies browser, reused across syncs (see _checkout);
+# at most DEFAULT_MAX_SYNCS per browser are kept
+_idle: Dict[Optional[str], List[object]] = {}
+_idle_lock = threading.Lock()
+
+
+def entry_key(entry: dict) -> str:
+    # Flat entries usually carry an id; feeds such as RSS only have a stable URL
+    return str(entry.get("id") or entry.get("url") or "")
+
+
+def host_of(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+class Subscription:
+    """A channel or playlist URL plus the newest entries already seen in it."""
+
+    def __init__(
+        self,
+        url: str,
+        title: str = "",
+        seen_ids: Optional[List[str]] = None,
+        oldest_first: bool = False,
+        last_sync: float = 0.0,
+        ie_key: Optional[str] = None,
+        length: int = 0,
+    ) -> None:
+        self.url = url
+        self.title = title
+        self.seen_ids: List[str] = list(seen_ids or [])  # newest first
+        # Channel tabs list newest first; playlists that grow at the end need the whole list reversed
+        self.oldest_first = oldest_first
+        self.last_sync = last_sync
+        # Extractor that handled the URL last time; saves matching it against every extractor
+        self.ie_key = ie_key
+        # Entries in an oldest-first list at the last sync; the next one reads from about there
+        self.length = length
+        # Why the last sync failed, empty if it did not; not saved
+        self.error = ""
+
+    @property
+    def last_id(self) -> Optional[str]:
+        return self.seen_ids[0] if self.seen_ids else None
+
+    def record(
+        self, title: str, entries: List[dict], ie_key: Optional[str] = None, length: Optional[int] = None
+    ) -> List[dict]:
+        """
+        Remembers entries from a sync (newest first) and returns the ones to
+        queue, oldest first. The first sync only sets the baseline: what was
+        already published is not queued.
+        """
+        baseline = not self.seen_ids
+        keys = [entry_key(e) for e in entries]
+        self.seen_ids = (keys + [k for k in self.seen_ids if k not in keys])[:KEEP_IDS]
+        self.title = title or self.title
+        self.ie_key = ie_key or self.ie_key
+        if length is not None:
+            self.length = length
+        self.error = ""
+        self.last_sync = time.time()
+        return [] if baseline else list(reversed(entries))
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "title": self.title,
+            "seen_ids": self.seen_ids,
+            "oldest_first": self.oldest_first,
+            "last_sync": self.last_sync,
+            "ie_key": self.ie_key,
+            "length": self.length,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Subscription":
+        return cls(
+            str(d["url"]),
+            str(d.get("title") or ""),
+            [str(k) for k in d.get("seen_ids") or []],
+            bool(d.get("oldest_first")),
+            float(d.get("last_sync") or 0.0),
+            d.get("ie_key") or None,
+            int(d.get("length") or 0),
+        )
+
+
+class SubscriptionStore:
+    """Saved subscriptions, kept in insertion order in a JSON file."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._subs: Dict[str, Subscription] = {}
+
+    def __len__(self) -> int:
+        return len(self._subs)
+
+    def __iter__(self) -> Iterator[Subscription]:
+        return iter(list(self._subs.values()))
+
+    def get(self, url: str) -> Optional[Subscription]:
+        return self._subs.get(url)
+
+    def add(self, url: str, oldest_first: bool = False) -> Subscription:
+        sub = self._subs.get(url)
+        if sub is None:
+            sub = self._subs[url] = Subscription(url, oldest_first=oldest_first)
+        return sub
+
+    def remove(self, url: str) -> bool:
+        return self._subs.pop(url, None) is not None
+
+    def load(self) -> None:
+        # A missing or unreadable file leaves the store empty rather than failing startup
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            subs = [Subscription.from_dict(d) for d in data.get("subscriptions") or []]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return
+        self._subs = {s.url: s for s in subs}
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp.write_text(
+                json.dumps({"subscriptions": [s.to_dict() for s in self._subs.values()]}, indent=1),
+                encoding="utf-8",
+            )
+            os.replace(tmp, self.path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+
+class HostLimiter:
+    """
+    Slots for concurrent requests, in total and per host. Only try_acquire
+    and release from the thread that schedules the work.
+    """
+
+    def __init__(self, total: int = DEFAULT_MAX_SYNCS, per_host: int = DEFAULT_PER_HOST) -> None:
+        self.total = total
+        self.per_host = per_host
+        self._active: Dict[str, int] = {}
+        self._count = 0
+
+    @property
+    def active(self) -> int:
+        return self._count
+
+    def try_acquire(self, url: str) -> bool:
+        host = host_of(url)
+        if self._count >= self.total or self._active.get(host, 0) >= self.per_host:
+            return False
+        self._active[host] = self._active.get(host, 0) + 1
+        self._count += 1
+        return True
+
+    def release(self, url: str) -> None:
+        host = host_of(url)
+        left = self._active.get(host, 0) - 1
+        if left < 0:
+            return
+        if left:
+            self._active[host] = left
+        else:
+            del self._active[host]
+        self._count -= 1
+
+
+def walk_new(entries: Iterable[dict], known: Iterable[str], limit: int = MAX_WALK) -> List[dict]:
+    """
+    Entries before the first known one, newest first (or the first `limit`).
+    Stops pulling there, so a lazily paged feed only fetches the pages it needs.
+    """
+    known = set(known)
+    new: List[dict] = []
+    for entry in entries:
+        if not entry:
+            continue
+        key = entry_key(entry)
+        if key in known or len(new) >= limit:
+            break
+        if key:
+            new.append(entry)
+    return new
+
+
+def fetch_updates(
+    url: str,
+    known: List[str],
+    oldest_first: bool = False,
+    cookies_label: Optional[str] = None,
+    ie_key: Optional[str] = None,
+    length: int = 0,
+) -> Tuple[str, Optional[str], List[dict], Optional[int]]:
+    """
+    Feed title, extractor key, the entries newer than any known id (newest
+    first), and for oldest-first lists their current length. With no known
+    ids, the newest KEEP_IDS entries (the baseline). Entries are trimmed to
+    what the queue needs: id, url, title, thumbnail. Entries whose URL is not
+    a web URL, even resolved against the feed's, are left out, so they are
+    neither queued nor remembered. Imports yt-dlp; call it off the UI thread.
+    """
+    from yt_dlp.extractor import get_info_extractor
+    from yt_dlp.utils import PagedList
+
+    if ie_key:
+        # Saved by an earlier sync; a yt-dlp update may have renamed or narrowed it
+        try:
+            if not get_info_extractor(ie_key).suitable(url):
+                ie_key = None
+        except (KeyError, AttributeError):
+            ie_key = None
+    browser_key = browser_key_from_label(cookies_label or "")
+    ydl = _checkout(browser_key)
+    try:
+        # process=False keeps "entries" as the extractor returned it, often a generator that
+        # requests further pages only when iterated
+        info = ydl.extract_info(url, download=False, process=False, ie_key=ie_key)
+        extractor = (info or {}).get("extractor_key")
+        for _ in range(5):
+            if (info or {}).get("_type") not in ("url", "url_transparent"):
+                break
+            info = ydl.extract_info(info["url"], download=False, process=False, ie_key=info.get("ie_key"))
+        info = _uploads_tab(ydl, info or {})
+        entries = info.get("entries") or []
+        new_length = None
+        if oldest_first:
+            entries, new_length = _newest_at_end(entries, set(known), length)
+        elif isinstance(entries, PagedList):
+            entries = _iter_paged(entries)
+        new = walk_new(entries, known, MAX_WALK if known else KEEP_IDS)
+    finally:
+        _checkin(browser_key, ydl)
+
+    base = info.get("webpage_url") or url
+    trimmed = []
+    for entry in new:
+        link = entry.get("webpage_url") or entry.get("url") or ""
+        if "/" in link and not urlsplit(link).scheme:
+            # Feeds may list links relative to themselves; a bare id is left alone
+            link = urljoin(base, link)
+        if not is_valid_url(link):
+            continue
+        trimmed.append({
+            "id": entry_key(entry),
+            "url": link,
+            "title": entry.get("title") or "",
+            "thumbnail": thumbnail_url(entry),
+        })
+    return info.get("title") or "", extractor, trimmed, new_length
+
+
+def close_idle() -> None:
+    """Closes the pooled YoutubeDL instances; syncs still running keep theirs until they end."""
+    with _idle_lock:
+        idle = [ydl for pool in _idle.values() for ydl in pool]
+        _idle.clear()
+    for ydl in idle:
+        ydl.close()
+
+
+def _checkout(browser_key: Optional[str]):
+    # Building a YoutubeDL registers every extractor and loads the CA store, which costs
+    # more CPU than fetching a feed, so instances are kept and handed to one sync at a time
+    with _idle_lock:
+        idle = _idle.get(browser_key)
+        if idle:
+            return idle.pop()
+    import yt_dlp as ytdlp  # type: ignore
+
+    ydl_opts: dict = {
+        "quiet": True,
+        "no_warnings": True,
+        "skip_download": True,
+        # List entries without resolving each one; that is left to the download
+        "extract_flat": "in_playlist",
+    }
+    if browser_key:
+        ydl_opts["cookiesfrombrowser"] = (browser_key,)
+    return ytdlp.YoutubeDL(ydl_opts)
+
+
+def _checkin(browser_key: Optional[str], ydl) -> None:
+    with _idle_lock:
+        pool = _idle.setdefault(browser_key, [])
+        if len(pool) < DEFAULT_MAX_SYNCS:
+            pool.append(ydl)
+            return
+    ydl.close()
+
+
+def _uploads_tab(ydl, info: dict) -> dict:
+    """
+    For a feed whose entries are lists themselves, such as a YouTube channel's
+    Videos, Shorts and Live tabs, the Videos tab (or the first one) under the
+    channel's title. Walking every tab would mix their orders and outgrow the
+    known ids. Other feeds are returned as they are.
+    """
+    first, entries = _peek(info.get("entries") or [])
+    if not _is_tab(first, info):
+        info["entries"] = entries
+        return info
+    tabs = [e for e in entries if _is_tab(e, info)]
+    tab = next((t for t in tabs if _tab_url(t).rstrip("/").endswith("/videos")), tabs[0])
+    if tab.get("_type") != "playlist":
+        tab = ydl.extract_info(tab["url"], download=False, process=False, ie_key=tab.get("ie_key")) or {}
+    return {**tab, "title": info.get("title") or tab.get("title"), "webpage_url": _tab_url(tab)}
+
+
+def _peek(entries) -> Tuple[Optional[dict], Iterable[dict]]:
+    # The first entry, and entries to use in place of the ones given (a generator is consumed)
+    from yt_dlp.utils import PagedList
+
+    if isinstance(entries, PagedList):
+        head = entries.getslice(0, 1)
+        return (head[0] if head else None), entries
+    if isinstance(entries, list):
+        return (entries[0] if entries else None), entries
+    entries = iter(entries)
+    first = next(entries, None)
+    return first, itertools.chain([first], entries)
+
+
+def _is_tab(entry: Optional[dict], feed: dict) -> bool:
+    if not entry:
+        return False
+    if entry.get("_type") == "playlist":
+        return True
+    # A flat link back into the feed's own extractor, below the feed's URL: another list of it
+    feed_url = (feed.get("webpage_url") or "").rstrip("/")
+    return (
+        entry.get("_type") in ("url", "url_transparent")
+        and entry.get("ie_key") is not None
+        and entry.get("ie_key") == feed.get("extractor_key")
+        and bool(feed_url)
+        and str(entry.get("url") or "").startswith(feed_url + "/")
+    )
+
+
+def _tab_url(tab: dict) -> str:
+    return str(tab.get("webpage_url") or tab.get("url") or "")
+
+
+def _newest_at_end(entries, known: Set[str], length: int) -> Tuple[List[dict], int]:
+    """
+    The last MAX_WALK entries of a list that grows at the end, newest first,
+    and the list's length. A paged list is read from just before `length`, its
+    length at the last sync, so only pages added since are fetched; if none of
+    the known ids are there (entries were removed), it is read again from the
+    start. Other lists are generators that fetch every page on the way, so they
+    are read to the end on each sync; only the tail is kept in memory.
+    """
+    from yt_dlp.utils import PagedList
+
+    start = max(0, length - KEEP_IDS) if known and isinstance(entries, (list, PagedList)) else 0
+    while True:
+        if isinstance(entries, PagedList):
+            source: Iterable[dict] = _iter_paged(entries, start)
+        elif isinstance(entries, list):
+            source = entries[start:]
+        else:
+            source = entries
+        tail: Deque[dict] = deque(maxlen=MAX_WALK)
+        count = 0
+        found = False
+        for entry in source:
+            count += 1
+            if entry:
+                found = found or entry_key(entry) in known
+                tail.append(entry)
+        if found or start == 0:
+            return list(reversed(tail)), start + count
+        start = 0
+
+
+def _iter_paged(paged, start: int = 0) -> Iterator[dict]:
+    while True:
+        chunk = paged.getslice(start, start + _PAGE)
+        if not chunk:
+            return
+        yield from chunk
+        start += len(chunk)
@@ -1,26 +1,99 @@
 from __future__ import annotations
 
+import hashlib
+import shutil
 import threading
 from pathlib import Path
-from typing import Optional, List
+from typing import Dict, List, Optional, Set
 
 from PySide6.QtCore import QObject, QRunnable, Signal
 
-from app.core.formats import format_for_label
-from app.core.utils import browser_key_from_label, detect_ffmpeg
+from app.core.options import build_ydl_opts
+from app.core.storage import (
+    DiskBudget,
+    InsufficientSpace,
+    StorageConfig,
+    atomic_move,
+    disk_needs,
+    estimate_size,
+    needs_merge,
+    preallocate,
+)
+from app.core.thumbnails import ThumbnailStore, thumbnail_url
+from app.core.utils import human_bytes
 
 
 class TaskSignals(QObject):
-    progress = Signal(int, dict)  # row, progress dict from yt-dlp
-    status = Signal(int, str)     # row, status text
-    finished = Signal(int, dict)  # row, result info
-    failed = Signal(int, str)     # row, error text
+    progress = Signal(int, dict)  # job id, progress dict from yt-dlp
+    status = Signal(int, str)     # job id, status text
+    finished = Signal(int, dict)  # job id, result info
+    failed = Signal(int, str)     # job id, error text
+    held = Signal(int, str)       # job id, reason it was held back (not enough disk space)
+    plan = Signal(int, str)       # job id, chosen format plan (FormatPlan.describe)
+    metadata = Signal(int, dict)  # job id, title/id/thumbnail URL once extracted
+    estimated = Signal(int, dict) # job id, {"size": bytes or 0 if unknown, "merge": bool} (EstimateTask)
+
+
+class EstimateTask(QRunnable):
+    """
+    Metadata-only pass for a queued job: extracts the URL without downloading and
+    reports the planned size, so the disk budget can hold the job before it starts.
+    Playlists are not expanded here; their videos reserve space one at a time as
+    they download.
+    """
+
+    def __init__(
+        self,
+        job_id: int,
+        url: str,
+        outdir: Path,
+        resolution_label: str,
+        cookies_label: Optional[str],
+        selected_format: Optional[str] = None,
+    ) -> None:
+        super().__init__()
+        self.job_id = job_id
+        self.url = url
+        self.outdir = outdir
+        self.resolution_label = resolution_label
+        self.cookies_label = cookies_label
+        self.selected_format = (selected_format or "Auto").strip()
+        self.signals = TaskSignals()
+
+    def run(self) -> None:
+        try:
+            import yt_dlp as ytdlp  # type: ignore
+
+            ydl_opts = build_ydl_opts(
+                self.outdir,
+                self.resolution_label,
+                self.cookies_label,
+                self.selected_format,
+                on_plan=lambda plan: self.signals.plan.emit(self.job_id, plan.describe()),
+            )
+            size, merge = 0, False
+            with ytdlp.YoutubeDL(ydl_opts) as ydl:
+                info = ydl.extract_info(self.url, download=False, process=False)
+                if info.get("_type", "video") == "video":
+                    # Format selection only; nothing is downloaded
+                    info = ydl.process_ie_result(info, download=False)
+                    size, merge = estimate_size(info) or 0, needs_merge(info)
+            self.signals.metadata.emit(self.job_id, {
+                "title": info.get("title"),
+                "id": info.get("id"),
+                "thumbnail": thumbnail_url(info),
+            })
+            outcome = (self.signals.estimated, {"size": size, "merge": merge})
+        except Exception as e:
+            outcome = (self.signals.failed, str(e))
+        signal, payload = outcome
+        signal.emit(self.job_id, payload)
 
 
 class DownloadTask(QRunnable):
     def __init__(
         self,
-        row: int,
+        job_id: int,
         url: str,
         outdir: Path,
         resolution_label: str,
@@ -28,9 +101,12 @@ class DownloadTask(QRunnable):
         selected_format: Optional[str] = None,
         embed_thumbnail: bool = False,
         add_metadata: bool = False,
+        storage: Optional[StorageConfig] = None,
+        budget: Optional[DiskBudget] = None,
+        thumbnails: Optional[ThumbnailStore] = None,
     ) -> None:
         super().__init__()
-        self.row = row
+        self.job_id = job_id
         self.url = url
         self.outdir = outdir
         self.resolution_label = resolution_label
@@ -38,8 +114,19 @@ class DownloadTask(QRunnable):
         self.selected_format = (selected_format or "Auto").strip()
         self.embed_thumbnail = embed_thumbnail
         self.add_metadata = add_metadata
+        self.storage = storage or StorageConfig()
+        self.budget = budget
+        self.thumbnails = thumbnails
         self.signals = TaskSignals()
         self._cancelled = threading.Event()
+        # Per-video disk accounting (see _before_download and _track_disk)
+        self._write_dir = outdir
+        self._metadata_sent = False
+        self._estimate = 0
+        self._merge = False
+        self._totals: Dict[str, int] = {}
+        self._written: Dict[str, int] = {}
+        self._preallocated: Set[str] = set()
 
     def cancel(self) -> None:
         self._cancelled.set()
@@ -49,70 +136,143 @@ class DownloadTask(QRunnable):
         try:
             import yt_dlp as ytdlp  # type: ignore
         except Exception as e:  # pragma: no cover
-            self.signals.failed.emit(self.row, f"yt-dlp import error: {e}")
+            self.signals.failed.emit(self.job_id, f"yt-dlp import error: {e}")
             return
 
-        fmt = format_for_label(self.resolution_label)
+        from app.core.postprocessors import BeforeDownloadPP, CachedThumbnailPP
+
+        staging = self._staging_dir()
+        self._write_dir = staging or self.outdir
+        finals: List[str] = []
+
+        def finished_file(name: str) -> None:
+            # Each video leaves the staging folder as soon as it is done
+            finals.append(str(atomic_move(Path(name), self.outdir)) if staging is not None else name)
 
         def hook(d: dict) -> None:
+            if d.get("status") == "downloading":
+                self._track_disk(d)
             # Emit progress updates to UI
-            self.signals.progress.emit(self.row, d)
+            self.signals.progress.emit(self.job_id, d)
             if self._cancelled.is_set():
                 raise KeyboardInterrupt("Cancelled")
 
-        ydl_opts: dict = {
-            "outtmpl": str(self.outdir / "%(title)s [%(id)s].%(ext)s"),
-            "format": fmt,
-            "noprogress": True,
-            "quiet": True,
-            "progress_hooks": [hook],
-        }
-
-        # Apply container/format preferences
-        sf = (self.selected_format or "").upper()
-        postprocessors: List[dict] = []
-        has_ffmpeg = detect_ffmpeg()
-
-        if sf == "MP3":
-            # Force audio-only; extract to mp3 only if ffmpeg is available
-            ydl_opts["format"] = "bestaudio/best"
-            if has_ffmpeg:
-                postprocessors.append({
-                    "key": "FFmpegExtractAudio",
-                    "preferredcodec": "mp3",
-                    "preferredquality": "192",
-                })
-                if self.embed_thumbnail:
-                    postprocessors.append({"key": "EmbedThumbnail"})
-                if self.add_metadata:
-                    postprocessors.append({"key": "FFmpegMetadata"})
-        else:
-            if sf == "MP4":
-                ydl_opts["merge_output_format"] = "mp4"
-            elif sf == "WEBM":
-                ydl_opts["merge_output_format"] = "webm"
-            # Optional postprocessors for video outputs
-            if self.add_metadata and has_ffmpeg:
-                postprocessors.append({"key": "FFmpegMetadata"})
-            if self.embed_thumbnail and has_ffmpeg:
-                postprocessors.append({"key": "EmbedThumbnail"})
-
-        if postprocessors:
-            ydl_opts["postprocessors"] = postprocessors
-
-        browser_key = browser_key_from_label(self.cookies_label or "")
-        if browser_key:
-            # yt-dlp expects a tuple; profile/keyring left default
-            ydl_opts["cookiesfrombrowser"] = (browser_key,)
+        ydl_opts = build_ydl_opts(
+            self._write_dir,
+            self.resolution_label,
+            self.cookies_label,
+            self.selected_format,
+            self.embed_thumbnail,
+            self.add_metadata,
+            progress_hook=hook,
+            buffer_size=self.storage.buffer_size,
+            on_plan=lambda plan: self.signals.plan.emit(self.job_id, plan.describe()),
+        )
+        # Called with each file's final name once all postprocessors are done
+        ydl_opts["post_hooks"] = [finished_file]
+        thumbnail_pp = None
+        if self.thumbnails is not None and ydl_opts.get("writethumbnail"):
+            # Take the image from the shared cache instead of letting yt-dlp download it again
+            ydl_opts["writethumbnail"] = False
+            thumbnail_pp = CachedThumbnailPP(self.thumbnails)
 
         try:
-            self.signals.status.emit(self.row, "Starting…")
+            self.signals.status.emit(self.job_id, "Starting…")
+            # Off the UI thread; the disk budget stats this folder
+            self.outdir.mkdir(parents=True, exist_ok=True)
             with ytdlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([self.url])
-            self.signals.finished.emit(self.row, {"url": self.url})
+                # Space is reserved per video, just before it downloads
+                ydl.add_post_processor(BeforeDownloadPP(lambda info: self._before_download(ydl, info)), when="before_dl")
+                if thumbnail_pp is not None:
+                    ydl.add_post_processor(thumbnail_pp, when="before_dl")
+                if staging is not None:
+                    # yt-dlp only sees the staging dir, so do its "already downloaded" check against the output dir
+                    ydl.params["match_filter"] = lambda info, incomplete=False: (
+                        None if incomplete else self._in_outdir(ydl, info)
+                    )
+                # Playlists come back unexpanded: each entry is extracted when its turn comes
+                info = ydl.extract_info(self.url, download=False, process=False)
+                if info.get("_type", "video") != "video":
+                    self._send_metadata(info)
+                ydl.process_ie_result(info, download=True)
+            if staging is not None:
+                shutil.rmtree(staging, ignore_errors=True)
+            outcome = (self.signals.finished, {"url": self.url, "files": finals})
+        except InsufficientSpace as e:
+            outcome = (self.signals.held, str(e))
         except KeyboardInterrupt:
-            self.signals.status.emit(self.row, "Cancelled")
-            self.signals.failed.emit(self.row, "Cancelled")
+            self.signals.status.emit(self.job_id, "Cancelled")
+            outcome = (self.signals.failed, "Cancelled")
         except Exception as e:
-            self.signals.status.emit(self.row, "Error")
-            self.signals.failed.emit(self.row, str(e))
+            self.signals.status.emit(self.job_id, "Error")
+            outcome = (self.signals.failed, str(e))
+        # Give the space back before anyone hears about it: held jobs are retried on this signal
+        if self.budget is not None:
+            self.budget.release(self.job_id)
+        # Last use of self.signals: the receiver disconnects and drops this task on a terminal signal
+        signal, payload = outcome
+        signal.emit(self.job_id, payload)
+
+    # Disk I/O
+    def _staging_dir(self) -> Optional[Path]:
+        root = self.storage.staging_dir
+        if root is None:
+            return None
+        # Keyed by URL so a retried job resumes its .part files
+        path = Path(root) / hashlib.sha1(self.url.encode("utf-8")).hexdigest()[:16]
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def _send_metadata(self, info: dict) -> None:
+        self._metadata_sent = True
+        self.signals.metadata.emit(self.job_id, {
+            "title": info.get("title"),
+            "id": info.get("id"),
+            "thumbnail": thumbnail_url(info),
+        })
+
+    def _in_outdir(self, ydl, info: dict) -> Optional[str]:
+        name = Path(ydl.prepare_filename(info)).name
+        return f"{name} is already in the output folder" if (self.outdir / name).exists() else None
+
+    def _before_download(self, ydl, info: dict) -> None:
+        if not self._metadata_sent:
+            self._send_metadata(info)
+        self._totals.clear()
+        self._written.clear()
+        self._preallocated.clear()
+        self._estimate = 0
+        if self.budget is None:
+            return
+        # Earlier videos are on disk by now; only this one's bytes are outstanding
+        self.budget.release(self.job_id)
+        if (self.outdir / Path(ydl.prepare_filename(info)).name).exists():
+            return  # yt-dlp skips it
+        self._estimate = estimate_size(info) or 0
+        self._merge = needs_merge(info)
+        if self._estimate:
+            self._reserve(self._estimate)
+
+    def _reserve(self, size: int) -> None:
+        needs = disk_needs(size, self._merge, self._write_dir, self.outdir)
+        if not self.budget.reserve(self.job_id, needs):
+            free = min(self.budget.free_for(self._write_dir), self.budget.free_for(self.outdir))
+            peak = max(needs.values())
+            raise InsufficientSpace(f"needs {human_bytes(peak)}, {human_bytes(free) if free else '0 B'} available")
+
+    def _track_disk(self, d: dict) -> None:
+        name = d.get("tmpfilename") or d.get("filename") or ""
+        total = d.get("total_bytes")
+        if total and name not in self._totals:
+            # First sight of this file's real size
+            self._totals[name] = total
+            if self.budget is not None and sum(self._totals.values()) > self._estimate:
+                self._estimate = sum(self._totals.values())
+                self._reserve(self._estimate)
+            if self.storage.preallocate and preallocate(Path(name), total):
+                self._preallocated.add(name)
+        if self.budget is not None:
+            # Preallocated blocks are already taken from the volume's free space
+            done = self._totals[name] if name in self._preallocated else d.get("downloaded_bytes") or 0
+            self._written[name] = done
+            self.budget.written(self.job_id, self._write_dir, sum(self._written.values()))
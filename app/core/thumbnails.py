@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+from urllib.parse import urlsplit
+
+# Originals plus previews; least recently used files go first
+DEFAULT_DISK_BUDGET = 256 * 1024 * 1024
+
+# Larger responses are not thumbnails
+MAX_ORIGINAL_BYTES = 16 * 1024 * 1024
+
+_IMAGE_EXTS = ("jpg", "jpeg", "png", "webp", "gif", "bmp")
+_FETCH_TIMEOUT = 15
+_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko)"
+
+
+def thumbnail_url(info: dict) -> Optional[str]:
+    # yt-dlp sorts "thumbnails" worst to best and writes the last one; pick the same so the cache is shared
+    for thumb in reversed(info.get("thumbnails") or []):
+        if thumb.get("url"):
+            return thumb["url"]
+    if info.get("thumbnail"):
+        return info["thumbnail"]
+    entries = info.get("entries")
+    if isinstance(entries, list):
+        # Playlist without its own artwork: use the first entry's
+        for entry in entries:
+            url = thumbnail_url(entry) if entry else None
+            if url:
+                return url
+    return None
+
+
+def _ext(url: str) -> str:
+    name = urlsplit(url).path.rsplit("/", 1)[-1]
+    ext = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+    return ext if ext in _IMAGE_EXTS else "jpg"
+
+
+class ThumbnailStore:
+    """
+    On-disk thumbnail cache keyed by image URL.
+
+    Keeps the original image, which EmbedThumbnail reuses instead of
+    downloading it again, and the downscaled preview shown in the table.
+    Files are written atomically, and concurrent fetches of one URL share
+    a single download.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_DISK_BUDGET) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        # Guards the cache check and the store; downloads run outside it
+        self._lock = threading.Lock()
+        # URL -> set once its download has finished (or failed)
+        self._fetching: Dict[str, threading.Event] = {}
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def original_path(self, url: str) -> Path:
+        return self.root / "original" / f"{self.key(url)}.{_ext(url)}"
+
+    def preview_path(self, url: str) -> Path:
+        return self.root / "preview" / f"{self.key(url)}.png"
+
+    def fetch(self, url: str, headers: Optional[Mapping[str, str]] = None) -> Path:
+        """Path of the original image, downloading it first if needed. Raises OSError or ValueError."""
+        import http.client
+        import urllib.request  # pulls in http.client and ssl; only needed once a fetch happens
+
+        path = self.original_path(url)
+        while True:
+            with self._lock:
+                if _touch(path):
+                    return path
+                pending = self._fetching.get(url)
+                if pending is None:
+                    done = self._fetching[url] = threading.Event()
+                    break
+            # Another thread is downloading it; use its file, or try ourselves if that failed
+            pending.wait()
+        try:
+            request = urllib.request.Request(url, headers={"User-Agent": _USER_AGENT, **(headers or {})})
+            with urllib.request.urlopen(request, timeout=_FETCH_TIMEOUT) as resp:
+                data = resp.read(MAX_ORIGINAL_BYTES + 1)
+            if len(data) > MAX_ORIGINAL_BYTES:
+                raise ValueError(f"Thumbnail larger than {MAX_ORIGINAL_BYTES} bytes: {url}")
+            with self._lock:
+                _write_atomic(path, data)
+        except http.client.HTTPException as e:
+            # Such as IncompleteRead when the connection drops mid-body
+            raise OSError(f"Thumbnail download failed: {e!r}") from e
+        finally:
+            with self._lock:
+                del self._fetching[url]
+            done.set()
+        return path
+
+    def cached_preview(self, url: str) -> Optional[Path]:
+        path = self.preview_path(url)
+        return path if _touch(path) else None
+
+    def write_preview(self, url: str, data: bytes) -> Path:
+        path = self.preview_path(url)
+        _write_atomic(path, data)
+        return path
+
+    def prune(self) -> int:
+        """Deletes least recently used files until the cache fits max_bytes; returns bytes freed."""
+        files = []
+        for sub in ("original", "preview"):
+            try:
+                entries = list(os.scandir(self.root / sub))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _mtime, size, _path in files)
+        freed = 0
+        for _mtime, size, path in sorted(files):
+            if total - freed <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                freed += size
+            except OSError:
+                pass
+        return freed
+
+
+def _touch(path: Path) -> bool:
+    # Marks a hit as recently used for prune(); False if the file is missing
+    try:
+        os.utime(path)
+        return True
+    except OSError:
+        return False
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
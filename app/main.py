@@ -2,12 +2,14 @@ from __future__ import annotations
 
 import os
 import sys
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QPalette, QColor, QGuiApplication
 from PySide6.QtWidgets import QApplication, QStyleFactory
 
-from app.ui.main_window import MainWindow
+if TYPE_CHECKING:
+    from app.ui.main_window import MainWindow
 
 
 def apply_macos_like_theme(app: QApplication) -> None:
@@ -117,19 +119,27 @@ def apply_macos_like_theme(app: QApplication) -> None:
     )
 
 
-def main() -> int:
+def launch(argv: Optional[List[str]] = None) -> Tuple[QApplication, "MainWindow"]:
+    # Everything up to a shown window; the first frame is painted once the event loop runs
     # Qt6 enables high-DPI scaling by default; no need to set deprecated attributes.
-    app = QApplication(sys.argv)
+    app = QApplication(sys.argv if argv is None else argv)
     app.setOrganizationName("com.yourname")
     app.setOrganizationDomain("com.yourname.iytdlp")
     app.setApplicationName("iYTDLP")
 
     apply_macos_like_theme(app)
 
+    # Imported here so that importing app.main stays light (see benchmarks/startup.py)
+    from app.ui.main_window import MainWindow
+
     win = MainWindow()
     win.resize(1000, 640)
     win.show()
+    return app, win
 
+
+def main() -> int:
+    app, _win = launch()
     return app.exec()
 
 
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Set
+
+from PySide6.QtCore import QAbstractProxyModel, QModelIndex, QObject, Qt
+from PySide6.QtGui import QStandardItem, QStandardItemModel
+
+# Stable job id, stored on the column-0 item of every row
+JOB_ID_ROLE = Qt.UserRole + 1
+
+
+class JobModel(QStandardItemModel):
+    """
+    Download table model addressed by stable job ids instead of row numbers.
+
+    Keeps a row -> id list in step with every structural change and an
+    id -> row index that is repaired lazily from the lowest row that moved,
+    so appends stay O(1) and bulk removals or sorts cost one pass at the next
+    lookup instead of a re-index per signal.
+    """
+
+    def __init__(self, headers: List[str], parent: Optional[QObject] = None) -> None:
+        super().__init__(0, len(headers), parent)
+        self.setHorizontalHeaderLabels(headers)
+        self._ids: List[int] = []
+        self._rows: Dict[int, int] = {}
+        self._stale_from: Optional[int] = None
+        self.rowsInserted.connect(self._on_rows_inserted)
+        self.rowsAboutToBeRemoved.connect(self._on_rows_about_to_be_removed)
+        self.rowsRemoved.connect(self._on_rows_removed)
+        self.layoutChanged.connect(self._rebuild)
+        self.modelReset.connect(self._rebuild)
+
+    # Lookups
+    def row_of(self, job_id: int) -> Optional[int]:
+        if self._stale_from is not None:
+            for row in range(self._stale_from, len(self._ids)):
+                self._rows[self._ids[row]] = row
+            self._stale_from = None
+        return self._rows.get(job_id)
+
+    def job_id_at(self, row: int) -> int:
+        return self._ids[row]
+
+    def job_ids(self) -> List[int]:
+        return list(self._ids)
+
+    def has_job(self, job_id: int) -> bool:
+        return self.row_of(job_id) is not None
+
+    def job_item(self, job_id: int, column: int) -> Optional[QStandardItem]:
+        row = self.row_of(job_id)
+        return None if row is None else self.item(row, column)
+
+    # Mutations
+    def append_job(self, job_id: int, values: List[str]) -> None:
+        items = []
+        for col, val in enumerate(values):
+            item = QStandardItem(val)
+            if col != 0:
+                item.setEditable(False)
+            items.append(item)
+        items[0].setData(job_id, JOB_ID_ROLE)
+        self.appendRow(items)
+
+    def remove_jobs(self, job_ids: Iterable[int]) -> int:
+        # Remove contiguous runs bottom-up so earlier row numbers stay valid
+        rows = sorted((r for r in (self.row_of(j) for j in job_ids) if r is not None), reverse=True)
+        i = 0
+        while i < len(rows):
+            last = first = rows[i]
+            while i + 1 < len(rows) and rows[i + 1] == first - 1:
+                i += 1
+                first = rows[i]
+            self.removeRows(first, last - first + 1)
+            i += 1
+        return len(rows)
+
+    # Index maintenance
+    def _mark_stale(self, row: int) -> None:
+        if self._stale_from is None or row < self._stale_from:
+            self._stale_from = row
+
+    def _on_rows_inserted(self, parent: QModelIndex, first: int, last: int) -> None:
+        if parent.isValid():
+            return
+        new_ids = [self._id_from_item(r) for r in range(first, last + 1)]
+        self._ids[first:first] = new_ids
+        if first == len(self._ids) - len(new_ids) and self._stale_from is None:
+            # Plain append: index the new rows directly
+            for offset, job_id in enumerate(new_ids):
+                self._rows[job_id] = first + offset
+        else:
+            self._mark_stale(first)
+
+    def _on_rows_about_to_be_removed(self, parent: QModelIndex, first: int, last: int) -> None:
+        if parent.isValid():
+            return
+        for job_id in self._ids[first:last + 1]:
+            self._rows.pop(job_id, None)
+
+    def _on_rows_removed(self, parent: QModelIndex, first: int, last: int) -> None:
+        if parent.isValid():
+            return
+        del self._ids[first:last + 1]
+        if first < len(self._ids):
+            self._mark_stale(first)
+
+    def _rebuild(self, *_args) -> None:
+        self._ids = [self._id_from_item(r) for r in range(self.rowCount())]
+        self._rows = {}
+        self._stale_from = 0
+
+    def _id_from_item(self, row: int) -> int:
+        item = self.item(row, 0)
+        job_id = item.data(JOB_ID_ROLE) if item is not None else None
+        return int(job_id) if job_id is not None else -1
+
+
+class JobFilterProxyModel(QAbstractProxyModel):
+    """
+    Shows only the JobModel rows whose job ids are in a precomputed match set.
+
+    The match set comes from app.core.search.SearchIndex, so a new query
+    costs the size of its result rather than a filterAcceptsRow call per
+    source row. Rows are kept as a sorted list of source rows; per-job match
+    changes and source inserts/removals become single insert/remove
+    notifications. With no active query the proxy is an identity mapping.
+    """
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self._source: Optional[JobModel] = None
+        self._matches: Optional[Set[int]] = None
+        self._rows: List[int] = []
+        self._removing: Optional[range] = None
+
+    @property
+    def active(self) -> bool:
+        return self._matches is not None
+
+    def setSourceModel(self, model: JobModel) -> None:
+        super().setSourceModel(model)
+        # Cached: the view calls index()/mapToSource() for every visible cell
+        self._source = model
+        model.dataChanged.connect(self._on_data_changed)
+        model.headerDataChanged.connect(self.headerDataChanged)
+        model.rowsAboutToBeInserted.connect(self._on_rows_about_to_be_inserted)
+        model.rowsInserted.connect(self._on_rows_inserted)
+        model.rowsAboutToBeRemoved.connect(self._on_rows_about_to_be_removed)
+        model.rowsRemoved.connect(self._on_rows_removed)
+        for sig in (model.layoutAboutToBeChanged, model.modelAboutToBeReset):
+            sig.connect(lambda *_: self.beginResetModel())
+        for sig in (model.layoutChanged, model.modelReset):
+            sig.connect(self._end_source_reset)
+
+    # Filtering
+    def set_matches(self, matches: Optional[Set[int]]) -> None:
+        # None shows every row
+        self.beginResetModel()
+        self._matches = matches
+        self._rebuild()
+        self.endResetModel()
+
+    def set_job_match(self, job_id: int, matched: bool) -> None:
+        if self._matches is None or (job_id in self._matches) == matched:
+            return
+        row = self._source.row_of(job_id)
+        if matched:
+            self._matches.add(job_id)
+            if row is not None:
+                pos = bisect_left(self._rows, row)
+                self.beginInsertRows(QModelIndex(), pos, pos)
+                self._rows.insert(pos, row)
+                self.endInsertRows()
+        else:
+            self._matches.discard(job_id)
+            if row is not None:
+                pos = bisect_left(self._rows, row)
+                if pos < len(self._rows) and self._rows[pos] == row:
+                    self.beginRemoveRows(QModelIndex(), pos, pos)
+                    del self._rows[pos]
+                    self.endRemoveRows()
+
+    def _rebuild(self) -> None:
+        if self._matches is None:
+            self._rows = []
+            return
+        row_of = self._source.row_of
+        self._rows = sorted(r for r in map(row_of, self._matches) if r is not None)
+
+    # QAbstractProxyModel
+    def index(self, row: int, column: int, parent: QModelIndex = QModelIndex()) -> QModelIndex:
+        source = self._source
+        if source is None or parent.isValid() or row < 0 or column < 0:
+            return QModelIndex()
+        rows = len(self._rows) if self._matches is not None else source.rowCount()
+        if row >= rows or column >= source.columnCount():
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index: QModelIndex = QModelIndex()) -> QModelIndex:
+        return QModelIndex()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if self._source is None or parent.isValid():
+            return 0
+        return len(self._rows) if self._matches is not None else self._source.rowCount()
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if self._source is None or parent.isValid():
+            return 0
+        return self._source.columnCount()
+
+    def mapToSource(self, proxy_index: QModelIndex) -> QModelIndex:
+        if not proxy_index.isValid():
+            return QModelIndex()
+        row = proxy_index.row() if self._matches is None else self._rows[proxy_index.row()]
+        return self._source.index(row, proxy_index.column())
+
+    def mapFromSource(self, source_index: QModelIndex) -> QModelIndex:
+        if not source_index.isValid():
+            return QModelIndex()
+        row = source_index.row()
+        if self._matches is not None:
+            pos = bisect_left(self._rows, row)
+            if pos == len(self._rows) or self._rows[pos] != row:
+                return QModelIndex()
+            row = pos
+        return self.createIndex(row, source_index.column())
+
+    # Source signal forwarding
+    def _proxy_span(self, first: int, last: int) -> range:
+        if self._matches is None:
+            return range(first, last + 1)
+        return range(bisect_left(self._rows, first), bisect_right(self._rows, last))
+
+    def _on_data_changed(self, top_left: QModelIndex, bottom_right: QModelIndex, roles=()) -> None:
+        span = self._proxy_span(top_left.row(), bottom_right.row())
+        if span:
+            self.dataChanged.emit(
+                self.createIndex(span.start, top_left.column()),
+                self.createIndex(span.stop - 1, bottom_right.column()),
+                roles,
+            )
+
+    def _on_rows_about_to_be_inserted(self, parent: QModelIndex, first: int, last: int) -> None:
+        if self._matches is None:
+            self.beginInsertRows(QModelIndex(), first, last)
+
+    def _on_rows_inserted(self, parent: QModelIndex, first: int, last: int) -> None:
+        if self._matches is None:
+            self.endInsertRows()
+            return
+        count = last - first + 1
+        pos = bisect_left(self._rows, first)
+        if pos < len(self._rows):
+            # Rows landed mid-table; shifting the tail is a layout change
+            self.layoutAboutToBeChanged.emit()
+            self._rows[pos:] = [r + count for r in self._rows[pos:]]
+            self.layoutChanged.emit()
+        model = self._source
+        new_rows = [r for r in range(first, last + 1) if model.job_id_at(r) in self._matches]
+        if new_rows:
+            self.beginInsertRows(QModelIndex(), pos, pos + len(new_rows) - 1)
+            self._rows[pos:pos] = new_rows
+            self.endInsertRows()
+
+    def _on_rows_about_to_be_removed(self, parent: QModelIndex, first: int, last: int) -> None:
+        span = self._proxy_span(first, last)
+        self._removing = span
+        if span:
+            self.beginRemoveRows(QModelIndex(), span.start, span.stop - 1)
+
+    def _on_rows_removed(self, parent: QModelIndex, first: int, last: int) -> None:
+        span, self._removing = self._removing, None
+        if self._matches is not None and span is not None:
+            count = last - first + 1
+            del self._rows[span.start:span.stop]
+            self._rows[span.start:] = [r - count for r in self._rows[span.start:]]
+        if span:
+            self.endRemoveRows()
+
+    def _end_source_reset(self, *_args) -> None:
+        self._rebuild()
+        self.endResetModel()
@@ -1,15 +1,18 @@
 from __future__ import annotations
 
+import itertools
 from pathlib import Path
 
-from typing import Dict
+from collections import Counter
+from typing import TYPE_CHECKING, Dict, Optional, Set
 
-from PySide6.QtCore import Qt, QThreadPool, QSize
+from PySide6.QtCore import Qt, QEvent, QThreadPool, QSize, QSortFilterProxyModel, QStandardPaths, QTimer, Signal
 from PySide6.QtGui import QAction
 from PySide6.QtWidgets import (
     QComboBox,
     QFileDialog,
     QDialog,
+    QInputDialog,
     QLabel,
     QLineEdit,
     QMainWindow,
@@ -26,37 +29,115 @@ from PySide6.QtWidgets import (
     QProgressBar,
     QFrame,
 )
-from PySide6.QtGui import QStandardItemModel, QStandardItem, QColor
+from PySide6.QtGui import QColor
 from PySide6.QtWidgets import QStyle, QGraphicsDropShadowEffect
 import sys
 
-from app.ui.add_links_dialog import AddLinksDialog
-from app.ui.preferences_dialog import PreferencesDialog
-from app.core.task import DownloadTask
+from app.ui.job_model import JobFilterProxyModel, JobModel
+from app.ui.thumbnails import ThumbnailCache, ThumbnailDelegate
+from app.core.search import SearchIndex
+from app.core.storage import DiskBudget, StorageConfig, disk_needs
+from app.core.thumbnails import ThumbnailStore
 from app.core.utils import is_valid_url, human_bytes, human_rate, human_eta
 
+# Dialogs, the download stack (yt-dlp options, formats) and the coordinator client
+# are imported where first used, keeping them off the cold-start path
+if TYPE_CHECKING:
+    from app.cluster.viewer import CoordinatorViewer
+    from app.core.task import DownloadTask, EstimateTask
+    from app.ui.subscriptions import SubscriptionSync
+
 
 class MainWindow(QMainWindow):
+    # Emitted once the first frame is on screen and the deferred UI has been built
+    started = Signal()
+
     def __init__(self, parent: QWidget | None = None) -> None:
         super().__init__(parent)
         self.setWindowTitle("iYTDLP")
         self.setUnifiedTitleAndToolBarOnMac(True)
 
+        # Created by DownloadTask when the first download starts, not on the startup path
         self._output_dir = Path.home() / "Movies" / "iYTDLP"
-        self._output_dir.mkdir(parents=True, exist_ok=True)
 
         # Concurrency
         self.threadpool = QThreadPool.globalInstance()
         self.threadpool.setMaxThreadCount(5)  # default concurrency
 
-        # Task registry: row -> task
+        # Live tasks only: job id -> task. Job ids are stable; rows are looked up via the model.
+        # A task is released on its terminal signal (see _release_task); what remains of the
+        # job is its row (status, and the final files in the output column's tooltip)
         self._tasks: Dict[int, DownloadTask] = {}
+        self._next_job_id = itertools.count(1)
+        self._last_job_id = 0
+
+        # Disk I/O: staging/buffer/preallocation options and the free-space ledger shared by tasks.
+        # Jobs that would not fit are held (in order) and retried as other jobs give space back
+        self.storage = StorageConfig()
+        self.disk_budget = DiskBudget(self.storage.free_margin)
+        self._held: Dict[int, None] = {}
+        # Space can also be freed outside the app, so retry periodically while anything is held
+        self._held_timer = QTimer(self)
+        self._held_timer.setInterval(30_000)
+        self._held_timer.timeout.connect(self._retry_held)
+        # Metadata-only passes that size a job before it starts (see _start_job); their own
+        # small pool so estimating the queue does not take download slots
+        self._estimate_pool = QThreadPool(self)
+        self._estimate_pool.setMaxThreadCount(2)
+        self._estimating: Dict[int, EstimateTask] = {}
+        self._estimates: Dict[int, dict] = {}
+
+        # History search: inverted index over title/URL/id/status/output, fed incrementally
+        self.search_index = SearchIndex()
+        self._search_text = ""
+
+        # Thumbnails: loaded off the UI thread for painted rows only. The disk cache is
+        # shared with EmbedThumbnail so an image is downloaded once
+        cache_root = QStandardPaths.writableLocation(QStandardPaths.CacheLocation)
+        self.thumbnails = ThumbnailCache(
+            ThumbnailStore(Path(cache_root or Path.home() / ".cache" / "iYTDLP") / "thumbnails"), parent=self
+        )
+
+        # Status bar counters, kept incrementally per status change (see _set_status)
+        self._counts: Counter = Counter()
+
+        # Coordinator viewer: remote job id -> local job id, plus the local ids it owns
+        self._viewer: CoordinatorViewer | None = None
+        self._viewer_pool = QThreadPool(self)
+        self._coordinator_address = ""
+        self._coordinator_token = ""
+        self._remote_jobs: Dict[str, int] = {}
+        self._remote_job_ids: Set[int] = set()
+
+        # Channel/playlist subscriptions; loaded on first use (see _subscription_sync)
+        self._subscriptions: SubscriptionSync | None = None
 
         self._build_toolbar()
         self._build_table()
         self._build_menubar()
         self._build_statusbar()
 
+        # Everything not needed for the first frame is built right after it (see _finish_startup)
+        self._startup_pending = True
+        self.installEventFilter(self)
+
+    def eventFilter(self, obj, event) -> bool:
+        if obj is self and event.type() == QEvent.Paint and self._startup_pending:
+            self._startup_pending = False
+            self.removeEventFilter(self)
+            QTimer.singleShot(0, self._finish_startup)
+        return super().eventFilter(obj, event)
+
+    def _finish_startup(self) -> None:
+        # Soft shadow for the card; the blur makes every card repaint costlier, first frame included
+        shadow = QGraphicsDropShadowEffect(self)
+        shadow.setBlurRadius(24)
+        shadow.setOffset(0, 8)
+        shadow.setColor(QColor(0, 0, 0, 160))
+        self.card.setGraphicsEffect(shadow)
+        self.thumbnails.prune_disk()
+        self.started.emit()
+
     # UI builders
     def _build_toolbar(self) -> None:
         tb = QToolBar("Main Toolbar", self)
@@ -105,6 +186,10 @@ class MainWindow(QMainWindow):
         tb.addAction(self.action_start_all)
         tb.addAction(self.action_stop_all)
 
+        self.action_clear_completed = QAction(self.style().standardIcon(QStyle.SP_TrashIcon), "Clear Completed", self)
+        self.action_clear_completed.triggered.connect(self.on_clear_completed)
+        tb.addAction(self.action_clear_completed)
+
     def _build_table(self) -> None:
         central = QWidget(self)
         layout = QVBoxLayout(central)
@@ -113,25 +198,53 @@ class MainWindow(QMainWindow):
         # Top card
         self._build_top_card(layout)
 
-        # Section title
+        # Section title with history search
+        header = QHBoxLayout()
         title = QLabel("Download History", self)
-        layout.addWidget(title)
+        header.addWidget(title)
+        header.addStretch(1)
+        self.search_edit = QLineEdit(self)
+        self.search_edit.setPlaceholderText("Search title, URL, id, status, folder…")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.setMinimumWidth(280)
+        header.addWidget(self.search_edit)
+        layout.addLayout(header)
+
+        # Debounce keystrokes; each query is an index lookup, not a table scan
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(120)
+        self._search_timer.timeout.connect(self._apply_search)
+        self.search_edit.textChanged.connect(lambda _t: self._search_timer.start())
 
         self.table = QTableView(self)
         self.table.setAlternatingRowColors(True)
         self.table.setSelectionBehavior(QTableView.SelectRows)
-        self.table.setSortingEnabled(False)
         self.table.setShowGrid(False)
         vh = self.table.verticalHeader()
         vh.setVisible(False)
+        vh.setDefaultSectionSize(max(vh.defaultSectionSize(), self.thumbnails.size.height() + 6))
         hh = self.table.horizontalHeader()
         hh.setStretchLastSection(True)
 
-        self.model = QStandardItemModel(0, 8, self)
-        self.model.setHorizontalHeaderLabels([
-            "Title/URL", "Progress", "Speed", "ETA", "Size", "Status", "Resolution", "Output"
-        ])
-        self.table.setModel(self.model)
+        self.model = JobModel([
+            "Title/URL", "Progress", "Speed", "ETA", "Size", "Status", "Resolution", "Plan", "Output"
+        ], self)
+        # Filtering and sorting happen in proxies; source rows (and job ids) never move for them.
+        # The filter proxy is only chained in while a search is active (see _apply_search)
+        self.proxy = JobFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.sort_proxy = QSortFilterProxyModel(self)
+        self.sort_proxy.setSourceModel(self.model)
+        self.table.setModel(self.sort_proxy)
+        self.table.setItemDelegateForColumn(0, ThumbnailDelegate(self.thumbnails, self.table))
+        # Repaints are coalesced, so a burst of loaded images costs one viewport paint
+        self.thumbnails.ready.connect(lambda _url: self.table.viewport().update())
+        self.thumbnails.settled.connect(self.table.viewport().update)
+        self.table.verticalScrollBar().valueChanged.connect(lambda _v: self.thumbnails.defer())
+        # Start in insertion order until the user clicks a header
+        hh.setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setSortingEnabled(True)
 
         # Column sizing for readability on macOS
         try:
@@ -143,7 +256,11 @@ class MainWindow(QMainWindow):
             hh.setSectionResizeMode(4, QHeaderView.ResizeToContents)
             hh.setSectionResizeMode(5, QHeaderView.ResizeToContents)
             hh.setSectionResizeMode(6, QHeaderView.ResizeToContents)
-            hh.setSectionResizeMode(7, QHeaderView.Stretch)
+            hh.setSectionResizeMode(7, QHeaderView.ResizeToContents)
+            hh.setSectionResizeMode(8, QHeaderView.Stretch)
+            # Every cell update re-measures these columns; by default over 1000 rows
+            # (~20 ms each with a long history), so measure only the rows on screen
+            hh.setResizeContentsPrecision(0)
         except Exception:
             pass
 
@@ -240,13 +357,8 @@ class MainWindow(QMainWindow):
         self.inline_progress.setValue(0)
         v.addWidget(self.inline_progress)
 
-        # Soft shadow for the card
-        shadow = QGraphicsDropShadowEffect(self)
-        shadow.setBlurRadius(24)
-        shadow.setOffset(0, 8)
-        shadow.setColor(QColor(0, 0, 0, 160))
-        card.setGraphicsEffect(shadow)
-
+        # Soft shadow is added after the first frame (_finish_startup)
+        self.card = card
         parent_layout.addWidget(card)
 
     def _build_menubar(self) -> None:
@@ -266,6 +378,26 @@ class MainWindow(QMainWindow):
         self.action_prefs.triggered.connect(self.on_preferences)
         app_menu.addAction(self.action_prefs)
 
+        # Coordinator viewer
+        self.action_attach = QAction("Attach to Coordinator…", self)
+        self.action_attach.triggered.connect(self.on_attach_coordinator)
+        app_menu.addAction(self.action_attach)
+        self.action_detach = QAction("Detach from Coordinator", self)
+        self.action_detach.setEnabled(False)
+        self.action_detach.triggered.connect(self.on_detach_coordinator)
+        app_menu.addAction(self.action_detach)
+
+        app_menu.addSeparator()
+
+        # Subscriptions
+        self.action_subscriptions = QAction("Subscriptions…", self)
+        self.action_subscriptions.triggered.connect(self.on_subscriptions)
+        app_menu.addAction(self.action_subscriptions)
+        self.action_sync = QAction("Sync Subscriptions", self)
+        self.action_sync.setShortcut("Meta+R" if sys.platform == "darwin" else "Ctrl+R")
+        self.action_sync.triggered.connect(self.on_sync_subscriptions)
+        app_menu.addAction(self.action_sync)
+
         app_menu.addSeparator()
 
         # Quit
@@ -274,6 +406,8 @@ class MainWindow(QMainWindow):
         self.action_quit.setMenuRole(QAction.MenuRole.QuitRole)
         self.action_quit.triggered.connect(QApplication.instance().quit)
         app_menu.addAction(self.action_quit)
+        # The viewer blocks on a socket read; unblock it so the pool can shut down
+        QApplication.instance().aboutToQuit.connect(self.on_detach_coordinator)
 
     def _build_statusbar(self) -> None:
         sb = self.statusBar()
@@ -288,6 +422,8 @@ class MainWindow(QMainWindow):
 
     # Slots
     def on_add_links(self) -> None:
+        from app.ui.add_links_dialog import AddLinksDialog
+
         dlg = AddLinksDialog(self)
         if dlg.exec() != QDialog.DialogCode.Accepted:
             return
@@ -309,21 +445,107 @@ class MainWindow(QMainWindow):
 
     def on_start_all(self) -> None:
         # Start or restart queued tasks
-        rows = self.model.rowCount()
-        for row in range(rows):
-            self._start_row(row)
+        for job_id in self.model.job_ids():
+            self._start_job(job_id)
 
     def on_stop_all(self) -> None:
-        for row, task in list(self._tasks.items()):
+        # Held jobs keep their status (Start All retries them) but are no longer retried automatically
+        self._held.clear()
+        for job_id, task in list(self._tasks.items()):
             task.cancel()
-            self._on_task_status(row, "Cancelling…")
+            self._on_task_status(job_id, "Cancelling…")
+        # An estimate cannot be interrupted; its job just stays queued when it comes back
+        for job_id in self._estimating:
+            self._on_task_status(job_id, "Queued")
+
+    def on_clear_completed(self) -> None:
+        done = [
+            self.model.job_id_at(r)
+            for r in range(self.model.rowCount())
+            if self.model.item(r, 5).text() == "Completed"
+        ]
+        self._counts["completed"] -= len(done)
+        removed = self.model.remove_jobs(done)
+        for job_id in done:
+            self.proxy.set_job_match(job_id, False)
+        self.search_index.remove_many(done)
+        self.thumbnails.forget(done)
+        for job_id in done:
+            self._estimates.pop(job_id, None)
+        self._update_counts()
+        self.statusBar().showMessage(f"Cleared {removed} completed download(s)", 2000)
+
+    def on_attach_coordinator(self) -> None:
+        from app.cluster.protocol import DEFAULT_PORT, default_token
+        from app.cluster.viewer import CoordinatorViewer
+
+        address, ok = QInputDialog.getText(
+            self, "Attach to Coordinator", "Coordinator address (host:port):",
+            text=self._coordinator_address or f"127.0.0.1:{DEFAULT_PORT}",
+        )
+        address = (address or "").strip()
+        if not ok or not address:
+            return
+        token, ok = QInputDialog.getText(
+            self, "Attach to Coordinator", "Coordinator token:", QLineEdit.Password,
+            self._coordinator_token or default_token(),
+        )
+        if not ok:
+            return
+        self.on_detach_coordinator()
+        self._coordinator_address = address
+        self._coordinator_token = token.strip()
+        # Job ids restart at 1 on every coordinator, so mappings from an earlier attach would
+        # point at the wrong rows. Those rows stay in _remote_job_ids: they are still view-only
+        self._remote_jobs.clear()
+        viewer = CoordinatorViewer(address, self._coordinator_token)
+        viewer.signals.job.connect(self._on_remote_job)
+        viewer.signals.disconnected.connect(self._on_remote_disconnected)
+        self._viewer = viewer
+        self._viewer_pool.start(viewer)
+        self.action_detach.setEnabled(True)
+        self.statusBar().showMessage(f"Attached to coordinator {address}", 2000)
+
+    def on_detach_coordinator(self) -> None:
+        if self._viewer is not None:
+            self._viewer.stop()
+            self._viewer = None
+        self.action_detach.setEnabled(False)
+
+    def on_subscriptions(self) -> None:
+        from app.ui.subscriptions_dialog import SubscriptionsDialog
+
+        sync = self._subscription_sync()
+        dlg = SubscriptionsDialog(sync.store, self)
+        dlg.sync_requested.connect(self.on_sync_subscriptions)
+        # Titles and sync times change as syncs finish while the dialog is open
+        sync.finished.connect(dlg.refresh)
+        try:
+            dlg.exec()
+        finally:
+            sync.finished.disconnect(dlg.refresh)
+
+    def on_sync_subscriptions(self) -> None:
+        sync = self._subscription_sync()
+        if not len(sync.store):
+            self.statusBar().showMessage("No subscriptions yet (see Subscriptions…)", 3000)
+            return
+        count = sync.sync(cookies_label=self.cookies_combo.currentText())
+        if count:
+            self.statusBar().showMessage(f"Syncing {count} subscription(s)…", 2000)
+
+    def closeEvent(self, event) -> None:
+        self.on_detach_coordinator()
+        if self._subscriptions is not None:
+            self._subscriptions.stop()
+        self.thumbnails.stop()
+        super().closeEvent(event)
 
     # Helpers
-    def _append_task_row(self, url: str) -> None:
-        row = self.model.rowCount()
-        self.model.insertRow(row)
-        out = str(self._output_dir)
-        resolution = self.res_combo.currentText()
+    def _append_task_row(self, url: str, resolution: str | None = None, out: str | None = None) -> int:
+        job_id = next(self._next_job_id)
+        out = out or str(self._output_dir)
+        resolution = resolution or self.res_combo.currentText()
         values = [
             url,
             "0%",
@@ -332,34 +554,80 @@ class MainWindow(QMainWindow):
             "-",
             "Queued",
             resolution,
+            "-",
             out,
         ]
-        for col, val in enumerate(values):
-            item = QStandardItem(val)
-            if col != 0:
-                item.setEditable(False)
-            self.model.setItem(row, col, item)
+        # Index before inserting so an active filter sees the new row
+        self._index_job(job_id, url=url, status="Queued", output=out)
+        self._counts["queued"] += 1
+        self.model.append_job(job_id, values)
+        self._last_job_id = job_id
         self._update_counts()
+        return job_id
 
-    def _start_row(self, row: int) -> None:
+    def _start_job(self, job_id: int) -> None:
+        row = self.model.row_of(job_id)
+        if row is None:
+            return
         status_item = self.model.item(row, 5)
         status = status_item.text() if status_item else ""
-        if status in ("Completed", "Downloading", "Starting…"):
+        if status in ("Completed", "Downloading", "Starting…") or job_id in self._tasks:
+            # Still has a live task (possibly cancelling); it is released on its terminal signal
+            return
+        if job_id in self._remote_job_ids:
+            # Owned by the coordinator; this window only views it
+            return
+        if job_id in self._estimating:
+            # Started again after Stop All; it goes on once its estimate is in
+            self._on_task_status(job_id, "Estimating…")
             return
+        from app.core.task import DownloadTask, EstimateTask
+
         url = self.model.item(row, 0).text()
         resolution = self.model.item(row, 6).text()
         cookies_label = self.cookies_combo.currentText()
+        estimate = self._estimates.get(job_id)
+        if estimate is None:
+            # Size the job first so one that would not fit is held before it starts
+            estimator = EstimateTask(job_id, url, self._output_dir, resolution, cookies_label, self.selected_format)
+            estimator.signals.estimated.connect(self._on_job_estimated)
+            estimator.signals.failed.connect(self._on_estimate_failed)
+            estimator.signals.plan.connect(self._on_task_plan)
+            estimator.signals.metadata.connect(self._on_task_metadata)
+            self._held.pop(job_id, None)
+            self._estimating[job_id] = estimator
+            self._on_task_status(job_id, "Estimating…")
+            self._estimate_pool.start(estimator.run)
+            return
+        if estimate["size"]:
+            # Held until it fits next to running jobs; the task replaces this with its first
+            # video's reservation. Playlists are sized per video as they download instead
+            write_dir = Path(self.storage.staging_dir or self._output_dir)
+            needs = disk_needs(estimate["size"], estimate["merge"], write_dir, self._output_dir)
+            if not self.disk_budget.reserve(job_id, needs):
+                free = min(self.disk_budget.free_for(write_dir), self.disk_budget.free_for(self._output_dir))
+                available = human_bytes(free) if free else "0 B"
+                self._on_task_held(job_id, f"needs {human_bytes(max(needs.values()))}, {available} available")
+                return
         task = DownloadTask(
-            row, url, self._output_dir, resolution, cookies_label,
-            self.selected_format, self.adv_embed_thumb, self.adv_add_metadata
+            job_id, url, self._output_dir, resolution, cookies_label,
+            self.selected_format, self.adv_embed_thumb, self.adv_add_metadata,
+            storage=self.storage, budget=self.disk_budget, thumbnails=self.thumbnails.store,
         )
         task.signals.progress.connect(self._on_task_progress)
         task.signals.status.connect(self._on_task_status)
         task.signals.finished.connect(self._on_task_finished)
         task.signals.failed.connect(self._on_task_failed)
-        self._tasks[row] = task
-        self._on_task_status(row, "Starting…")
-        self.threadpool.start(task)
+        task.signals.held.connect(self._on_task_held)
+        task.signals.plan.connect(self._on_task_plan)
+        task.signals.metadata.connect(self._on_task_metadata)
+        self._held.pop(job_id, None)
+        self._tasks[job_id] = task
+        self._on_task_status(job_id, "Starting…")
+        # Submitted as a callable so only Python references keep the task alive. Handing over
+        # the QRunnable makes it a child of the pool wrapper, and PySide misses the unlink
+        # when the pool deletes it while _tasks still holds it, leaking every such task
+        self.threadpool.start(task.run)
 
     def _on_adv_toggle_embed(self, checked: bool) -> None:
         self.adv_embed_thumb = checked
@@ -393,16 +661,23 @@ class MainWindow(QMainWindow):
             return
         # Ensure model uses current quality selection
         self.res_combo.setCurrentText(self.quality_combo.currentText())
-        self._append_task_row(url)
+        job_id = self._append_task_row(url)
         self.url_edit.clear()
-        # Start the last row only
-        self._start_row(self.model.rowCount() - 1)
+        # Start the new job only
+        self._start_job(job_id)
 
     # Signal handlers
-    def _on_task_progress(self, row: int, d: dict) -> None:
-        if row >= self.model.rowCount():
+    def _on_task_progress(self, job_id: int, d: dict) -> None:
+        row = self.model.row_of(job_id)
+        if row is None:
             return
+        self._apply_progress(job_id, row, d)
+
+    def _apply_progress(self, job_id: int, row: int, d: dict) -> None:
         status = d.get("status")
+        info = d.get("info_dict") or {}
+        if info.get("title") and self._index_job(job_id, title=info["title"], video_id=info.get("id")):
+            self.model.item(row, 0).setToolTip(info["title"])
         if status == "downloading":
             downloaded = d.get("downloaded_bytes") or 0
             total = d.get("total_bytes") or d.get("total_bytes_estimate") or 0
@@ -413,26 +688,184 @@ class MainWindow(QMainWindow):
             self.model.item(row, 2).setText(human_rate(speed))
             self.model.item(row, 3).setText(human_eta(eta))
             self.model.item(row, 4).setText(human_bytes(total))
-            self.model.item(row, 5).setText("Downloading")
-            # Reflect progress on top card for the latest queued row
-            if row == self.model.rowCount() - 1:
+            self._set_status(job_id, row, "Downloading")
+            # Reflect progress on top card for the latest queued job
+            if job_id == self._last_job_id:
                 self.inline_progress.setValue(percent)
 
-    def _on_task_status(self, row: int, text: str) -> None:
-        if row < self.model.rowCount():
-            self.model.item(row, 5).setText(text)
-            self._update_counts()
-
-    def _on_task_finished(self, row: int, result: dict) -> None:
-        if row < self.model.rowCount():
+    def _on_task_status(self, job_id: int, text: str) -> None:
+        row = self.model.row_of(job_id)
+        if row is not None:
+            self._set_status(job_id, row, text)
+
+    def _on_job_estimated(self, job_id: int, estimate: dict) -> None:
+        self._release_estimate(job_id)
+        self._estimates[job_id] = estimate
+        item = self.model.job_item(job_id, 5)
+        if item is not None and item.text() == "Estimating…":
+            self._start_job(job_id)
+
+    def _on_estimate_failed(self, job_id: int, error: str) -> None:
+        self._release_estimate(job_id)
+        row = self.model.row_of(job_id)
+        if row is not None:
+            self._set_status(job_id, row, f"Error: {error}")
+
+    def _release_estimate(self, job_id: int) -> None:
+        # Same lifetime rules as _release_task
+        estimator = self._estimating.pop(job_id, None)
+        if estimator is None:
+            return
+        s = estimator.signals
+        for signal in (s.estimated, s.failed, s.plan, s.metadata):
+            signal.disconnect()
+
+    def _on_task_finished(self, job_id: int, result: dict) -> None:
+        self._release_task(job_id)
+        self._estimates.pop(job_id, None)
+        row = self.model.row_of(job_id)
+        if row is not None:
+            files = result.get("files") or ()
             self.model.item(row, 1).setText("100%")
-            self.model.item(row, 5).setText("Completed")
-            self._update_counts()
-
-    def _on_task_failed(self, row: int, error: str) -> None:
-        if row < self.model.rowCount():
-            self.model.item(row, 5).setText(f"Error: {error}")
-            self._update_counts()
+            if files:
+                self.model.item(row, 8).setToolTip("\n".join(files))
+            self._set_status(job_id, row, "Completed")
+        self._retry_held()
+
+    def _on_task_failed(self, job_id: int, error: str) -> None:
+        self._release_task(job_id)
+        row = self.model.row_of(job_id)
+        if row is not None:
+            self._set_status(job_id, row, f"Error: {error}")
+        self._retry_held()
+
+    def _release_task(self, job_id: int) -> None:
+        # Terminal state: cut the task's connections and drop our reference. The pool drops
+        # its own once run() returns, which frees the task and its TaskSignals
+        task = self._tasks.pop(job_id, None)
+        if task is None:
+            return
+        s = task.signals
+        for signal in (s.progress, s.status, s.finished, s.failed, s.held, s.plan, s.metadata):
+            signal.disconnect()
+
+    def _on_task_plan(self, job_id: int, plan: str) -> None:
+        item = self.model.job_item(job_id, 7)
+        if item is not None:
+            item.setText(plan)
+
+    def _on_task_metadata(self, job_id: int, meta: dict) -> None:
+        item = self.model.job_item(job_id, 0)
+        if item is None:
+            return
+        if meta.get("title") and self._index_job(job_id, title=meta["title"], video_id=meta.get("id")):
+            item.setToolTip(meta["title"])
+        if meta.get("thumbnail"):
+            self.thumbnails.set_url(job_id, meta["thumbnail"])
+            # The item's data did not change, so ask for the repaint that requests the image
+            self.table.viewport().update()
+
+    def _on_task_held(self, job_id: int, reason: str) -> None:
+        self._release_task(job_id)
+        self._held[job_id] = None
+        self._held_timer.start()
+        self._on_task_status(job_id, f"Held: {reason}")
+        self.statusBar().showMessage("Not enough disk space; job held until space frees up", 3000)
+
+    def _retry_held(self) -> None:
+        # A finished job gave its reservation back; let the oldest held job try again.
+        # If it still does not fit it is re-held at the back of the line
+        if self._held:
+            job_id = next(iter(self._held))
+            del self._held[job_id]
+            self._start_job(job_id)
+        if not self._held:
+            self._held_timer.stop()
+
+    def _on_remote_job(self, job: dict) -> None:
+        if self._viewer is None or self.sender() is not self._viewer.signals:
+            return  # queued before a detach
+        job_id = self._remote_jobs.get(job["id"])
+        if job_id is None:
+            options = job.get("options") or {}
+            job_id = self._append_task_row(
+                job["url"], options.get("resolution"), options.get("outdir") or "(worker)"
+            )
+            self._remote_jobs[job["id"]] = job_id
+            self._remote_job_ids.add(job_id)
+        row = self.model.row_of(job_id)
+        if row is None:
+            # Cleared from the table; keep the mapping so it is not re-added
+            return
+        state = job.get("state")
+        progress = job.get("progress") or {}
+        if state == "Leased" and progress.get("status") == "downloading":
+            self._apply_progress(job_id, row, progress)
+        elif state == "Leased":
+            self._on_task_status(job_id, "Starting…")
+        elif state == "Completed":
+            # Not _on_task_finished: no local task or reservation ended, so held jobs stay held
+            self.model.item(row, 1).setText("100%")
+            self._set_status(job_id, row, "Completed")
+        elif state == "Failed":
+            self._set_status(job_id, row, f"Error: {job.get('error') or 'Failed'}")
+        else:
+            self._on_task_status(job_id, state or "Queued")
+        if job.get("worker"):
+            self._index_job(job_id, output=job["worker"])
+            self.model.item(row, 8).setText(f"{job['worker']}")
+
+    # Subscriptions
+    def _subscription_sync(self) -> SubscriptionSync:
+        if self._subscriptions is None:
+            from app.core.subscriptions import SubscriptionStore
+            from app.ui.subscriptions import SubscriptionSync
+
+            data_root = QStandardPaths.writableLocation(QStandardPaths.AppDataLocation)
+            store = SubscriptionStore(Path(data_root or Path.home() / ".local" / "share" / "iYTDLP") / "subscriptions.json")
+            store.load()
+            self._subscriptions = SubscriptionSync(store, parent=self)
+            self._subscriptions.queued.connect(self._on_subscription_entries)
+            self._subscriptions.finished.connect(self._on_subscriptions_synced)
+        return self._subscriptions
+
+    def _on_subscription_entries(self, entries: list) -> None:
+        # One batch from several feeds; rows are queued like links from Add Links.
+        # fetch_updates only hands over entries with a web URL
+        for entry in entries:
+            job_id = self._append_task_row(entry["url"])
+            self._on_task_metadata(job_id, entry)
+
+    def _on_subscriptions_synced(self, synced: int, failed: int, queued: int) -> None:
+        text = f"Synced {synced} subscription(s), {queued} new video(s) queued"
+        if failed:
+            # The rest are listed in Subscriptions…
+            sub = next((s for s in self._subscription_sync().store if s.error), None)
+            text += f", {failed} failed" + (f" ({sub.title or sub.url}: {sub.error})" if sub else "")
+        self.statusBar().showMessage(text, 8000 if failed else 3000)
+
+    # Search
+    def _index_job(self, job_id: int, **fields: str) -> bool:
+        changed = self.search_index.update(job_id, **fields)
+        if changed and self._search_text:
+            self.proxy.set_job_match(job_id, self.search_index.matches(job_id, self._search_text))
+        return changed
+
+    def _apply_search(self) -> None:
+        self._search_text = self.search_edit.text().strip()
+        matches = self.search_index.query(self._search_text)
+        self.proxy.set_matches(matches)
+        # Without a query the view reads the model directly, skipping the Python mapping layer
+        source = self.model if matches is None else self.proxy
+        if self.sort_proxy.sourceModel() is not source:
+            self.sort_proxy.setSourceModel(source)
+        if matches is not None:
+            self.statusBar().showMessage(f"{len(matches)} match(es)", 2000)
+
+    def _on_remote_disconnected(self, reason: str) -> None:
+        self._viewer = None
+        self.action_detach.setEnabled(False)
+        self.statusBar().showMessage(f"Coordinator disconnected: {reason}", 5000)
 
     # Menu handlers
     def on_about(self) -> None:
@@ -443,29 +876,44 @@ class MainWindow(QMainWindow):
         )
 
     def on_preferences(self) -> None:
-        dlg = PreferencesDialog(self.threadpool.maxThreadCount(), self)
+        from app.ui.preferences_dialog import PreferencesDialog
+
+        dlg = PreferencesDialog(self.threadpool.maxThreadCount(), self, storage=self.storage)
         if dlg.exec() == QDialog.DialogCode.Accepted:
             maxc = dlg.get_max_concurrency()
             self.threadpool.setMaxThreadCount(maxc)
+            # Applies to jobs started from now on
+            self.storage = dlg.get_storage_config()
+            self.disk_budget.margin = self.storage.free_margin
             self.statusBar().showMessage(f"Max concurrency set to {maxc}", 2000)
             self._update_counts()
 
     # Counters
+    @staticmethod
+    def _status_bucket(st: str) -> Optional[str]:
+        if st.startswith("Error"):
+            return "errors"
+        if st == "Completed":
+            return "completed"
+        if st in ("Starting…", "Downloading", "Cancelling…"):
+            return "active"
+        if st in ("Queued", "Estimating…") or st.startswith("Held"):
+            return "queued"
+        return None
+
+    def _set_status(self, job_id: int, row: int, text: str) -> None:
+        item = self.model.item(row, 5)
+        old = item.text()
+        if old == text:
+            return
+        self._counts[self._status_bucket(old)] -= 1
+        self._counts[self._status_bucket(text)] += 1
+        self._index_job(job_id, status=text)
+        item.setText(text)
+        self._update_counts()
+
     def _update_counts(self) -> None:
-        rows = self.model.rowCount()
-        queued = active = completed = errors = 0
-        for r in range(rows):
-            status_item = self.model.item(r, 5)
-            st = status_item.text() if status_item else ""
-            if st.startswith("Error"):
-                errors += 1
-            elif st == "Completed":
-                completed += 1
-            elif st in ("Starting…", "Downloading", "Cancelling…"):
-                active += 1
-            elif st == "Queued":
-                queued += 1
-        self._lbl_queued.setText(f"Queued: {queued}")
-        self._lbl_active.setText(f"Active: {active}")
-        self._lbl_completed.setText(f"Completed: {completed}")
-        self._lbl_errors.setText(f"Errors: {errors}")
+        self._lbl_queued.setText(f"Queued: {self._counts['queued']}")
+        self._lbl_active.setText(f"Active: {self._counts['active']}")
+        self._lbl_completed.setText(f"Completed: {self._counts['completed']}")
+        self._lbl_errors.setText(f"Errors: {self._counts['errors']}")
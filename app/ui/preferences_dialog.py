@@ -1,25 +1,41 @@
 from __future__ import annotations
 
+from pathlib import Path
+from typing import Optional
+
 from PySide6.QtCore import Qt
 from PySide6.QtWidgets import (
+    QCheckBox,
     QDialog,
     QDialogButtonBox,
+    QFileDialog,
     QFormLayout,
+    QHBoxLayout,
+    QLineEdit,
+    QPushButton,
     QSpinBox,
 )
 
+from app.core.storage import StorageConfig
+
 
 class PreferencesDialog(QDialog):
     """
     Minimal Preferences dialog stub.
-    Currently allows setting max concurrent downloads.
+    Currently allows setting max concurrent downloads and disk I/O options.
     """
 
-    def __init__(self, current_concurrency: int = 5, parent=None) -> None:
+    def __init__(
+        self,
+        current_concurrency: int = 5,
+        parent=None,
+        storage: Optional[StorageConfig] = None,
+    ) -> None:
         super().__init__(parent)
         self.setWindowTitle("Preferences")
         self.setModal(True)
-        self.resize(400, 140)
+        self.resize(480, 240)
+        storage = storage or StorageConfig()
 
         layout = QFormLayout(self)
 
@@ -28,6 +44,33 @@ class PreferencesDialog(QDialog):
         self.spin_concurrency.setValue(int(current_concurrency) if current_concurrency else 5)
         layout.addRow("Max concurrent downloads:", self.spin_concurrency)
 
+        # Disk I/O
+        self.staging_edit = QLineEdit(str(storage.staging_dir or ""), self)
+        self.staging_edit.setPlaceholderText("None (write straight to the output folder)")
+        btn_browse = QPushButton("Browse…", self)
+        btn_browse.clicked.connect(self._on_browse_staging)
+        staging_row = QHBoxLayout()
+        staging_row.addWidget(self.staging_edit, 1)
+        staging_row.addWidget(btn_browse)
+        layout.addRow("Staging folder:", staging_row)
+
+        self.spin_buffer = QSpinBox(self)
+        self.spin_buffer.setRange(0, 64 * 1024)
+        self.spin_buffer.setSuffix(" KiB")
+        self.spin_buffer.setSpecialValueText("Auto")
+        self.spin_buffer.setValue(storage.buffer_size // 1024)
+        layout.addRow("Write buffer:", self.spin_buffer)
+
+        self.chk_preallocate = QCheckBox("Preallocate files once their size is known", self)
+        self.chk_preallocate.setChecked(storage.preallocate)
+        layout.addRow("", self.chk_preallocate)
+
+        self.spin_margin = QSpinBox(self)
+        self.spin_margin.setRange(0, 1024 * 1024)
+        self.spin_margin.setSuffix(" MB")
+        self.spin_margin.setValue(storage.free_margin // (1024 * 1024))
+        layout.addRow("Keep free on disk:", self.spin_margin)
+
         buttons = QDialogButtonBox(
             QDialogButtonBox.Ok | QDialogButtonBox.Cancel,
             Qt.Horizontal,
@@ -37,5 +80,21 @@ class PreferencesDialog(QDialog):
         buttons.rejected.connect(self.reject)
         layout.addWidget(buttons)
 
+    def _on_browse_staging(self) -> None:
+        directory = QFileDialog.getExistingDirectory(
+            self, "Choose Staging Folder", self.staging_edit.text() or str(Path.home())
+        )
+        if directory:
+            self.staging_edit.setText(directory)
+
     def get_max_concurrency(self) -> int:
         return int(self.spin_concurrency.value())
+
+    def get_storage_config(self) -> StorageConfig:
+        staging = self.staging_edit.text().strip()
+        return StorageConfig(
+            staging_dir=Path(staging).expanduser() if staging else None,
+            buffer_size=int(self.spin_buffer.value()) * 1024,
+            preallocate=self.chk_preallocate.isChecked(),
+            free_margin=int(self.spin_margin.value()) * 1024 * 1024,
+        )
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Deque, Iterable, List, Optional, Set
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+from app.core.subscriptions import HostLimiter, SubscriptionStore, close_idle, fetch_updates
+
+# Results arriving within this window are queued as one batch
+_BATCH_MS = 100
+
+
+class _SyncSignals(QObject):
+    # Subscription URL, feed title, extractor key, entries newest first, list length (-1 unless oldest first)
+    done = Signal(str, str, str, list, int)
+    failed = Signal(str, str)  # subscription URL, error text
+
+
+class _SyncTask(QRunnable):
+    def __init__(
+        self,
+        url: str,
+        known: List[str],
+        oldest_first: bool,
+        ie_key: Optional[str],
+        length: int,
+        cookies_label: Optional[str],
+        signals: _SyncSignals,
+    ) -> None:
+        super().__init__()
+        self.url = url
+        self.known = known
+        self.oldest_first = oldest_first
+        self.ie_key = ie_key
+        self.length = length
+        self.cookies_label = cookies_label
+        self.signals = signals
+
+    def run(self) -> None:
+        try:
+            title, ie_key, entries, length = fetch_updates(
+                self.url, self.known, self.oldest_first, self.cookies_label, self.ie_key, self.length
+            )
+        except Exception as e:  # yt-dlp raises its own DownloadError/ExtractorError types
+            self.signals.failed.emit(self.url, str(e))
+            return
+        self.signals.done.emit(self.url, title, ie_key or "", entries, -1 if length is None else length)
+
+
+class SubscriptionSync(QObject):
+    """
+    Syncs saved subscriptions and hands their new entries to the download queue.
+
+    Each feed is walked newest first on a worker thread, and the walk stops at the
+    first entry already seen (see fetch_updates). Feeds are fetched concurrently
+    within the HostLimiter's total and per-host limits. Results are recorded in the
+    store on the UI thread and batched, so a refresh of many feeds adds rows and
+    saves the store a few times rather than once per feed. A failed sync leaves
+    its error on the subscription (Subscription.error) until the next one succeeds.
+    """
+
+    queued = Signal(list)        # new entries to download, oldest first within each feed
+    finished = Signal(int, int, int)  # feeds synced, feeds failed, entries queued
+
+    def __init__(
+        self,
+        store: SubscriptionStore,
+        limiter: Optional[HostLimiter] = None,
+        parent: Optional[QObject] = None,
+    ) -> None:
+        super().__init__(parent)
+        self.store = store
+        self.limiter = limiter or HostLimiter()
+        # Created before the signals object so it is destroyed (waiting for syncs) first
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(self.limiter.total)
+        self._signals = _SyncSignals(self)
+        self._signals.done.connect(self._on_done)
+        self._signals.failed.connect(self._on_failed)
+        self._cookies_label: Optional[str] = None
+        self._pending: Deque[str] = deque()
+        self._inflight: Set[str] = set()
+        self._batch: List[dict] = []
+        self._dirty = False  # store changed since the last save
+        self._stopped = False
+        self._synced = 0
+        self._failed = 0
+        self._queued = 0
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(_BATCH_MS)
+        self._flush_timer.timeout.connect(self._flush)
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._pending or self._inflight)
+
+    def sync(self, urls: Optional[Iterable[str]] = None, cookies_label: Optional[str] = None) -> int:
+        """Queues the given subscriptions (all by default) for a sync; returns how many were added."""
+        self._cookies_label = cookies_label
+        self._stopped = False
+        if urls is None:
+            urls = [sub.url for sub in self.store]
+        added = 0
+        for url in urls:
+            if self.store.get(url) is None or url in self._inflight or url in self._pending:
+                continue
+            self._pending.append(url)
+            added += 1
+        self._pump()
+        return added
+
+    def stop(self) -> None:
+        # Drop syncs not started yet; running ones finish and are recorded, then their
+        # YoutubeDL instances are closed too (see _maybe_finish)
+        self._pending.clear()
+        self._stopped = True
+        close_idle()
+        self._maybe_finish()
+
+    # Internals
+    def _pump(self) -> None:
+        # Feeds whose host is at its limit wait, in order, without holding back other hosts
+        waiting: Deque[str] = deque()
+        while self._pending and self.limiter.active < self.limiter.total:
+            url = self._pending.popleft()
+            sub = self.store.get(url)
+            if sub is None:
+                continue
+            if not self.limiter.try_acquire(url):
+                waiting.append(url)
+                continue
+            self._inflight.add(url)
+            self._pool.start(_SyncTask(
+                url, list(sub.seen_ids), sub.oldest_first, sub.ie_key, sub.length, self._cookies_label, self._signals
+            ))
+        waiting.extend(self._pending)
+        self._pending = waiting
+
+    def _on_done(self, url: str, title: str, ie_key: str, entries: list, length: int) -> None:
+        self._release(url)
+        self._synced += 1
+        sub = self.store.get(url)
+        if sub is not None:  # removed while syncing
+            self._batch.extend(sub.record(title, entries, ie_key or None, None if length < 0 else length))
+            self._dirty = True
+            if not self._flush_timer.isActive():
+                self._flush_timer.start()
+        self._pump()
+        self._maybe_finish()
+
+    def _on_failed(self, url: str, error: str) -> None:
+        # Seen ids are left as they were; the next sync walks from the same point
+        self._release(url)
+        self._failed += 1
+        sub = self.store.get(url)
+        if sub is not None:
+            sub.error = error
+        self._pump()
+        self._maybe_finish()
+
+    def _release(self, url: str) -> None:
+        self._inflight.discard(url)
+        self.limiter.release(url)
+
+    def _maybe_finish(self) -> None:
+        if self.busy:
+            return
+        if self._stopped:
+            close_idle()
+        self._flush()
+        synced, failed, queued = self._synced, self._failed, self._queued
+        self._synced = self._failed = self._queued = 0
+        if synced or failed:
+            self.finished.emit(synced, failed, queued)
+
+    def _flush(self) -> None:
+        self._flush_timer.stop()
+        batch, self._batch = self._batch, []
+        if batch:
+            self._queued += len(batch)
+            self.queued.emit(batch)
+        if self._dirty:
+            try:
+                self.store.save()
+                self._dirty = False
+            except OSError:
+                pass  # kept in memory; the next flush tries again
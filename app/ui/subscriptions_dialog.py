@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import time
+
+from PySide6.QtCore import Qt, Signal
+from PySide6.QtWidgets import (
+    QCheckBox,
+    QDialog,
+    QDialogButtonBox,
+    QHBoxLayout,
+    QLineEdit,
+    QListWidget,
+    QListWidgetItem,
+    QMessageBox,
+    QPushButton,
+    QVBoxLayout,
+)
+
+from app.core.subscriptions import SubscriptionStore
+from app.core.utils import is_valid_url
+
+
+class SubscriptionsDialog(QDialog):
+    """
+    Lists saved channel/playlist subscriptions and lets the user add or remove them.
+    The first sync of a new subscription only records what is already there.
+    """
+
+    sync_requested = Signal()
+
+    def __init__(self, store: SubscriptionStore, parent=None) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("Subscriptions")
+        self.resize(560, 360)
+        self.store = store
+
+        layout = QVBoxLayout(self)
+
+        self.list = QListWidget(self)
+        self.list.setSelectionMode(QListWidget.ExtendedSelection)
+        layout.addWidget(self.list)
+
+        add_row = QHBoxLayout()
+        self.url_edit = QLineEdit(self)
+        self.url_edit.setPlaceholderText("Channel or playlist URL…")
+        self.url_edit.returnPressed.connect(self._on_add)
+        add_row.addWidget(self.url_edit, 1)
+        self.chk_oldest_first = QCheckBox("Oldest first", self)
+        self.chk_oldest_first.setToolTip("For playlists that add new videos at the end")
+        add_row.addWidget(self.chk_oldest_first)
+        btn_add = QPushButton("Add", self)
+        btn_add.clicked.connect(self._on_add)
+        add_row.addWidget(btn_add)
+        layout.addLayout(add_row)
+
+        row = QHBoxLayout()
+        btn_remove = QPushButton("Remove", self)
+        btn_remove.clicked.connect(self._on_remove)
+        row.addWidget(btn_remove)
+        row.addStretch(1)
+        btn_sync = QPushButton("Sync Now", self)
+        btn_sync.clicked.connect(self.sync_requested.emit)
+        row.addWidget(btn_sync)
+        layout.addLayout(row)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Close, Qt.Horizontal, self)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+        self.refresh()
+
+    def refresh(self) -> None:
+        self.list.clear()
+        for sub in self.store:
+            synced = time.strftime("%Y-%m-%d %H:%M", time.localtime(sub.last_sync)) if sub.last_sync else "never"
+            status = f"sync failed: {sub.error}" if sub.error else f"synced {synced}"
+            item = QListWidgetItem(f"{sub.title or sub.url}    ({status})", self.list)
+            item.setToolTip(f"{sub.url}\n{sub.error}" if sub.error else sub.url)
+            item.setData(Qt.UserRole, sub.url)
+
+    def _on_add(self) -> None:
+        url = self.url_edit.text().strip()
+        if not is_valid_url(url):
+            return
+        self.store.add(url, oldest_first=self.chk_oldest_first.isChecked())
+        self._save()
+        self.url_edit.clear()
+        self.refresh()
+
+    def _on_remove(self) -> None:
+        for item in self.list.selectedItems():
+            self.store.remove(item.data(Qt.UserRole))
+        self._save()
+        self.refresh()
+
+    def _save(self) -> None:
+        try:
+            self.store.save()
+        except OSError as e:
+            QMessageBox.warning(self, "Subscriptions", f"Could not save subscriptions: {e}")
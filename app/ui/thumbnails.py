@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from PySide6.QtCore import (
+    QBuffer,
+    QByteArray,
+    QIODevice,
+    QObject,
+    QRunnable,
+    QSize,
+    Qt,
+    QThreadPool,
+    QTimer,
+    Signal,
+)
+from PySide6.QtGui import QIcon, QImage, QImageReader, QPixmap
+from PySide6.QtWidgets import QStyledItemDelegate, QStyleOptionViewItem
+
+from app.core.thumbnails import ThumbnailStore
+from app.ui.job_model import JOB_ID_ROLE
+
+# Size in the table; previews are decoded at 2x for HiDPI screens
+THUMB_SIZE = QSize(48, 27)
+_SCALE = 2
+
+# Pixmaps kept in memory; ~20 KB each at 96x54
+DEFAULT_MEMORY_BUDGET = 24 * 1024 * 1024
+
+_MAX_INFLIGHT = 2
+# Older requests are dropped first: their rows have most likely been scrolled away
+_MAX_QUEUED = 64
+# Quiet time after the last scroll before loads start again
+_SETTLE_MS = 150
+# A URL that failed is not asked for again until this many seconds have passed;
+# at most _MAX_FAILED are remembered, oldest forgotten first
+_RETRY_FAILED_S = 60.0
+_MAX_FAILED = 256
+
+
+class _LoaderSignals(QObject):
+    loaded = Signal(str, QImage)  # image URL, preview (null if it could not be fetched or decoded)
+
+
+class _LoadTask(QRunnable):
+    def __init__(self, store: ThumbnailStore, url: str, size: QSize, signals: _LoaderSignals) -> None:
+        super().__init__()
+        self.store = store
+        self.url = url
+        self.size = size
+        self.signals = signals
+
+    def run(self) -> None:
+        try:
+            image = self._load()
+        except Exception:
+            # Any failure must still report back, or the URL stays in flight for good
+            image = QImage()
+        self.signals.loaded.emit(self.url, image)
+
+    def _load(self) -> QImage:
+        cached = self.store.cached_preview(self.url)
+        if cached is not None:
+            image = QImage(str(cached))
+            if not image.isNull():
+                return image
+        reader = QImageReader(str(self.store.fetch(self.url)))
+        reader.setAutoTransform(True)
+        full = reader.size()
+        if full.isValid() and (full.width() > self.size.width() or full.height() > self.size.height()):
+            # Formats like JPEG scale while decoding, so the full-size image is never built
+            reader.setScaledSize(full.scaled(self.size, Qt.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            return image
+        if image.width() > self.size.width() or image.height() > self.size.height():
+            image = image.scaled(self.size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        # Downscaled once; later sessions read this preview instead of the original
+        data = QByteArray()
+        buf = QBuffer(data)
+        buf.open(QIODevice.WriteOnly)
+        image.save(buf, "PNG")
+        buf.close()
+        self.store.write_preview(self.url, bytes(data))
+        return image
+
+
+class ThumbnailCache(QObject):
+    """
+    Thumbnails for the download table.
+
+    Images are fetched, decoded and downscaled on a small pool of worker
+    threads. The results are kept as icons in an LRU cache bounded by a
+    byte budget, and the previews also persist in the ThumbnailStore on disk.
+    Nothing is requested up front. ThumbnailDelegate asks for a row's image
+    when it paints the row, so only rows in the viewport are ever loaded.
+    While the view scrolls (see defer), loads wait. Once scrolling settles,
+    the queue is dropped and only rows painted again are loaded.
+    """
+
+    ready = Signal(str)   # image URL now in memory
+    settled = Signal()    # scrolling stopped; repaint so visible rows ask again
+
+    def __init__(
+        self,
+        store: ThumbnailStore,
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        size: QSize = THUMB_SIZE,
+        parent: Optional[QObject] = None,
+    ) -> None:
+        super().__init__(parent)
+        self.store = store
+        self.memory_budget = memory_budget
+        self.size = size
+        # Created before the signals object so it is destroyed (waiting for loads) first
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(_MAX_INFLIGHT)
+        self._signals = _LoaderSignals(self)
+        self._signals.loaded.connect(self._on_loaded)
+        self._urls: Dict[int, str] = {}
+        # URL -> (icon, bytes), least recently used first
+        self._memory: "OrderedDict[str, Tuple[QIcon, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._queue: "OrderedDict[str, None]" = OrderedDict()
+        self._inflight: Set[str] = set()
+        # URL -> monotonic time after which it may be requested again
+        self._failed: "OrderedDict[str, float]" = OrderedDict()
+        self._settle = QTimer(self)
+        self._settle.setSingleShot(True)
+        self._settle.timeout.connect(self._on_settled)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    @property
+    def busy(self) -> bool:
+        return self._settle.isActive() or bool(self._queue or self._inflight)
+
+    def set_url(self, job_id: int, url: str) -> None:
+        self._urls[job_id] = url
+
+    def has_url(self, job_id: int) -> bool:
+        return job_id in self._urls
+
+    def forget(self, job_ids: Iterable[int]) -> None:
+        for job_id in job_ids:
+            self._urls.pop(job_id, None)
+
+    def icon(self, job_id: int) -> Optional[QIcon]:
+        """The job's thumbnail if it is in memory; otherwise queues a load and returns None."""
+        url = self._urls.get(job_id)
+        if url is None:
+            return None
+        entry = self._memory.get(url)
+        if entry is not None:
+            self._memory.move_to_end(url)
+            return entry[0]
+        self._request(url)
+        return None
+
+    def defer(self, msec: int = _SETTLE_MS) -> None:
+        # Called on every scroll step; rows flicking past are not worth a fetch
+        self._settle.start(msec)
+
+    def prune_disk(self) -> None:
+        self._pool.start(self.store.prune)
+
+    def stop(self) -> None:
+        # Drop queued loads; running ones finish (fetches time out on their own)
+        self._queue.clear()
+        self._pool.clear()
+
+    # Internals
+    def _request(self, url: str) -> None:
+        if url in self._inflight:
+            return
+        retry_at = self._failed.get(url)
+        if retry_at is not None:
+            if time.monotonic() < retry_at:
+                return
+            del self._failed[url]
+        self._queue[url] = None
+        self._queue.move_to_end(url)
+        while len(self._queue) > _MAX_QUEUED:
+            self._queue.popitem(last=False)
+        self._pump()
+
+    def _on_settled(self) -> None:
+        self._queue.clear()
+        self.settled.emit()
+
+    def _pump(self) -> None:
+        if self._settle.isActive():
+            return
+        decode = QSize(self.size.width() * _SCALE, self.size.height() * _SCALE)
+        while self._queue and len(self._inflight) < _MAX_INFLIGHT:
+            # Newest first: the rows painted last are the ones on screen
+            url, _ = self._queue.popitem(last=True)
+            self._inflight.add(url)
+            self._pool.start(_LoadTask(self.store, url, decode, self._signals))
+
+    def _on_loaded(self, url: str, image: QImage) -> None:
+        self._inflight.discard(url)
+        if image.isNull():
+            self._failed[url] = time.monotonic() + _RETRY_FAILED_S
+            self._failed.move_to_end(url)
+            while len(self._failed) > _MAX_FAILED:
+                self._failed.popitem(last=False)
+        else:
+            pixmap = QPixmap.fromImage(image)
+            # Fit the logical thumbnail size whatever the preview's actual resolution
+            pixmap.setDevicePixelRatio(max(
+                1.0, image.width() / self.size.width(), image.height() / self.size.height()
+            ))
+            nbytes = image.sizeInBytes()
+            self._memory[url] = (QIcon(pixmap), nbytes)
+            self._memory_bytes += nbytes
+            while self._memory_bytes > self.memory_budget and len(self._memory) > 1:
+                _old, (_icon, old_bytes) = self._memory.popitem(last=False)
+                self._memory_bytes -= old_bytes
+            self.ready.emit(url)
+        self._pump()
+
+
+class ThumbnailDelegate(QStyledItemDelegate):
+    """Draws a job's thumbnail as the title cell's decoration, asking the cache for it only when painted."""
+
+    def __init__(self, cache: ThumbnailCache, parent: Optional[QObject] = None) -> None:
+        super().__init__(parent)
+        self.cache = cache
+        # Holds the space while the image loads so the title does not jump
+        blank = QPixmap(cache.size * _SCALE)
+        blank.fill(Qt.transparent)
+        blank.setDevicePixelRatio(_SCALE)
+        self._placeholder = QIcon(blank)
+
+    def initStyleOption(self, option: QStyleOptionViewItem, index) -> None:
+        super().initStyleOption(option, index)
+        job_id = index.data(JOB_ID_ROLE)
+        if job_id is None or not self.cache.has_url(int(job_id)):
+            return
+        icon = self.cache.icon(int(job_id))
+        option.features |= QStyleOptionViewItem.HasDecoration
+        option.icon = self._placeholder if icon is None else icon
+        option.decorationSize = self.cache.size
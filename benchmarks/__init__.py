@@ -0,0 +1 @@
+# Benchmark suite for iYTDLP (python -m benchmarks)
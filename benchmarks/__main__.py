@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from benchmarks.scenarios import SCENARIOS, add_common_args
+
+BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+# Metrics where a larger value is better; everything else is "lower is better"
+_HIGHER_IS_BETTER = ("_mbps", "_per_s")
+# Absolute slack per unit so near-zero baselines don't flag noise as regressions
+_SLACK = {"_ms": 2.0, "_s": 0.05, "_mb": 5.0}
+# Informational counters, and single worst samples that are mostly scheduler noise, are not compared
+_IGNORED = ("signals_emitted", "progress_events", "ui_latency_max_ms")
+
+
+def machine_info() -> Dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def run_scenario(name: str, passthrough: List[str]) -> Dict[str, float]:
+    # Each scenario gets a fresh interpreter so RSS and caches don't leak between them
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.scenarios", name, *passthrough],
+        cwd=str(Path(__file__).resolve().parent.parent),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    lines = [ln for ln in proc.stdout.splitlines() if ln.startswith("{")]
+    if proc.returncode != 0 or not lines:
+        raise RuntimeError(f"{name} failed ({proc.returncode}):\n{proc.stderr[-2000:]}")
+    return json.loads(lines[-1])
+
+
+def combine(runs: List[Dict[str, float]], worst: bool) -> Dict[str, float]:
+    # The median of repeated runs, or for a baseline the worst of them so that it covers run-to-run noise
+    combined = {}
+    for metric in runs[0]:
+        values = [r[metric] for r in runs if isinstance(r.get(metric), (int, float))]
+        if len(values) != len(runs):
+            combined[metric] = runs[-1][metric]
+        elif not worst:
+            combined[metric] = statistics.median(values)
+        else:
+            combined[metric] = min(values) if metric.endswith(_HIGHER_IS_BETTER) else max(values)
+    return combined
+
+
+def compare(
+    name: str, current: Dict[str, float], baseline: Dict[str, float], tolerance: float
+) -> List[Tuple[str, float, float]]:
+    regressions = []
+    for metric, base in baseline.items():
+        if metric in _IGNORED or metric not in current:
+            continue
+        value = current[metric]
+        slack = next((v for suffix, v in _SLACK.items() if metric.endswith(suffix)), 0.0)
+        if metric.endswith(_HIGHER_IS_BETTER):
+            worse = value < base * (1.0 - tolerance) - slack
+        else:
+            worse = value > base * (1.0 + tolerance) + slack
+        if worse:
+            regressions.append((metric, base, value))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="iYTDLP benchmark suite")
+    parser.add_argument("scenarios", nargs="*", help=f"Subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scenario (median; worst run for a baseline)")
+    parser.add_argument("--output", type=Path, help="Also write results as JSON")
+    parser.add_argument("--list", action="store_true", help="List scenarios and exit")
+    add_common_args(parser)
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (_, desc) in SCENARIOS.items():
+            print(f"{name:<16} {desc}")
+        return 0
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenario(s): {', '.join(unknown)}")
+
+    passthrough = [
+        f"--concurrency={args.concurrency}",
+        f"--latency={args.latency}",
+        f"--bandwidth={args.bandwidth}",
+        f"--error-rate={args.error_rate}",
+        f"--seed={args.seed}",
+    ]
+    if args.quick:
+        passthrough.append("--quick")
+
+    # Baselines are keyed by workload so --quick runs never compare against full ones
+    key = "quick" if args.quick else "full"
+    stored: Dict = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    baseline = stored.get(key, {})
+    if not args.save_baseline:
+        recorded = stored.get("machine", {}).get(key)
+        if not baseline:
+            print(f"No {key} baseline in {args.baseline}; nothing is compared (create one with --save-baseline)")
+        elif recorded and recorded.get("cpus") != os.cpu_count():
+            # Timings only compare on like hardware; re-save the baseline on this machine (e.g. in CI) first
+            print(f"Baseline recorded on {recorded}; this machine has {os.cpu_count()} CPUs")
+
+    results: Dict[str, Dict[str, float]] = {}
+    failed = False
+    for name in names:
+        print(f"== {name}", flush=True)
+        try:
+            runs = [run_scenario(name, passthrough) for _ in range(max(1, args.repeat))]
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            failed = True
+            continue
+        results[name] = combine(runs, worst=args.save_baseline)
+        for metric, value in results[name].items():
+            base = baseline.get(name, {}).get(metric)
+            ref = f"  (baseline {base})" if base is not None else ""
+            print(f"   {metric:<22} {value}{ref}")
+        if name in baseline and not args.save_baseline:
+            for metric, base, value in compare(name, results[name], baseline[name], args.tolerance):
+                print(f"   REGRESSION {metric}: {base} -> {value}")
+                failed = True
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+    if args.save_baseline:
+        stored.setdefault(key, {}).update(results)
+        stored.setdefault("machine", {})[key] = machine_info()
+        args.baseline.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import os
+import resource
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+def current_rss() -> int:
+    # Resident set size in bytes; falls back to the peak where /proc is unavailable
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+class RssSampler:
+    """Samples RSS on a background thread; keeps the peak and the full series."""
+
+    def __init__(self, interval: float = 0.05) -> None:
+        self.interval = interval
+        self.samples: List[int] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "RssSampler":
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.samples.append(current_rss())
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.samples.append(current_rss())
+
+    @property
+    def peak(self) -> int:
+        return max(self.samples) if self.samples else current_rss()
+
+
+class UiLatencyProbe:
+    """
+    Measures UI-thread responsiveness: a short QTimer records how late each
+    tick fires. Blocking work on the UI thread shows up directly as lateness.
+    """
+
+    def __init__(self, interval_ms: int = 10) -> None:
+        from PySide6.QtCore import QTimer
+
+        self.interval_ms = interval_ms
+        self.lateness_ms: List[float] = []
+        self._last = 0.0
+        self._timer = QTimer()
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._tick)
+
+    def start(self) -> "UiLatencyProbe":
+        self._last = time.perf_counter()
+        self._timer.start()
+        return self
+
+    def stop(self) -> None:
+        self._timer.stop()
+
+    def _tick(self) -> None:
+        now = time.perf_counter()
+        self.lateness_ms.append(max(0.0, (now - self._last) * 1000.0 - self.interval_ms))
+        self._last = now
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "ui_latency_p50_ms": round(percentile(self.lateness_ms, 50), 2),
+            "ui_latency_p95_ms": round(percentile(self.lateness_ms, 95), 2),
+            "ui_latency_max_ms": round(max(self.lateness_ms, default=0.0), 2),
+        }
+
+
+class Measurement:
+    """Wall time, CPU time and RSS around a block of work."""
+
+    def __enter__(self) -> "Measurement":
+        self.rss = RssSampler().start()
+        self._cpu0 = cpu_seconds()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.wall = time.perf_counter() - self._t0
+        self.cpu = cpu_seconds() - self._cpu0
+        self.rss.stop()
+
+    def result(self, nbytes: int = 0) -> Dict[str, float]:
+        out = {
+            "wall_s": round(self.wall, 3),
+            "cpu_s": round(self.cpu, 3),
+            "rss_peak_mb": round(self.rss.peak / 1e6, 1),
+        }
+        if nbytes:
+            out["throughput_mbps"] = round(nbytes / self.wall / 1e6, 2) if self.wall else 0.0
+        return out
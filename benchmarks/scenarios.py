@@ -0,0 +1,792 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from benchmarks.metrics import Measurement, UiLatencyProbe, current_rss  # noqa: E402
+from benchmarks.server import ServerConfig, ServerProcess  # noqa: E402
+
+Metrics = Dict[str, float]
+
+# Soak: RSS may grow at most this much between the end of warm-up and the last batch
+SOAK_GROWTH_LIMIT_MB = 16.0
+
+# Search at 100k+ jobs: the first query after a burst of inserts, and the p95 of a query mix
+SEARCH_BUDGET_MS = 25.0
+
+# Cold start, process spawn to first painted frame (offscreen), must stay under this
+STARTUP_BUDGET_MS = 800.0
+# Must not be loaded before the first frame: the download stack, networking and dialogs
+_COLD_START_EXCLUDED = (
+    "yt_dlp", "ssl", "http", "urllib.request", "socket", "json", "ctypes",
+    "app.core.task", "app.core.options", "app.core.formats", "app.core.postprocessors",
+    "app.cluster", "app.ui.add_links_dialog", "app.ui.preferences_dialog",
+    "app.core.subscriptions", "app.ui.subscriptions", "app.ui.subscriptions_dialog",
+)
+
+
+def _qt_app():
+    from PySide6.QtWidgets import QApplication
+
+    return QApplication.instance() or QApplication([sys.argv[0]])
+
+
+def _dir_bytes(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def _download(urls: List[str], label: str, concurrency: int) -> Metrics:
+    """Runs DownloadTask exactly as MainWindow does: a thread pool plus UI-thread slots."""
+    from PySide6.QtCore import QEventLoop, QObject, QThreadPool, Slot
+
+    from app.core.task import DownloadTask
+
+    _qt_app()
+
+    class Collector(QObject):
+        def __init__(self, total: int, loop: QEventLoop) -> None:
+            super().__init__()
+            self.total = total
+            self.done = 0
+            self.errors = 0
+            self.progress_events = 0
+            self.loop = loop
+
+        @Slot(int, dict)
+        def on_progress(self, _job_id: int, _d: dict) -> None:
+            self.progress_events += 1
+
+        @Slot(int, dict)
+        def on_finished(self, _job_id: int, _r: dict) -> None:
+            self._count()
+
+        @Slot(int, str)
+        def on_failed(self, _job_id: int, _e: str) -> None:
+            self.errors += 1
+            self._count()
+
+        def _count(self) -> None:
+            self.done += 1
+            if self.done >= self.total:
+                self.loop.quit()
+
+    loop = QEventLoop()
+    collector = Collector(len(urls), loop)
+    pool = QThreadPool()
+    pool.setMaxThreadCount(concurrency)
+    with tempfile.TemporaryDirectory(prefix="iytdlp-bench-") as tmp:
+        outdir = Path(tmp)
+        tasks = []
+        for job_id, url in enumerate(urls, start=1):
+            task = DownloadTask(job_id, url, outdir, label, None)
+            task.signals.progress.connect(collector.on_progress)
+            task.signals.finished.connect(collector.on_finished)
+            task.signals.failed.connect(collector.on_failed)
+            tasks.append(task)
+        probe = UiLatencyProbe().start()
+        with Measurement() as m:
+            for task in tasks:
+                pool.start(task)
+            loop.exec()
+            pool.waitForDone()
+        probe.stop()
+        nbytes = _dir_bytes(outdir)
+    out = m.result(nbytes)
+    out.update(probe.summary())
+    out["jobs_per_s"] = round(len(urls) / m.wall, 2) if m.wall else 0.0
+    out["errors"] = collector.errors
+    out["progress_events"] = collector.progress_events
+    return out
+
+
+def many_small(args: argparse.Namespace) -> Metrics:
+    count = 40 if args.quick else 300
+    with ServerProcess(_server_config(args)) as srv:
+        urls = [f"{srv.base_url}/progressive/small{i}-{256 * 1024}.mp4" for i in range(count)]
+        return _download(urls, "720p", args.concurrency)
+
+
+def few_huge(args: argparse.Namespace) -> Metrics:
+    size = (32 if args.quick else 512) * 1024 * 1024
+    with ServerProcess(_server_config(args)) as srv:
+        urls = [f"{srv.base_url}/progressive/huge{i}-{size}.mp4" for i in range(3)]
+        return _download(urls, "720p", args.concurrency)
+
+
+def hls(args: argparse.Namespace) -> Metrics:
+    count = 10 if args.quick else 50
+    with ServerProcess(_server_config(args)) as srv:
+        urls = [f"{srv.base_url}/hls/stream{i}-20x{512 * 1024}.m3u8" for i in range(count)]
+        return _download(urls, "720p", args.concurrency)
+
+
+def dash(args: argparse.Namespace) -> Metrics:
+    count = 10 if args.quick else 50
+    with ServerProcess(_server_config(args)) as srv:
+        urls = [f"{srv.base_url}/dash/stream{i}-20x{512 * 1024}.mpd" for i in range(count)]
+        return _download(urls, "720p", args.concurrency)
+
+
+def format_plan(args: argparse.Namespace) -> Metrics:
+    """Plans every case in data/formats.json, failing on any plan that differs from the recorded one."""
+    from app.core.formats import plan_formats
+
+    data = json.loads((Path(__file__).resolve().parent / "data" / "formats.json").read_text())
+    cases = data["cases"]
+    mismatches = []
+    for case in cases:
+        plan = plan_formats(
+            data["formats"][case["formats"]], case["label"], case["container"], case["ffmpeg"], data["duration"]
+        )
+        got = plan.format_id if plan else None
+        if got != case["plan"]:
+            mismatches.append(f"{case['formats']} {case['label']} {case['container']} ffmpeg={case['ffmpeg']}: "
+                              f"expected {case['plan']}, got {got}")
+    if mismatches:
+        raise AssertionError("Format plans changed:\n" + "\n".join(mismatches))
+
+    rounds = 20 if args.quick else 200
+    with Measurement() as m:
+        for _ in range(rounds):
+            for case in cases:
+                plan_formats(data["formats"][case["formats"]], case["label"], case["container"], case["ffmpeg"])
+    out = m.result()
+    out["plans_per_s"] = round(rounds * len(cases) / m.wall, 1)
+    return out
+
+
+def search(args: argparse.Namespace) -> Metrics:
+    """
+    Indexes 100k jobs (200k without --quick) and times queries against SEARCH_BUDGET_MS:
+    the first one right after the inserts, a mix of prefixes, words and video ids, and
+    the first one after clearing a tenth of the jobs. Sampled results are checked
+    against a per-job match. A prefix shared by every job is timed but not budgeted.
+    """
+    import random
+
+    from app.core.search import SearchIndex
+
+    jobs = 100_000 if args.quick else 200_000
+    rng = random.Random(args.seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = ["".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(20_000)]
+    index = SearchIndex()
+
+    def timed_query(text: str) -> Tuple[float, set]:
+        t = time.perf_counter()
+        result = index.query(text)
+        return (time.perf_counter() - t) * 1000.0, result or set()
+
+    queries = []
+    for _ in range(200 if args.quick else 1000):
+        kind = rng.random()
+        if kind < 0.4:
+            queries.append(rng.choice(words)[:rng.randint(2, 4)])
+        elif kind < 0.7:
+            queries.append(f"{rng.choice(words)} {rng.choice(words)[:3]}")
+        elif kind < 0.9:
+            # A pasted id, or most of one
+            queries.append(f"vid{rng.randrange(jobs):07d}"[:rng.randint(8, 10)])
+        else:
+            queries.append(rng.choice(("queued", "completed", "youtube watch", "error")))
+
+    with Measurement() as m:
+        t = time.perf_counter()
+        for i in range(jobs):
+            index.update(
+                i, title=" ".join(rng.sample(words, 5)), url=f"https://www.youtube.com/watch?v=vid{i:07d}",
+                video_id=f"vid{i:07d}", status="Queued",
+            )
+        insert_s = time.perf_counter() - t
+        first_ms, _ = timed_query(rng.choice(words)[:2])
+        latencies = []
+        for text in queries:
+            ms, result = timed_query(text)
+            latencies.append(ms)
+            for job_id in rng.sample(sorted(result), min(5, len(result))):
+                if not index.matches(job_id, text):
+                    raise AssertionError(f"Job {job_id} returned for {text!r} but does not match it")
+        # Clear a tenth of the jobs and finish another tenth, as Clear Completed does
+        for i in range(0, jobs, 10):
+            index.remove(i)
+            index.update(i + 1, status="Completed")
+        after_clear_ms, completed = timed_query("completed")
+        # Matches a token of every job; costs one posting per job, so it is reported, not budgeted
+        broad_ms, _ = timed_query("vi")
+    if index.query("vid0000000") or len(completed) != jobs // 10:
+        raise AssertionError("Removed or updated jobs are not reflected in queries")
+
+    out = m.result()
+    out["insert_us_per_job"] = round(insert_s * 1e6 / jobs, 2)
+    out["first_query_ms"] = round(first_ms, 2)
+    out["query_p50_ms"] = round(statistics.median(latencies), 2)
+    out["query_p95_ms"] = round(sorted(latencies)[int(len(latencies) * 0.95)], 2)
+    out["after_clear_ms"] = round(after_clear_ms, 2)
+    out["broad_query_ms"] = round(broad_ms, 2)
+    slow = {k: out[k] for k in ("first_query_ms", "query_p95_ms", "after_clear_ms") if out[k] > SEARCH_BUDGET_MS}
+    if slow:
+        raise AssertionError(f"Search over {jobs} jobs exceeds {SEARCH_BUDGET_MS:.0f} ms: {slow}")
+    return out
+
+
+def ui_load(args: argparse.Namespace) -> Metrics:
+    """Queues 10k rows through the same path as Add Links, then scrolls the table."""
+    app = _qt_app()
+    from app.ui.main_window import MainWindow
+
+    rows = 1000 if args.quick else 10000
+    win = MainWindow()
+    win.resize(1000, 640)
+    win.show()
+    app.processEvents()
+    probe = UiLatencyProbe().start()
+    with Measurement() as m:
+        for i in range(rows):
+            win._append_task_row(f"https://example.invalid/watch?v={i:011d}")
+        app.processEvents()
+        t_scroll = time.perf_counter()
+        bar = win.table.verticalScrollBar()
+        for step in range(0, bar.maximum() + 1, max(1, bar.maximum() // 200)):
+            bar.setValue(step)
+            app.processEvents()
+        scroll_s = time.perf_counter() - t_scroll
+    probe.stop()
+    out = m.result()
+    out.update(probe.summary())
+    out["append_ms_per_row"] = round((m.wall - scroll_s) * 1000.0 / rows, 3)
+    out["scroll_s"] = round(scroll_s, 3)
+    win.close()
+    return out
+
+
+def thumbnails(args: argparse.Namespace) -> Metrics:
+    """Scrolls 10k rows that all have thumbnail URLs; only painted rows should ever be fetched."""
+    app = _qt_app()
+    from PySide6.QtCore import QStandardPaths
+
+    from app.ui.main_window import MainWindow
+
+    # Keep the user's thumbnail cache out of it
+    QStandardPaths.setTestModeEnabled(True)
+    rows = 1000 if args.quick else 10000
+    with ServerProcess(_server_config(args)) as srv:
+        win = MainWindow()
+        cache = win.thumbnails
+        shutil.rmtree(cache.store.root, ignore_errors=True)
+        win.resize(1000, 640)
+        win.show()
+        for i in range(rows):
+            job_id = win._append_task_row(f"{srv.base_url}/page/clip{i}-1000.html")
+            # As if extracted: DownloadTask sends the same URL in its metadata signal
+            cache.set_url(job_id, f"{srv.base_url}/thumb/clip{i}.png")
+        app.processEvents()
+        probe = UiLatencyProbe().start()
+        with Measurement() as m:
+            t_scroll = time.perf_counter()
+            bar = win.table.verticalScrollBar()
+            for step in range(0, bar.maximum() + 1, max(1, bar.maximum() // 200)):
+                bar.setValue(step)
+                app.processEvents()
+            scroll_s = time.perf_counter() - t_scroll
+            # Let the last screenful load: settle, repaint, fetch. Idle twice in a row means done
+            deadline = time.perf_counter() + 10.0
+            idle = 0
+            while idle < 2 and time.perf_counter() < deadline:
+                app.processEvents()
+                time.sleep(0.02)
+                idle = 0 if cache.busy else idle + 1
+        probe.stop()
+        fetched = len(list((cache.store.root / "original").glob("*")))
+        out = m.result()
+        out.update(probe.summary())
+        out["scroll_s"] = round(scroll_s, 3)
+        out["thumbs_fetched"] = fetched
+        out["fetched_pct"] = round(fetched * 100.0 / rows, 1)
+        out["thumb_cache_mb"] = round(cache.memory_bytes / (1024 * 1024), 2)
+        win.close()
+        shutil.rmtree(cache.store.root, ignore_errors=True)
+    return out
+
+
+def _cold_start(importtime: bool = False) -> Tuple[dict, str]:
+    env = dict(os.environ, IYTDLP_SPAWN_TIME=repr(time.time()))
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-m", "benchmarks.startup"]
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=env, timeout=60)
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        raise RuntimeError(f"startup probe failed ({proc.returncode}): {proc.stderr[-2000:]}")
+    return json.loads(lines[-1]), proc.stderr
+
+
+def startup(args: argparse.Namespace) -> Metrics:
+    """Cold starts the app to its first painted frame; fails over STARTUP_BUDGET_MS or on excluded imports."""
+    runs = 3 if args.quick else 10
+    # One extra run under -X importtime for the import breakdown; its timings are inflated, so not used
+    probe, trace = _cold_start(importtime=True)
+    imports = []
+    for line in trace.splitlines():
+        parts = line.split("|")
+        if line.startswith("import time:") and len(parts) == 3 and parts[0].split()[-1].isdigit():
+            imports.append((int(parts[0].split()[-1]), int(parts[1]), parts[2].strip()))
+    loaded = probe["modules"]
+    excluded = sorted(m for m in loaded if any(m == x or m.startswith(x + ".") for x in _COLD_START_EXCLUDED))
+    if excluded:
+        raise AssertionError(f"Loaded before the first frame: {', '.join(excluded)}")
+
+    shown, frames = [], []
+    for _ in range(runs):
+        result, _ = _cold_start()
+        shown.append(result["shown_ms"])
+        frames.append(result["first_frame_ms"])
+    first_frame = statistics.median(frames)
+    if min(frames) < 0 or first_frame > STARTUP_BUDGET_MS:
+        heaviest = sorted(imports, key=lambda i: i[0], reverse=True)[:5]
+        top = ", ".join(f"{name} {self_us / 1000:.1f}ms" for self_us, _cum, name in heaviest)
+        raise AssertionError(
+            f"First frame after {first_frame:.0f} ms, budget {STARTUP_BUDGET_MS:.0f} ms; heaviest imports: {top}"
+        )
+    return {
+        "first_frame_ms": round(first_frame, 1),
+        "first_frame_max_ms": round(max(frames), 1),
+        "shown_ms": round(statistics.median(shown), 1),
+        "import_ms": round(sum(self_us for self_us, _cum, _name in imports) / 1000.0, 1),
+        "modules_loaded": len(loaded),
+    }
+
+
+def soak(args: argparse.Namespace) -> Metrics:
+    """
+    Pushes 50k synthetic jobs through MainWindow in batches, clearing completed rows
+    between batches as a long session would, and fails if RSS keeps growing.
+    """
+    app = _qt_app()
+    import gc
+    import urllib.request
+    import weakref
+
+    from PySide6.QtCore import QEventLoop
+
+    from app.core import task as task_module
+    from app.ui.main_window import MainWindow
+
+    class SyntheticTask(task_module.DownloadTask):
+        # Same signals and lifecycle as a download, minus yt-dlp: one small GET to the local server
+        def __init__(self, *a, **kw) -> None:
+            super().__init__(*a, **kw)
+            alive.add(self)
+
+        def run(self) -> None:
+            self.signals.status.emit(self.job_id, "Starting…")
+            self.signals.metadata.emit(self.job_id, {"title": f"Soak clip {self.job_id}", "id": str(self.job_id)})
+            try:
+                with urllib.request.urlopen(self.url, timeout=30) as resp:
+                    total = int(resp.headers.get("Content-Length") or 0)
+                    done = 0
+                    while True:
+                        chunk = resp.read(16 * 1024)
+                        if not chunk:
+                            break
+                        done += len(chunk)
+                        self.signals.progress.emit(self.job_id, {
+                            "status": "downloading", "downloaded_bytes": done, "total_bytes": total,
+                            "speed": 1e6, "eta": 0,
+                        })
+                outcome = (self.signals.finished, {
+                    "url": self.url, "files": [str(self.outdir / f"soak-{self.job_id}.mp4")],
+                })
+            except OSError as e:
+                outcome = (self.signals.failed, str(e))
+            # Gives back the reservation MainWindow made from the estimate
+            self.budget.release(self.job_id)
+            signal, payload = outcome
+            signal.emit(self.job_id, payload)
+
+    class SyntheticEstimate(task_module.EstimateTask):
+        # Sizes the clip without extracting it, so jobs still go through the up-front reservation
+        def run(self) -> None:
+            self.signals.estimated.emit(self.job_id, {"size": 40000, "merge": False})
+
+    total = 5000 if args.quick else 50000
+    batch = 500 if args.quick else 2000
+    warmup = max(1, total // batch // 5)
+    win = MainWindow()
+    win.threadpool.setMaxThreadCount(args.concurrency)
+    win.show()
+    app.processEvents()
+    samples = []
+    alive: "weakref.WeakSet[SyntheticTask]" = weakref.WeakSet()
+    real_task, real_estimate = task_module.DownloadTask, task_module.EstimateTask
+    # MainWindow._start_job imports these per call
+    task_module.DownloadTask, task_module.EstimateTask = SyntheticTask, SyntheticEstimate
+    try:
+        with ServerProcess(_server_config(args)) as srv, Measurement() as m:
+            for first in range(0, total, batch):
+                job_ids = [
+                    win._append_task_row(f"{srv.base_url}/progressive/soak{i}-40000.mp4")
+                    for i in range(first, min(total, first + batch))
+                ]
+                for job_id in job_ids:
+                    win._start_job(job_id)
+                while win._tasks or win._estimating:
+                    app.processEvents(QEventLoop.AllEvents, 50)
+                    time.sleep(0.001)
+                win.on_clear_completed()
+                app.processEvents()
+                samples.append(current_rss())
+        win.threadpool.waitForDone()
+        app.processEvents()
+        gc.collect()
+    finally:
+        task_module.DownloadTask, task_module.EstimateTask = real_task, real_estimate
+    growth_mb = (samples[-1] - samples[warmup - 1]) / (1024 * 1024)
+    out = m.result()
+    out["jobs"] = total
+    out["jobs_per_s"] = round(total / m.wall, 1) if m.wall else 0.0
+    out["rss_warm_mb"] = round(samples[warmup - 1] / 1e6, 1)
+    out["rss_end_mb"] = round(samples[-1] / 1e6, 1)
+    out["rss_growth_mb"] = round(growth_mb, 2)
+    out["errors"] = win._counts["errors"]  # failed rows are not cleared, so this is the total
+    # Every task should be gone by now: nothing in MainWindow or the pool still references it
+    out["live_tasks"] = len(alive)
+    win.close()
+    if alive:
+        raise AssertionError(f"{len(alive)} finished tasks are still alive")
+    if growth_mb > SOAK_GROWTH_LIMIT_MB:
+        curve = ", ".join(f"{s / 1e6:.0f}" for s in samples)
+        raise AssertionError(f"RSS grew {growth_mb:.1f} MB after warm-up (limit {SOAK_GROWTH_LIMIT_MB} MB): {curve}")
+    return out
+
+
+def subscriptions(args: argparse.Namespace) -> Metrics:
+    """
+    Syncs 200 RSS subscriptions through SubscriptionSync twice: a baseline sync,
+    then one after each feed has published new items. Fails unless exactly the
+    new items are queued, oldest first, with one request per feed.
+    """
+    app = _qt_app()
+    import urllib.request
+
+    from PySide6.QtCore import QEventLoop
+
+    from app.core.subscriptions import SubscriptionStore
+    from app.ui.subscriptions import SubscriptionSync
+
+    feeds = 50 if args.quick else 200
+    published = 3
+
+    def server_requests(base: str) -> int:
+        with urllib.request.urlopen(f"{base}/stats") as resp:
+            return json.load(resp)["requests"]
+
+    tmp = Path(tempfile.mkdtemp(prefix="iytdlp-subs-"))
+    try:
+        with ServerProcess(_server_config(args)) as srv:
+            store = SubscriptionStore(tmp / "subscriptions.json")
+            for i in range(feeds):
+                store.add(f"{srv.base_url}/feed/ch{i}-30.rss")
+            sync = SubscriptionSync(store)
+            queued: List[dict] = []
+            failed: List[int] = []
+            sync.queued.connect(queued.extend)
+            sync.finished.connect(lambda _synced, n, _queued: failed.append(n))
+
+            def run() -> float:
+                loop = QEventLoop()
+                sync.finished.connect(loop.quit)
+                start = time.perf_counter()
+                sync.sync()
+                if sync.busy:
+                    loop.exec()
+                sync.finished.disconnect(loop.quit)
+                return time.perf_counter() - start
+
+            baseline_s = run()
+            if queued:
+                raise AssertionError(f"Baseline sync queued {len(queued)} entries; it should only record them")
+            urllib.request.urlopen(f"{srv.base_url}/publish/{published}").read()
+            before = server_requests(srv.base_url)
+            with Measurement() as m:
+                sync_s = run()
+            requests = server_requests(srv.base_url) - before
+            again_s = run()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if any(failed):
+        raise AssertionError(f"{sum(failed)} feed syncs failed")
+    if len(queued) != feeds * published:
+        raise AssertionError(f"Queued {len(queued)} entries, expected {feeds * published}")
+    first = [e["title"] for e in queued if e["title"].startswith("ch0 ")]
+    expected = [f"ch0 episode {30 + n}" for n in range(1, published + 1)]
+    if first != expected:
+        raise AssertionError(f"ch0 queued {first}, expected {expected}")
+    if requests != feeds:
+        raise AssertionError(f"Incremental sync made {requests} requests for {feeds} feeds")
+    out = m.result()
+    out["baseline_s"] = round(baseline_s, 3)
+    out["sync_s"] = round(sync_s, 3)
+    out["unchanged_s"] = round(again_s, 3)
+    out["feeds_per_s"] = round(feeds / sync_s, 1) if sync_s else 0.0
+    out["queued"] = len(queued)
+    app.processEvents()
+    return out
+
+
+def cluster(args: argparse.Namespace) -> Metrics:
+    """
+    Runs a coordinator with several local worker processes on this box. One lease is
+    taken and never renewed, and one worker is killed mid-download; both jobs must be
+    re-queued and finished elsewhere, and the stale lease's result must be rejected.
+    A wrong token and an outdir outside the workers' folder must be refused too.
+    """
+    import asyncio
+    import signal
+    import socket
+
+    from app.cluster.coordinator import Coordinator
+    from app.cluster.protocol import Connection, ProtocolError
+
+    workers = 3 if args.quick else 4
+    jobs = 12 if args.quick else 40
+    size = 4 * 1024 * 1024
+    lease_seconds = 2.0
+    # Throttled so downloads last long enough for a worker to die holding a lease
+    config = ServerConfig(args.latency, args.bandwidth or 4e6, args.error_rate, args.seed)
+
+    token = "bench"
+    coordinator = Coordinator(token, lease_seconds=lease_seconds, max_attempts=3)
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="coordinator", daemon=True).start()
+    port = asyncio.run_coroutine_threadsafe(coordinator.start("127.0.0.1", 0), loop).result()
+    address = f"127.0.0.1:{port}"
+
+    tmp = Path(tempfile.mkdtemp(prefix="iytdlp-cluster-"))
+    procs: List[subprocess.Popen] = []
+    intruder = Connection(address)
+    try:
+        intruder.request("hello", role="client", token="guess")
+        raise AssertionError("The coordinator accepted a wrong token")
+    except ProtocolError:
+        pass
+    finally:
+        intruder.close()
+    conn = Connection(address)
+    try:
+        conn.request("hello", role="client", token=token)
+        with ServerProcess(config) as srv:
+            urls = [f"{srv.base_url}/progressive/job{i}-{size}.mp4" for i in range(jobs)]
+            with Measurement() as m:
+                # Outdirs are relative to each worker's own --outdir; one job tries to escape it
+                conn.request("submit", urls=urls[:-1], options={"outdir": "batch"})
+                conn.request("submit", urls=urls[-1:], options={"outdir": str(tmp.parent)})
+                stalled = conn.request("lease", worker="stalled", wait=0)
+                procs = [
+                    subprocess.Popen(
+                        [
+                            sys.executable, "-m", "app.cluster", "worker",
+                            "--connect", address, "--token", token, "--outdir", str(tmp),
+                        ],
+                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                    )
+                    for _ in range(workers)
+                ]
+                # Workers name themselves host:pid
+                by_name = {f"{socket.gethostname()}:{p.pid}": p for p in procs}
+                killed = None
+                deadline = time.monotonic() + (120 if args.quick else 300)
+                while True:
+                    snapshot = {j["id"]: j for j in conn.request("snapshot")["jobs"]}
+                    if all(j["state"] in ("Completed", "Failed", "Cancelled") for j in snapshot.values()):
+                        break
+                    if time.monotonic() > deadline:
+                        raise AssertionError(f"Cluster did not drain: {sorted(j['state'] for j in snapshot.values())}")
+                    if killed is None:
+                        for job in snapshot.values():
+                            proc = by_name.get(job["worker"] or "")
+                            if proc is not None and job["state"] == "Leased" and job["progress"].get("status") == "downloading":
+                                proc.send_signal(signal.SIGKILL)
+                                killed = job["id"]
+                                break
+                    time.sleep(0.1)
+            try:
+                conn.request("complete", job_id=stalled["job"]["id"], lease=stalled["lease"])
+                stale_rejected = False
+            except ProtocolError:
+                stale_rejected = True
+    finally:
+        conn.close()
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.wait()
+        asyncio.run_coroutine_threadsafe(coordinator.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        files = sorted(tmp.rglob("*.mp4"))
+        batch = sorted((tmp / "batch").glob("*.mp4"))
+        escaped = sorted(tmp.parent.glob("job*.mp4"))
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    not_done = [j for j in snapshot.values() if j["state"] != "Completed"]
+    if not_done:
+        raise AssertionError(f"{len(not_done)} job(s) not completed: {not_done[0]}")
+    if killed is None:
+        raise AssertionError("No worker was caught mid-download; nothing was killed")
+    for job_id in (stalled["job"]["id"], killed):
+        job = snapshot[job_id]
+        if job["attempts"] < 2 or job["worker"] == "stalled":
+            raise AssertionError(f"Job {job_id} was not re-queued after its lease expired: {job}")
+    if not stale_rejected:
+        raise AssertionError("A result under an expired lease was accepted")
+    if len(files) != jobs:
+        raise AssertionError(f"{len(files)} files written for {jobs} jobs")
+    if escaped or len(batch) != jobs - 1:
+        raise AssertionError(f"Submitted outdirs not confined to the workers' folder: {escaped or len(batch)}")
+    finishers = {j["worker"] for j in snapshot.values()}
+    if len(finishers) < 2:
+        raise AssertionError(f"All jobs ran on {finishers}; leases were not spread across workers")
+    out = m.result(jobs * size)
+    out["jobs_per_s"] = round(jobs / m.wall, 2) if m.wall else 0.0
+    out["requeued"] = sum(1 for j in snapshot.values() if j["attempts"] > 1)
+    return out
+
+
+def progress_storm(args: argparse.Namespace) -> Metrics:
+    """Worker threads flood MainWindow with progress signals, like many fast downloads."""
+    app = _qt_app()
+    from PySide6.QtCore import QObject, Slot
+
+    from app.core.task import TaskSignals
+    from app.ui.main_window import MainWindow
+
+    rows = 50 if args.quick else 200
+    emitters = args.concurrency
+    duration = 2.0 if args.quick else 10.0
+    win = MainWindow()
+    win.show()
+    job_ids = [win._append_task_row(f"https://example.invalid/watch?v={i:011d}") for i in range(rows)]
+    signals = [TaskSignals() for _ in range(emitters)]
+
+    class Relay(QObject):
+        # Lives on the UI thread, so emissions from workers are queued like DownloadTask's
+        def __init__(self) -> None:
+            super().__init__()
+            self.handled = 0
+
+        @Slot(int, dict)
+        def on_progress(self, job_id: int, d: dict) -> None:
+            self.handled += 1
+            win._on_task_progress(job_id, d)
+
+    relay = Relay()
+    for s in signals:
+        s.progress.connect(relay.on_progress)
+    app.processEvents()
+
+    stop = threading.Event()
+    emitted = [0] * emitters
+
+    rate = 2000.0  # signals/s per emitter, roughly yt-dlp's hook rate on a fast link
+
+    def emit(idx: int) -> None:
+        total = 100 * 1024 * 1024
+        n = 0
+        t0 = time.perf_counter()
+        while not stop.is_set():
+            job_id = job_ids[(idx + n * emitters) % rows]
+            signals[idx].progress.emit(job_id, {
+                "status": "downloading",
+                "downloaded_bytes": (n * 4096) % total,
+                "total_bytes": total,
+                "speed": 5e6,
+                "eta": 10,
+            })
+            n += 1
+            if n % 64 == 0:
+                ahead = n / rate - (time.perf_counter() - t0)
+                time.sleep(max(0.0, ahead))
+        emitted[idx] = n
+
+    probe = UiLatencyProbe().start()
+    with Measurement() as m:
+        threads = [threading.Thread(target=emit, args=(i,), daemon=True) for i in range(emitters)]
+        for t in threads:
+            t.start()
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            app.processEvents()
+        stop.set()
+        for t in threads:
+            t.join()
+        t_drain = time.perf_counter()
+        while relay.handled < sum(emitted):
+            app.processEvents()
+        drain_s = time.perf_counter() - t_drain
+    probe.stop()
+    out = m.result()
+    out.update(probe.summary())
+    out["signals_emitted"] = sum(emitted)
+    out["signals_per_s"] = round(sum(emitted) / m.wall, 1) if m.wall else 0.0
+    out["drain_s"] = round(drain_s, 3)
+    win.close()
+    return out
+
+
+SCENARIOS: Dict[str, Tuple[Callable[[argparse.Namespace], Metrics], str]] = {
+    "many_small": (many_small, "Many 256 KB progressive files"),
+    "few_huge": (few_huge, "Three large progressive files"),
+    "hls": (hls, "HLS streams (master + media playlists)"),
+    "dash": (dash, "DASH streams (SegmentList MPD)"),
+    "format_plan": (format_plan, "Format planner on recorded format lists"),
+    "search": (search, "Search index queries at 100k+ jobs"),
+    "ui_load": (ui_load, "Queue 10k rows into MainWindow and scroll"),
+    "progress_storm": (progress_storm, "Progress signal flood into MainWindow"),
+    "thumbnails": (thumbnails, "Scroll 10k rows with thumbnails"),
+    "startup": (startup, "Cold start to first frame, import-time budget"),
+    "subscriptions": (subscriptions, "Incremental sync of 200 feed subscriptions"),
+    "soak": (soak, "50k synthetic jobs through MainWindow, RSS must stay flat"),
+    "cluster": (cluster, "Coordinator with local workers; expired leases are re-queued"),
+}
+
+
+def _server_config(args: argparse.Namespace) -> ServerConfig:
+    return ServerConfig(args.latency, args.bandwidth, args.error_rate, args.seed)
+
+
+def add_common_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--quick", action="store_true", help="Smaller workloads for CI")
+    parser.add_argument("--concurrency", type=int, default=5, help="Thread pool size (app default is 5)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Server latency per response, seconds")
+    parser.add_argument("--bandwidth", type=float, default=0.0, help="Server bytes/s per connection")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Server 503 probability")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def main(argv=None) -> int:
+    # Entry point for a single scenario in a fresh process; prints one JSON line
+    parser = argparse.ArgumentParser()
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    add_common_args(parser)
+    args = parser.parse_args(argv)
+    func, _ = SCENARIOS[args.scenario]
+    print(json.dumps(func(args)), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    # Skip interpreter finalisation: tearing down live Qt objects at exit can
+    # abort inside PySide and would turn a finished run into a failure
+    code = main()
+    sys.stderr.flush()
+    os._exit(code)
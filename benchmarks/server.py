@@ -0,0 +1,366 @@
+from __future__ import annotations
+
+import argparse
+import functools
+import hashlib
+import json
+import multiprocessing
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Local stand-in for a media host. Everything is synthesised from the URL so
+# runs are reproducible and nothing is stored on disk:
+#   /progressive/<name>-<bytes>.mp4
+#   /hls/<name>-<segments>x<bytes>.m3u8        master playlist (720p variant)
+#   /hls/<name>-<segments>x<bytes>/media.m3u8  media playlist
+#   /hls/<name>-<segments>x<bytes>/<i>.ts
+#   /dash/<name>-<segments>x<bytes>.mpd         single muxed 720p representation
+#   /dash/<name>-<segments>x<bytes>/<i>.m4s
+#   /page/<name>-<bytes>.html                   page embedding the progressive file, og:image thumbnail
+#   /thumb/<name>.png                           640x360 thumbnail
+#   /feed/<name>-<items>.rss                    RSS feed of pages, newest first
+#   /publish/<count>                            adds <count> new items to the top of every feed
+#   /stats                                      requests served so far (JSON)
+# Media bytes are filler; yt-dlp's generic extractor only inspects headers and
+# manifests, and without ffmpeg no fixups are run on the result.
+
+_BLOCK = 64 * 1024
+_WRITE_CHUNK = 16 * 1024
+_SEGMENT_SECONDS = 4
+
+_PROGRESSIVE_RE = re.compile(r"^/progressive/(?P<name>[\w.-]+?)-(?P<size>\d+)\.mp4$")
+_STREAM_RE = re.compile(
+    r"^/(?P<kind>hls|dash)/(?P<name>[\w.-]+?)-(?P<count>\d+)x(?P<size>\d+)"
+    r"(?:\.(?P<manifest>m3u8|mpd)|/(?P<part>media\.m3u8|\d+\.(?:ts|m4s)))$"
+)
+_PAGE_RE = re.compile(r"^/page/(?P<name>[\w.-]+?)-(?P<size>\d+)\.html$")
+_THUMB_RE = re.compile(r"^/thumb/(?P<name>[\w.-]+)\.png$")
+_FEED_RE = re.compile(r"^/feed/(?P<name>[\w.-]+?)-(?P<items>\d+)\.rss$")
+_PUBLISH_RE = re.compile(r"^/publish/(?P<count>\d+)$")
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class ServerConfig:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        bandwidth: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.latency = latency        # seconds added before every response
+        self.bandwidth = bandwidth    # bytes/s per connection, 0 = unlimited
+        self.error_rate = error_rate  # probability of answering 503
+        self.seed = seed
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "latency": self.latency,
+            "bandwidth": self.bandwidth,
+            "error_rate": self.error_rate,
+            "seed": self.seed,
+        }
+
+
+def _block_for(name: str) -> bytes:
+    seed = hashlib.sha256(name.encode("utf-8")).digest()
+    return (seed * (_BLOCK // len(seed) + 1))[:_BLOCK]
+
+
+def _hls_master(base: str) -> str:
+    return (
+        "#EXTM3U\n"
+        '#EXT-X-STREAM-INF:BANDWIDTH=2500000,RESOLUTION=1280x720,CODECS="avc1.4d401f,mp4a.40.2"\n'
+        f"{base}/media.m3u8\n"
+    )
+
+
+def _hls_media(count: int) -> str:
+    lines = [
+        "#EXTM3U",
+        "#EXT-X-VERSION:3",
+        f"#EXT-X-TARGETDURATION:{_SEGMENT_SECONDS}",
+        "#EXT-X-MEDIA-SEQUENCE:0",
+        "#EXT-X-PLAYLIST-TYPE:VOD",
+    ]
+    for i in range(count):
+        lines.append(f"#EXTINF:{_SEGMENT_SECONDS}.0,")
+        lines.append(f"{i}.ts")
+    lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines) + "\n"
+
+
+def _dash_mpd(base: str, count: int) -> str:
+    duration = count * _SEGMENT_SECONDS
+    segments = "\n".join(f'          <SegmentURL media="{base}/{i}.m4s"/>' for i in range(count))
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static" mediaPresentationDuration="PT{duration}S" minBufferTime="PT2S" profiles="urn:mpeg:dash:profile:isoff-on-demand:2011">
+  <Period>
+    <AdaptationSet mimeType="video/mp4" segmentAlignment="true">
+      <Representation id="720p" bandwidth="2500000" width="1280" height="720" codecs="avc1.4d401f,mp4a.40.2">
+        <SegmentList timescale="1" duration="{_SEGMENT_SECONDS}">
+          <Initialization sourceURL="{base}/init.m4s"/>
+{segments}
+        </SegmentList>
+      </Representation>
+    </AdaptationSet>
+  </Period>
+</MPD>
+"""
+
+
+def _page(host: str, name: str, size: int) -> str:
+    return f"""<!DOCTYPE html>
+<html><head>
+<title>{name}</title>
+<meta property="og:title" content="{name}">
+<meta property="og:image" content="http://{host}/thumb/{name}.png">
+</head><body>
+<video src="/progressive/{name}-{size}.mp4" type="video/mp4"></video>
+</body></html>
+"""
+
+
+def _feed(host: str, name: str, items: int, published: int) -> str:
+    # Newest item first, as channel feeds list them; numbering continues as items are published
+    newest = items + published
+    entries = "\n".join(
+        f"""<item>
+<title>{name} episode {i}</title>
+<link>http://{host}/page/{name}-e{i}-4096.html</link>
+<guid isPermaLink="false">{name}-e{i}</guid>
+</item>"""
+        for i in range(newest, newest - items, -1)
+    )
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel>
+<title>{name}</title>
+<link>http://{host}/feed/{name}-{items}.rss</link>
+{entries}
+</channel></rss>
+"""
+
+
+@functools.lru_cache(maxsize=64)
+def _thumbnail_png(name: str, width: int = 640, height: int = 360) -> bytes:
+    # Solid colour picked from the name; filter byte 0 per scanline
+    color = hashlib.sha256(name.encode("utf-8")).digest()[:3]
+    raw = (b"\x00" + color * width) * height
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "FakeMedia/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002 - stdlib signature
+        pass
+
+    def do_HEAD(self) -> None:
+        self._serve(head=True)
+
+    def do_GET(self) -> None:
+        self._serve(head=False)
+
+    def _serve(self, head: bool) -> None:
+        cfg: ServerConfig = self.server.config  # type: ignore[attr-defined]
+        if urlsplit(self.path).path == "/stats":
+            # Not delayed, failed or counted itself
+            body = json.dumps({"requests": self.server.hits}).encode()  # type: ignore[attr-defined]
+            self._send_bytes(200, "application/json", body, head)
+            return
+        self.server.count_hit()  # type: ignore[attr-defined]
+        if cfg.latency:
+            time.sleep(cfg.latency)
+        if cfg.error_rate and self.server.should_fail():  # type: ignore[attr-defined]
+            self._send_bytes(503, "text/plain", b"injected error", head)
+            return
+
+        path = urlsplit(self.path).path
+        m = _PROGRESSIVE_RE.match(path)
+        if m:
+            self._send_payload(m.group("name"), int(m.group("size")), "video/mp4", head)
+            return
+        m = _PAGE_RE.match(path)
+        if m:
+            self._send_bytes(200, "text/html", _page(self.headers.get("Host", ""), m.group("name"), int(m.group("size"))).encode(), head)
+            return
+        m = _THUMB_RE.match(path)
+        if m:
+            self._send_bytes(200, "image/png", _thumbnail_png(m.group("name")), head)
+            return
+        m = _FEED_RE.match(path)
+        if m:
+            feed = _feed(self.headers.get("Host", ""), m.group("name"), int(m.group("items")), self.server.published)  # type: ignore[attr-defined]
+            self._send_bytes(200, "application/rss+xml", feed.encode(), head)
+            return
+        m = _PUBLISH_RE.match(path)
+        if m:
+            self.server.published += int(m.group("count"))  # type: ignore[attr-defined]
+            self._send_bytes(200, "text/plain", str(self.server.published).encode(), head)  # type: ignore[attr-defined]
+            return
+        m = _STREAM_RE.match(path)
+        if m:
+            kind, name = m.group("kind"), m.group("name")
+            count, size = int(m.group("count")), int(m.group("size"))
+            base = f"/{kind}/{name}-{count}x{size}"
+            manifest, part = m.group("manifest"), m.group("part")
+            if manifest == "m3u8":
+                self._send_bytes(200, "application/vnd.apple.mpegurl", _hls_master(base).encode(), head)
+            elif manifest == "mpd":
+                self._send_bytes(200, "application/dash+xml", _dash_mpd(base, count).encode(), head)
+            elif part == "media.m3u8":
+                self._send_bytes(200, "application/vnd.apple.mpegurl", _hls_media(count).encode(), head)
+            else:
+                ctype = "video/mp2t" if part.endswith(".ts") else "video/iso.segment"
+                self._send_payload(f"{name}/{part}", size, ctype, head)
+            return
+        if path.endswith("/init.m4s"):
+            self._send_payload(path, 1024, "video/mp4", head)
+            return
+        self._send_bytes(404, "text/plain", b"not found", head)
+
+    def _send_bytes(self, code: int, ctype: str, body: bytes, head: bool) -> None:
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self._write(body)
+
+    def _send_payload(self, name: str, size: int, ctype: str, head: bool) -> None:
+        start, end = 0, size - 1
+        m = _RANGE_RE.match(self.headers.get("Range") or "")
+        code = 200
+        if m and (m.group(1) or m.group(2)):
+            if m.group(1):
+                start = int(m.group(1))
+                end = min(int(m.group(2)), size - 1) if m.group(2) else size - 1
+            else:
+                start = max(0, size - int(m.group(2)))
+            if start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            code = 206
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        if code == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if head:
+            return
+        block = _block_for(name)
+        pos = start
+        while pos <= end:
+            offset = pos % _BLOCK
+            n = min(_WRITE_CHUNK, _BLOCK - offset, end - pos + 1)
+            if not self._write(block[offset:offset + n]):
+                return
+            pos += n
+
+    def _write(self, data: bytes) -> bool:
+        cfg: ServerConfig = self.server.config  # type: ignore[attr-defined]
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            return False
+        if cfg.bandwidth:
+            # Per-connection throttle: each handler thread sleeps for its own share
+            time.sleep(len(data) / cfg.bandwidth)
+        return True
+
+
+class FakeMediaServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    # The default backlog of 5 drops connects under concurrent clients, costing a 1 s SYN retry
+    request_queue_size = 128
+
+    def __init__(self, config: ServerConfig, host: str = "127.0.0.1", port: int = 0) -> None:
+        super().__init__((host, port), _Handler)
+        self.config = config
+        self._rng = random.Random(config.seed)
+        self._rng_lock = threading.Lock()
+        self.published = 0  # items added to every feed via /publish
+        self.hits = 0
+        self._hits_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_hit(self) -> None:
+        with self._hits_lock:
+            self.hits += 1
+
+    def should_fail(self) -> bool:
+        with self._rng_lock:
+            return self._rng.random() < self.config.error_rate
+
+
+def _serve_child(config: ServerConfig, conn) -> None:
+    server = FakeMediaServer(config)
+    conn.send(server.base_url)
+    conn.close()
+    server.serve_forever()
+
+
+class ServerProcess:
+    """Runs the server in its own process so its CPU is not billed to the client."""
+
+    def __init__(self, config: Optional[ServerConfig] = None) -> None:
+        self.config = config or ServerConfig()
+        self.base_url = ""
+        self._proc: Optional[multiprocessing.Process] = None
+
+    def __enter__(self) -> "ServerProcess":
+        parent, child = multiprocessing.Pipe(duplex=False)
+        self._proc = multiprocessing.Process(target=_serve_child, args=(self.config, child), daemon=True)
+        self._proc.start()
+        self.base_url = parent.recv()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._proc is not None:
+            self._proc.terminate()
+            self._proc.join(5)
+
+
+def parse_args(argv=None) -> Tuple[argparse.Namespace, ServerConfig]:
+    parser = argparse.ArgumentParser(description="Fake media server for iYTDLP benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per response")
+    parser.add_argument("--bandwidth", type=float, default=0.0, help="Bytes/s per connection (0 = unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of a 503")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    return args, ServerConfig(args.latency, args.bandwidth, args.error_rate, args.seed)
+
+
+if __name__ == "__main__":
+    args, config = parse_args()
+    srv = FakeMediaServer(config, args.host, args.port)
+    print(f"Serving fake media on {srv.base_url}")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
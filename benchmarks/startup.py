@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# Cold-start probe, run in a fresh interpreter by the "startup" scenario.
+# Launches the app the way app.main does and prints one JSON line with the
+# wall time from process spawn (IYTDLP_SPAWN_TIME, set by the parent) to the
+# window being shown and to its first painted frame, plus every module loaded
+# by then.
+
+_TIMEOUT_MS = 20_000
+
+
+def main() -> int:
+    spawned = float(os.environ.get("IYTDLP_SPAWN_TIME") or time.time())
+    from app.main import launch
+
+    app, win = launch([sys.argv[0]])
+    shown = time.time()
+    frame = []
+
+    def on_started() -> None:
+        frame.append(time.time())
+        app.quit()
+
+    from PySide6.QtCore import QTimer
+
+    win.started.connect(on_started)
+    QTimer.singleShot(_TIMEOUT_MS, app.quit)
+    app.exec()
+    modules = sorted(sys.modules)
+    # Only now: the probe's own imports must not show up in the module list
+    import json
+
+    print(json.dumps({
+        "shown_ms": round((shown - spawned) * 1000.0, 1),
+        "first_frame_ms": round((frame[0] - spawned) * 1000.0, 1) if frame else -1.0,
+        "modules": modules,
+    }), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    # Same reason as benchmarks.scenarios: skip tearing down live Qt objects
+    code = main()
+    sys.stderr.flush()
+    os._exit(code)
@@ -0,0 +1 @@
+# Unit tests for iYTDLP (python -m pytest)
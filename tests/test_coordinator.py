@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.cluster.coordinator import CANCELLED, COMPLETED, QUEUED, Coordinator
+from app.cluster.protocol import Connection, ProtocolError
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def started(**kwargs) -> Coordinator:
+    coordinator = Coordinator("secret", **kwargs)
+    await coordinator.start("127.0.0.1", 0)
+    return coordinator
+
+
+def test_token_is_required():
+    with pytest.raises(ValueError):
+        Coordinator("")
+
+
+def test_connections_must_say_hello_with_the_token():
+    async def main():
+        coordinator = await started()
+        port = coordinator._server.sockets[0].getsockname()[1]
+
+        def client(first_op, **fields):
+            conn = Connection(f"127.0.0.1:{port}")
+            try:
+                conn.request(first_op, **fields)
+                return conn.request("snapshot")["jobs"]
+            finally:
+                conn.close()
+
+        try:
+            for op, fields in [("snapshot", {}), ("hello", {"token": "guess"}), ("hello", {})]:
+                with pytest.raises((ProtocolError, ConnectionError)):
+                    await asyncio.to_thread(client, op, **fields)
+            assert await asyncio.to_thread(client, "hello", token="secret") == []
+        finally:
+            await coordinator.close()
+
+    run(main())
+
+
+def test_finished_jobs_are_pruned_oldest_first():
+    async def main():
+        coordinator = await started(keep_finished=3)
+        try:
+            ids = await coordinator.submit([f"https://example.com/{i}" for i in range(6)], {})
+            for _ in range(5):
+                job = await coordinator.lease("w", 0)
+                coordinator.finish({"job_id": job.id, "lease": job.lease}, COMPLETED)
+            assert list(coordinator._jobs) == ids[2:]
+            await coordinator.cancel(ids[5])
+            assert list(coordinator._jobs) == ids[3:]
+            assert coordinator._jobs[ids[5]].state == CANCELLED
+            assert not coordinator._queue
+            with pytest.raises(ProtocolError):
+                coordinator.finish({"job_id": ids[0], "lease": 1}, COMPLETED)
+        finally:
+            await coordinator.close()
+
+    run(main())
+
+
+def test_reaper_only_tracks_leased_jobs():
+    async def main():
+        coordinator = await started(lease_seconds=0.2)
+        try:
+            first, second = await coordinator.submit(["https://example.com/a", "https://example.com/b"], {})
+            job = await coordinator.lease("w", 0)
+            assert list(coordinator._leased_jobs) == [first]
+            await asyncio.sleep(0.5)
+            # Expired: back at the front of the queue and no longer leased
+            assert not coordinator._leased_jobs
+            assert job.state == QUEUED and job.attempts == 1
+            again = await coordinator.lease("w2", 0)
+            assert again.id == first and again.attempts == 2
+            coordinator.finish({"job_id": first, "lease": again.lease}, COMPLETED)
+            assert not coordinator._leased_jobs
+        finally:
+            await coordinator.close()
+
+    run(main())
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from app.core.formats import (
+    _COPY_COST,
+    _REENCODE_COST,
+    _REQUEST_COST,
+    conversion_postprocessors,
+    plan_formats,
+    plan_selector,
+)
+
+# Recorded format lists and their expected plans, shared with the format_plan benchmark
+DATA = json.loads((Path(__file__).resolve().parent.parent / "benchmarks" / "data" / "formats.json").read_text())
+MB = 1_000_000
+
+
+def fmt(format_id: str, ext: str = "mp4", vcodec: str = "avc1", acodec: str = "mp4a.40.2", **extra) -> dict:
+    return {"format_id": format_id, "ext": ext, "vcodec": vcodec, "acodec": acodec, "protocol": "https", **extra}
+
+
+def video(format_id: str, height: int, size: int, ext: str = "mp4", vcodec: str = "avc1", **extra) -> dict:
+    return fmt(format_id, ext, vcodec, "none", height=height, filesize=size, **extra)
+
+
+def audio(format_id: str, size: int, ext: str = "m4a", acodec: str = "mp4a.40.2", abr: int = 128) -> dict:
+    return fmt(format_id, ext, "none", acodec, abr=abr, filesize=size)
+
+
+def select(formats, label="720p", container="Auto", has_ffmpeg=True):
+    plans = []
+    selected = list(plan_selector(label, container, has_ffmpeg, plans.append)({"formats": formats}))
+    return selected, plans
+
+
+@pytest.mark.parametrize(
+    "case", DATA["cases"], ids=lambda c: f"{c['formats']}-{c['label']}-{c['container']}-{c['ffmpeg']}"
+)
+def test_recorded_plans(case):
+    plan = plan_formats(DATA["formats"][case["formats"]], case["label"], case["container"], case["ffmpeg"], DATA["duration"])
+    assert (plan.format_id if plan else None) == case["plan"]
+
+
+# Cost terms
+def test_cost_counts_bytes_and_requests():
+    plan = plan_formats([fmt("a", height=720, filesize=10 * MB, fragments=[{}] * 4)], "720p")
+    assert plan.size == 10 * MB
+    assert plan.requests == 4
+    assert plan.cost == 10 * MB + 4 * _REQUEST_COST
+
+
+def test_hls_requests_follow_duration():
+    hls = fmt("hls", height=720, tbr=1000, protocol="m3u8_native")
+    plan = plan_formats([hls], "720p", duration=60)
+    assert plan.requests == 10  # 6 s segments
+    assert plan.size == 1000 * 1000 // 8 * 60
+
+
+def test_many_requests_lose_to_one_slightly_larger_file():
+    segmented = fmt("hls", height=720, filesize=100 * MB, fragments=[{}] * 200)
+    progressive = fmt("http", height=720, filesize=110 * MB)
+    assert plan_formats([segmented, progressive], "720p").format_id == "http"
+
+
+def test_merge_pays_copy_cost():
+    muxed = fmt("muxed", height=720, filesize=110 * MB)
+    pair = [video("v", 720, 95 * MB), audio("a", 5 * MB)]
+    plan = plan_formats(pair, "720p")
+    assert plan.merge and plan.ext == "mp4"
+    assert plan.cost == 100 * MB * (1 + _COPY_COST) + 2 * _REQUEST_COST
+    assert plan_formats([muxed, *pair], "720p").format_id == "muxed"
+
+
+def test_remux_is_cheaper_than_reencode():
+    webm = fmt("webm", "webm", "vp9", "opus", height=720, filesize=100 * MB)
+    flv = fmt("flv", "flv", "h264", "aac", height=720, filesize=60 * MB)
+    assert plan_formats([webm], "720p", "MP4").conversion == "remux"
+    reencode = plan_formats([flv], "720p", "MP4")
+    assert reencode.conversion == "re-encode"
+    assert reencode.cost == 60 * MB * (1 + _REENCODE_COST) + _REQUEST_COST
+    assert plan_formats([webm, flv], "720p", "MP4").format_id == "webm"
+
+
+def test_height_is_capped_and_lowered_only_when_needed():
+    formats = [fmt("1080", height=1080, filesize=MB), fmt("720", height=720, filesize=5 * MB)]
+    assert plan_formats(formats, "720p").format_id == "720"
+    assert plan_formats(formats, "1080p").format_id == "1080"
+    assert plan_formats(formats, "2160p").format_id == "1080"
+
+
+def test_auto_prefers_native_pairing_over_mkv():
+    formats = [
+        video("vp9", 720, 60 * MB, "webm", "vp9"),
+        video("avc", 720, 90 * MB),
+        audio("aac", 5 * MB),
+    ]
+    plan = plan_formats(formats, "720p", "Auto")
+    assert (plan.format_id, plan.ext) == ("avc+aac", "mp4")
+
+
+def test_auto_uses_mkv_when_nothing_pairs_natively():
+    plan = plan_formats([video("vp9", 720, 60 * MB, "webm", "vp9"), audio("aac", 5 * MB)], "720p", "Auto")
+    assert (plan.format_id, plan.ext) == ("vp9+aac", "mkv")
+
+
+# No ffmpeg
+def test_no_ffmpeg_skips_merges_and_ffmpeg_protocols():
+    formats = [
+        video("v", 1080, 50 * MB),
+        audio("a", 5 * MB),
+        fmt("hls", height=720, tbr=1000, protocol="m3u8"),
+        fmt("low", height=360, filesize=20 * MB),
+    ]
+    assert plan_formats(formats, "1080p", has_ffmpeg=True).format_id == "v+a"
+    assert plan_formats(formats, "1080p", has_ffmpeg=False).format_id == "low"
+
+
+def test_no_ffmpeg_keeps_file_in_other_container():
+    plan = plan_formats([fmt("webm", "webm", "vp9", "opus", height=720, filesize=MB)], "720p", "MP4", has_ffmpeg=False)
+    assert plan.format_id == "webm"
+    assert plan.conversion is None
+
+
+def test_no_ffmpeg_separate_streams_fall_back_to_unmerged_pair():
+    formats = [video("v", 720, 50 * MB), audio("a", 5 * MB)]
+    assert plan_formats(formats, "720p", has_ffmpeg=False) is None
+    selected, plans = select(formats, has_ffmpeg=False)
+    assert [f["format_id"] for f in selected] == ["v+a"]
+    assert "no ffmpeg" in plans[0].describe()
+
+
+# No audio
+def test_video_without_any_audio_is_still_downloaded():
+    formats = [video("v720", 720, 50 * MB), video("v480", 480, 30 * MB)]
+    plan = plan_formats(formats, "720p")
+    assert plan.format_id == "v720"
+    assert not plan.merge
+
+
+def test_audio_only_without_audio_selects_nothing():
+    assert plan_formats([video("v", 720, MB)], "Audio only") is None
+    assert select([video("v", 720, MB)], "Audio only") == ([], [])
+
+
+def test_audio_only_falls_back_to_muxed_without_conversion():
+    muxed = [fmt("small", height=480, abr=128, filesize=50 * MB), fmt("big", height=720, abr=128, filesize=90 * MB)]
+    plan = plan_formats(muxed, "Audio only", "WEBM")
+    assert plan.format_id == "small"
+    assert plan.conversion is None
+    assert conversion_postprocessors("Audio only", "WEBM") == []
+
+
+def test_mp3_reencode_is_charged_for_audio_only():
+    muxed = fmt("muxed", height=720, abr=128, filesize=90 * MB)
+    plan = plan_formats([muxed], "Audio only", "MP3", duration=600)
+    assert plan.conversion == "re-encode"
+    assert plan.cost == 90 * MB + _REQUEST_COST + 128 * 1000 // 8 * 600 * _REENCODE_COST
+
+
+# Container mismatch
+def test_container_that_fits_no_pair_is_dropped_by_selector():
+    formats = [video("v", 720, 50 * MB), audio("a", 5 * MB)]
+    assert plan_formats(formats, "720p", "WEBM") is None
+    selected, plans = select(formats, container="WEBM")
+    assert selected[0]["format_id"] == "v+a"
+    assert plans[0].ext == "mp4"
+    # FFmpegVideoConvertor still turns the merged mp4 into webm; the plan says so
+    assert plans[0].conversion == "re-encode"
+    assert "re-encode" in plans[0].describe()
+    assert plans[0].cost == plan_formats(formats, "720p", "Auto").cost + 55 * MB * _REENCODE_COST
+
+
+def test_dropped_container_without_conversion_postprocessors():
+    formats = [video("v", 720, 50 * MB), audio("a", 5 * MB)]
+    # Without ffmpeg nothing is converted (or merged)
+    _, plans = select(formats, container="WEBM", has_ffmpeg=False)
+    assert (plans[0].conversion, plans[0].note) == (None, "no ffmpeg, not merged")
+
+
+def test_audio_matching_container_is_preferred():
+    formats = [video("v", 720, 50 * MB, "webm", "vp9"), audio("aac", 5 * MB), audio("opus", 5 * MB, "webm", "opus")]
+    assert plan_formats(formats, "720p", "WEBM").format_id == "v+opus"
+    assert plan_formats(formats, "Audio only", "WEBM").format_id == "opus"
+    assert plan_formats(formats, "Audio only", "MP4").format_id == "aac"
+
+
+def test_remux_needs_codecs_the_target_accepts():
+    theora = fmt("ogv", "mkv", "theora", "vorbis", height=720, filesize=MB)
+    assert plan_formats([theora], "720p", "MP4") is None
+
+
+# Empty and unusable lists
+@pytest.mark.parametrize("formats", [
+    [],
+    [{"format_id": "sb0", "ext": "mhtml", "vcodec": "none", "acodec": "none"}],
+    [fmt("drm", height=720, filesize=MB, has_drm=True)],
+])
+def test_nothing_usable(formats):
+    assert plan_formats(formats, "720p") is None
+    assert select(formats) == ([], [])
+
+
+# Selector
+def test_selector_plans_each_format_list_once():
+    formats = [video("v", 720, 50 * MB), audio("a", 5 * MB)]
+    plans = []
+    selector = plan_selector("720p", "Auto", True, plans.append)
+    first = list(selector({"formats": formats}))
+    # yt-dlp selects again when an extracted video is processed for download
+    again = list(selector({"formats": [dict(f) for f in formats]}))
+    assert len(plans) == 1
+    assert first[0]["format_id"] == again[0]["format_id"] == "v+a"
+    assert again[0]["requested_formats"][0] is not formats[0]
+
+
+def test_merged_format_dict():
+    selected, _ = select([video("v", 720, 50 * MB, width=1280), audio("a", 5 * MB)])
+    merged = selected[0]
+    assert merged["ext"] == "mp4"
+    assert merged["filesize_approx"] == 55 * MB
+    assert (merged["height"], merged["width"], merged["acodec"]) == (720, 1280, "mp4a.40.2")
+    assert [f["format_id"] for f in merged["requested_formats"]] == ["v", "a"]
+
+
+def test_describe_shows_size_only_when_reported():
+    assert "~" in plan_formats([fmt("a", height=720, filesize=MB)], "720p").describe()
+    assert "~" not in plan_formats([fmt("a", height=720, tbr=1000)], "720p").describe()
+
+
+def test_conversion_postprocessors():
+    assert conversion_postprocessors("720p", "Auto") == []
+    keys = [pp["key"] for pp in conversion_postprocessors("720p", "MP4")]
+    assert keys == ["FFmpegVideoRemuxer", "FFmpegVideoConvertor"]
+    assert [pp["key"] for pp in conversion_postprocessors("720p", "WEBM")] == ["FFmpegVideoConvertor"]
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import os
+import random
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QtMsgType, Qt, qInstallMessageHandler  # noqa: E402
+from PySide6.QtTest import QAbstractItemModelTester  # noqa: E402
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+from app.ui.job_model import JOB_ID_ROLE, JobFilterProxyModel, JobModel  # noqa: E402
+
+
+@pytest.fixture(scope="module", autouse=True)
+def qapp():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def qt_warnings():
+    # QAbstractItemModelTester reports broken model contracts as Qt warnings
+    messages = []
+
+    def handler(mode, _context, message):
+        if mode != QtMsgType.QtDebugMsg:
+            messages.append(message)
+
+    previous = qInstallMessageHandler(handler)
+    yield messages
+    qInstallMessageHandler(previous)
+
+
+def make_model(ids):
+    model = JobModel(["Title", "Status"])
+    for job_id in ids:
+        model.append_job(job_id, [f"job {job_id}", "Queued"])
+    return model
+
+
+def check_index(model):
+    # row_of must agree with the id stored on each row, and know nothing else
+    stored = [model.item(r, 0).data(JOB_ID_ROLE) for r in range(model.rowCount())]
+    assert model.job_ids() == stored
+    for row, job_id in enumerate(stored):
+        assert model.row_of(job_id) == row
+        assert model.job_item(job_id, 0).text() == f"job {job_id}"
+    assert len(model._rows) == len(stored)
+
+
+def check_proxy(proxy, model, matches):
+    expected = [r for r in range(model.rowCount()) if matches is None or model.job_id_at(r) in matches]
+    assert proxy.rowCount() == len(expected)
+    for pos, row in enumerate(expected):
+        assert proxy.mapToSource(proxy.index(pos, 0)).row() == row
+        assert proxy.mapFromSource(model.index(row, 1)).row() == pos
+        assert proxy.index(pos, 0).data() == model.item(row, 0).text()
+
+
+# JobModel
+def test_appends_are_indexed_directly():
+    model = make_model(range(5))
+    assert model._stale_from is None
+    check_index(model)
+    assert model.row_of(99) is None
+    assert not model.has_job(99)
+
+
+def test_bulk_removal_repairs_rows_below_the_first_gap():
+    model = make_model(range(20))
+    assert model.remove_jobs([3, 4, 5, 10, 19, 42]) == 5
+    assert model._stale_from == 3
+    check_index(model)
+    assert model._stale_from is None
+    assert model.remove_jobs([]) == 0
+
+
+def test_inserts_in_the_middle_and_sorting_reindex():
+    model = make_model([1, 2, 3])
+    model.insertRow(1)
+    model.setItem(1, 0, model.item(0, 0).clone())
+    model.item(1, 0).setText("job 7")
+    model.item(1, 0).setData(7, JOB_ID_ROLE)
+    # The id is stored after the row exists; a sort or reset picks it up
+    model.sort(0, Qt.DescendingOrder)
+    check_index(model)
+    assert model.job_ids() == [7, 3, 2, 1]
+
+
+def test_random_structural_changes_keep_ids_and_rows_in_step():
+    rng = random.Random(3)
+    model = make_model(range(50))
+    next_id = 50
+    for _ in range(200):
+        action = rng.random()
+        if action < 0.4:
+            model.append_job(next_id, [f"job {next_id}", "Queued"])
+            next_id += 1
+        elif action < 0.8 and model.rowCount():
+            ids = model.job_ids()
+            model.remove_jobs(rng.sample(ids, rng.randint(1, min(10, len(ids)))))
+        elif model.rowCount():
+            model.sort(0, rng.choice([Qt.AscendingOrder, Qt.DescendingOrder]))
+        # Look one job up between changes, as progress updates do
+        if model.rowCount():
+            job_id = rng.choice(model.job_ids())
+            assert model.job_item(job_id, 0).text() == f"job {job_id}"
+    check_index(model)
+
+
+def test_updates_after_removal_reach_the_right_row():
+    model = make_model(range(10))
+    model.remove_jobs([0, 2, 4])
+    for job_id in model.job_ids():
+        model.job_item(job_id, 1).setText(f"status {job_id}")
+    for row in range(model.rowCount()):
+        assert model.item(row, 1).text() == f"status {model.job_id_at(row)}"
+
+
+# JobFilterProxyModel
+@pytest.fixture
+def filtered(qt_warnings):
+    model = make_model(range(10))
+    proxy = JobFilterProxyModel()
+    proxy.setSourceModel(model)
+    tester = QAbstractItemModelTester(proxy, QAbstractItemModelTester.FailureReportingMode.Warning)
+    yield model, proxy
+    del tester
+    assert qt_warnings == []
+
+
+def test_inactive_proxy_is_an_identity(filtered):
+    model, proxy = filtered
+    assert not proxy.active
+    check_proxy(proxy, model, None)
+    model.append_job(10, ["job 10", "Queued"])
+    model.remove_jobs([0])
+    check_proxy(proxy, model, None)
+
+
+def test_matches_select_rows_in_source_order(filtered):
+    model, proxy = filtered
+    proxy.set_matches({7, 2, 5, 99})
+    check_proxy(proxy, model, {2, 5, 7})
+    proxy.set_matches(None)
+    check_proxy(proxy, model, None)
+
+
+def test_job_match_changes_insert_and_remove_single_rows(filtered):
+    model, proxy = filtered
+    proxy.set_matches({2, 5})
+    inserted, removed = [], []
+    proxy.rowsInserted.connect(lambda _p, first, last: inserted.append((first, last)))
+    proxy.rowsRemoved.connect(lambda _p, first, last: removed.append((first, last)))
+    proxy.set_job_match(8, True)
+    proxy.set_job_match(0, True)
+    proxy.set_job_match(5, False)
+    proxy.set_job_match(5, False)
+    proxy.set_job_match(3, False)
+    assert inserted == [(2, 2), (0, 0)]
+    assert removed == [(2, 2)]
+    check_proxy(proxy, model, {0, 2, 8})
+
+
+def test_source_inserts_and_removals_map_through(filtered):
+    model, proxy = filtered
+    matches = {1, 4, 6, 9}
+    proxy.set_matches(matches)
+    # New rows are shown when their ids already match
+    matches.add(11)
+    model.append_job(10, ["job 10", "Queued"])
+    model.append_job(11, ["job 11", "Queued"])
+    check_proxy(proxy, model, matches)
+    # Removing a run that spans matched and unmatched rows shifts the rows below it
+    model.remove_jobs([3, 4, 5, 6])
+    matches -= {4, 6}
+    check_proxy(proxy, model, matches)
+    model.remove_jobs([0, 11])
+    check_proxy(proxy, model, matches)
+
+
+def test_data_changes_are_forwarded_to_matching_rows_only(filtered):
+    model, proxy = filtered
+    proxy.set_matches({3, 6})
+    changed = []
+    proxy.dataChanged.connect(lambda tl, br, _roles: changed.append((tl.row(), br.row())))
+    model.job_item(6, 1).setText("Downloading")
+    model.job_item(4, 1).setText("Downloading")
+    assert changed == [(1, 1)]
+    assert proxy.index(1, 1).data() == "Downloading"
+
+
+def test_sorting_the_source_rebuilds_the_mapping(filtered):
+    model, proxy = filtered
+    proxy.set_matches({1, 8})
+    model.sort(0, Qt.DescendingOrder)
+    check_proxy(proxy, model, {1, 8})
+    assert [proxy.index(r, 0).data() for r in range(2)] == ["job 8", "job 1"]
+
+
+def test_random_churn_keeps_the_proxy_consistent(filtered):
+    model, proxy = filtered
+    rng = random.Random(11)
+    matches = {j for j in model.job_ids() if rng.random() < 0.5}
+    proxy.set_matches(set(matches))
+    next_id = 10
+    for _ in range(300):
+        action = rng.random()
+        if action < 0.3:
+            if rng.random() < 0.5:
+                matches.add(next_id)
+                proxy.set_job_match(next_id, True)
+            model.append_job(next_id, [f"job {next_id}", "Queued"])
+            next_id += 1
+        elif action < 0.5 and model.rowCount():
+            ids = model.job_ids()
+            gone = rng.sample(ids, rng.randint(1, min(6, len(ids))))
+            model.remove_jobs(gone)
+            for job_id in gone:
+                proxy.set_job_match(job_id, False)
+                matches.discard(job_id)
+        elif model.rowCount():
+            job_id = rng.choice(model.job_ids())
+            matched = rng.random() < 0.5
+            proxy.set_job_match(job_id, matched)
+            (matches.add if matched else matches.discard)(job_id)
+        check_proxy(proxy, model, matches)
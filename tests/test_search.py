@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from app.core import search
+from app.core.search import SearchIndex, tokenize
+
+
+@pytest.fixture
+def small_runs(monkeypatch):
+    # Small runs so a few hundred jobs exercise the pending buffer, runs and merges
+    monkeypatch.setattr(search, "_RUN_SIZE", 8)
+
+
+def brute_force(docs, text):
+    terms = set(tokenize(text))
+    if not terms:
+        return None
+    out = set()
+    for job_id, fields in docs.items():
+        tokens = set(tokenize(" ".join(fields.values())))
+        if all(t in tokens if len(t) < search._MIN_PREFIX else any(x.startswith(t) for x in tokens) for t in terms):
+            out.add(job_id)
+    return out
+
+
+def test_tokens_are_casefolded_words():
+    assert tokenize("Straße – Live @ 1080p!") == ["strasse", "live", "1080p"]
+
+
+def test_terms_match_token_prefixes_and_all_must_match():
+    index = SearchIndex()
+    index.update(1, title="Rick Astley - Never Gonna Give You Up", status="Queued")
+    index.update(2, title="Never Mind the Bollocks", status="Completed")
+    assert index.query("nev") == {1, 2}
+    assert index.query("never gon") == {1}
+    assert index.query("NEVER mind") == {2}
+    assert index.query("ver") == set()
+    assert index.query("   ") is None
+    assert index.matches(1, "astley queued")
+    assert not index.matches(2, "astley")
+
+
+def test_one_letter_terms_match_whole_tokens_only():
+    index = SearchIndex()
+    index.update(1, title="a b c")
+    index.update(2, title="abc")
+    assert index.query("a") == {1}
+    assert index.matches(1, "b") and not index.matches(2, "b")
+
+
+def test_updates_replace_old_tokens():
+    index = SearchIndex()
+    assert index.update(1, title="first", status="Queued")
+    assert not index.update(1, status="Queued")
+    assert index.update(1, status="Downloading")
+    assert index.query("queued") == set()
+    assert index.query("down first") == {1}
+    index.update(1, title=None)
+    assert index.query("first") == set()
+
+
+def test_unknown_field_is_rejected():
+    with pytest.raises(KeyError):
+        SearchIndex().update(1, uploader="someone")
+
+
+def test_remove_drops_job_from_every_posting():
+    index = SearchIndex()
+    index.update(1, title="shared one")
+    index.update(2, title="shared two")
+    index.remove_many([1, 3])
+    assert index.query("shared") == {2}
+    assert index.query("one") == set()
+    assert not index.matches(1, "shared")
+    assert len(index) == 1
+
+
+def test_tokens_in_runs_and_pending_are_both_found(small_runs):
+    index = SearchIndex()
+    for i in range(100):
+        index.update(i, title=f"tok{i:03d}")
+    assert index._runs and index._pending
+    assert index.query("tok0") == set(range(100))
+    assert index.query("tok09") == set(range(90, 100))
+    assert index.query("tok099") == {99}
+
+
+def test_runs_stay_logarithmic_and_merges_prune_removed_tokens(small_runs):
+    index = SearchIndex()
+    for i in range(512):
+        index.update(i, title=f"word{i}")
+    sizes = [len(run) for run in index._runs]
+    assert all(a > 2 * b for a, b in zip(sizes, sizes[1:]))
+    # Cleared jobs leave their tokens behind until the next merge drops them
+    index.remove_many(range(512))
+    for i in range(512, 1024):
+        index.update(i, title=f"word{i}")
+    vocabulary = [t for run in index._runs for t in run] + index._pending
+    assert len(vocabulary) < 2 * 512
+    assert index.query("word") == set(range(512, 1024))
+
+
+def test_tokens_removed_and_added_again_are_found(small_runs):
+    index = SearchIndex()
+    for _ in range(5):
+        for i in range(20):
+            index.update(i, title=f"again{i}")
+        assert index.query("again1") == {1, *range(10, 20)}
+        index.remove_many(range(20))
+    assert index.query("again") == set()
+
+
+def test_random_churn_matches_brute_force(small_runs):
+    rng = random.Random(7)
+    words = ["alpha", "alps", "beta", "bet", "gamma", "gam", "delta", "d", "epsilon", "ep"]
+    index = SearchIndex()
+    docs = {}
+    for step in range(2000):
+        job_id = rng.randrange(200)
+        if rng.random() < 0.2:
+            index.remove(job_id)
+            docs.pop(job_id, None)
+            continue
+        title = " ".join(rng.sample(words, 3)) + f" id{job_id}"
+        status = rng.choice(["Queued", "Downloading", "Completed"])
+        index.update(job_id, title=title, status=status)
+        docs[job_id] = {"title": title, "status": status}
+        if step % 50 == 0:
+            for text in ["al", "bet", "gam d", "ep queued", "id1", "d", "completed alp"]:
+                assert index.query(text) == brute_force(docs, text), text
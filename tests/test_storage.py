@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import shutil
+from collections import namedtuple
+
+import pytest
+
+from app.core import storage
+from app.core.storage import MERGE_FACTOR, DiskBudget, disk_needs, estimate_size, needs_merge
+
+Usage = namedtuple("Usage", "total used free")
+
+
+@pytest.fixture
+def free_space(monkeypatch):
+    # Every path reports the same volume with this much free space
+    free = {"bytes": 1000}
+    monkeypatch.setattr(shutil, "disk_usage", lambda _path: Usage(10**6, 0, free["bytes"]))
+    return free
+
+
+def test_reservations_share_the_free_space(tmp_path, free_space):
+    budget = DiskBudget(margin=100)
+    assert budget.reserve("a", {tmp_path: 500})
+    assert budget.free_for(tmp_path) == 400
+    assert not budget.reserve("b", {tmp_path: 500})
+    assert budget.reserve("b", {tmp_path: 400})
+    budget.release("a")
+    assert budget.free_for(tmp_path) == 500
+
+
+def test_written_bytes_are_no_longer_outstanding(tmp_path, free_space):
+    budget = DiskBudget(margin=0)
+    assert budget.reserve("a", {tmp_path: 800})
+    # The disk fills as the job writes; only its unwritten part is still promised
+    budget.written("a", tmp_path, 600)
+    free_space["bytes"] = 400
+    assert budget.free_for(tmp_path) == 200
+    assert budget.reserve("b", {tmp_path: 200})
+
+
+def test_failed_reserve_keeps_the_previous_one(tmp_path, free_space):
+    budget = DiskBudget(margin=0)
+    assert budget.reserve("a", {tmp_path: 300})
+    assert not budget.reserve("a", {tmp_path: 5000})
+    assert budget.free_for(tmp_path) == 700
+
+
+def test_missing_output_folder_is_checked_on_its_parent(tmp_path, free_space):
+    # Queued jobs are sized before the first download creates the folder
+    budget = DiskBudget(margin=0)
+    outdir = tmp_path / "not" / "yet"
+    assert budget.reserve("a", disk_needs(400, False, outdir, outdir))
+    assert budget.free_for(outdir) == budget.free_for(tmp_path) == 600
+    assert not outdir.exists()
+
+
+def test_merges_need_room_for_the_streams_and_the_result(tmp_path):
+    staging, outdir = tmp_path / "staging", tmp_path / "out"
+    assert disk_needs(100, True, staging, outdir) == {staging: 100 * MERGE_FACTOR, outdir: 100}
+    assert disk_needs(100, False, outdir, outdir) == {outdir: 100}
+
+
+def test_estimates_cover_one_video():
+    video = {"requested_formats": [{"filesize": 300}, {"filesize_approx": 50}]}
+    assert estimate_size(video) == 350
+    assert needs_merge(video)
+    assert estimate_size({"filesize": 10}) == 10 and not needs_merge({"filesize": 10})
+    assert estimate_size({"requested_formats": [{"filesize": 300}, {}]}) is None
+    # Playlists are sized per entry as each one downloads
+    assert estimate_size({"_type": "playlist", "entries": [video]}) is None
+
+
+def test_device_of_a_missing_path_is_its_parents(tmp_path):
+    assert storage._device(tmp_path / "a" / "b") == storage._device(tmp_path)
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import pytest
+
+from app.core import subscriptions
+from app.core.subscriptions import fetch_updates
+
+CHANNEL = "https://www.youtube.com/@chan"
+
+
+def videos(prefix, count):
+    # Newest first, as a channel tab lists them
+    for i in range(count, 0, -1):
+        yield {"_type": "url", "ie_key": "Youtube", "id": f"{prefix}{i}", "title": f"{prefix} {i}",
+               "url": f"https://www.youtube.com/watch?v={prefix}{i}"}
+
+
+def tab(name, prefix, count, url=None):
+    return {"_type": "playlist", "title": f"chan - {name}", "webpage_url": url or f"{CHANNEL}/{name.lower()}",
+            "extractor_key": "YoutubeTab", "entries": videos(prefix, count)}
+
+
+class FakeYDL:
+    def __init__(self, pages):
+        self.pages = pages
+        self.extracted = []
+
+    def extract_info(self, url, download=False, process=True, ie_key=None):
+        self.extracted.append(url)
+        return self.pages[url]()
+
+
+@pytest.fixture
+def feed(monkeypatch):
+    def install(pages):
+        ydl = FakeYDL(pages)
+        monkeypatch.setattr(subscriptions, "_checkout", lambda _browser: ydl)
+        monkeypatch.setattr(subscriptions, "_checkin", lambda _browser, _ydl: None)
+        return ydl
+    return install
+
+
+def channel(entries):
+    return {"_type": "playlist", "title": "chan", "webpage_url": CHANNEL, "extractor_key": "YoutubeTab",
+            "entries": entries}
+
+
+def test_channel_tabs_are_not_queued_as_videos(feed):
+    # yt-dlp lists a channel home as one playlist per tab, uploads first
+    feed({CHANNEL: lambda: channel([tab("Videos", "v", 3, url=CHANNEL), tab("Streams", "s", 2), tab("Shorts", "x", 2)])})
+    title, extractor, new, _ = fetch_updates(CHANNEL, [])
+    assert (title, extractor) == ("chan", "YoutubeTab")
+    assert [e["id"] for e in new] == ["v3", "v2", "v1"]
+    _, _, new, _ = fetch_updates(CHANNEL, ["v2", "v1"])
+    assert [e["id"] for e in new] == ["v3"]
+
+
+def test_videos_tab_is_preferred_to_the_first(feed):
+    feed({CHANNEL: lambda: channel([tab("Shorts", "x", 2), tab("Videos", "v", 1)])})
+    assert [e["id"] for e in fetch_updates(CHANNEL, [])[2]] == ["v1"]
+
+
+def test_flat_tab_links_are_extracted(feed):
+    links = ({"_type": "url", "ie_key": "YoutubeTab", "url": f"{CHANNEL}/{name}", "title": name}
+             for name in ("streams", "videos"))
+    ydl = feed({
+        CHANNEL: lambda: channel(links),
+        f"{CHANNEL}/videos": lambda: tab("Videos", "v", 2),
+    })
+    title, _, new, _ = fetch_updates(CHANNEL, [])
+    assert title == "chan"
+    assert [e["id"] for e in new] == ["v2", "v1"]
+    assert ydl.extracted == [CHANNEL, f"{CHANNEL}/videos"]
+
+
+def test_plain_playlists_are_read_as_they_are(feed):
+    playlist = "https://www.youtube.com/playlist?list=PL1"
+    page = {"_type": "playlist", "title": "list", "webpage_url": playlist, "extractor_key": "YoutubeTab"}
+    # A generator is peeked at without losing its first entry
+    feed({playlist: lambda: {**page, "entries": videos("p", 3)}})
+    assert [e["id"] for e in fetch_updates(playlist, [])[2]] == ["p3", "p2", "p1"]
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import http.client
+import os
+import urllib.request
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+from app.core.thumbnails import ThumbnailStore  # noqa: E402
+from app.ui.thumbnails import ThumbnailCache  # noqa: E402
+
+URL = "http://thumbs.invalid/a.jpg"
+
+
+@pytest.fixture(scope="module", autouse=True)
+def qapp():
+    return QApplication.instance() or QApplication([])
+
+
+def dropped_connection(*_args, **_kwargs):
+    raise http.client.IncompleteRead(b"\xff\xd8", 4096)
+
+
+def test_fetch_reports_protocol_errors_as_oserror(tmp_path, monkeypatch):
+    monkeypatch.setattr(urllib.request, "urlopen", dropped_connection)
+    store = ThumbnailStore(tmp_path)
+    for _ in range(2):
+        # The second attempt would wait forever if the first had not finished its fetch
+        with pytest.raises(OSError):
+            store.fetch(URL)
+    assert not store.original_path(URL).exists()
+
+
+class BrokenStore(ThumbnailStore):
+    def fetch(self, url, headers=None):
+        raise RuntimeError("decoder fell over")
+
+
+@pytest.mark.parametrize("store_class", [ThumbnailStore, BrokenStore])
+def test_failed_load_leaves_nothing_in_flight(tmp_path, monkeypatch, qapp, store_class):
+    monkeypatch.setattr(urllib.request, "urlopen", dropped_connection)
+    cache = ThumbnailCache(store_class(tmp_path))
+    cache.set_url(1, URL)
+    assert cache.icon(1) is None
+    cache._pool.waitForDone()
+    qapp.processEvents()
+    assert not cache.busy
+    assert URL in cache._failed
+
+
+def test_embed_thumbnail_fetch_failure_does_not_fail_the_download(tmp_path):
+    from app.core.postprocessors import CachedThumbnailPP
+
+    info = {"thumbnails": [{"url": URL}], "_filename": str(tmp_path / "v.mp4"), "ext": "mp4"}
+    files, out = CachedThumbnailPP(BrokenStore(tmp_path)).run(info)
+    assert files == [] and "filepath" not in out["thumbnails"][0]